@@ -1,25 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+
+from fastapi import FastAPI, Query, Request
+
+from neo4j_integration.base_connector import open_driver, close_driver
+from response_cache import cached_response
+from streaming import streamed_response, STREAM_WRITERS
+from neo4j_integration.lineage_paging import is_paged_request
 
 # Import column functions
 from neo4j_integration.fetch_columns import (
     fetch_columns,
-    fetch_column_lineage_nodes,
-    fetch_column_lineage_edges,
+    stream_columns,
+    fetch_column_lineage,
+    fetch_column_lineage_page,
 )
 
 # Import unified object functions
 from neo4j_integration.fetch_objects import (
     fetch_all_objects,
+    stream_all_objects,
     fetch_object_by_name,
 )
 
 from neo4j_integration.fetch_object_lineage import (
     fetch_object_lineage,
-    fetch_object_lineage_edges
+    fetch_object_lineage_edges,
+    fetch_object_lineage_page
 )
 
 from fastapi.middleware.cors import CORSMiddleware
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One async driver (and connection pool) shared by all requests
+    await open_driver()
+    try:
+        yield
+    finally:
+        await close_driver()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,46 +50,99 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# "json" and the columnar "compact" (serialization.py) responses are cached,
+# the streamed formats are not, see streaming.py
+CachedFormat = Literal["json", "compact"]
+ResponseFormat = Literal["json", "compact", "ndjson", "json-stream"]
+
+
 # New unified object endpoints
+# Responses are cached per graph version and carry it as ETag, see response_cache.py
 @app.get('/api/objects')
-async def get_objects():
+async def get_objects(request: Request, format: ResponseFormat = "json"):
     """Get all objects (data models and stored procedures)."""
-    elements = fetch_all_objects()
-    return {'elements': elements}
+    if format in STREAM_WRITERS:
+        return await streamed_response(request, stream_all_objects(), format)
+
+    async def fetch():
+        elements = await fetch_all_objects()
+        return {'elements': elements}
+    return await cached_response(request, ('objects',), fetch, format)
 
 
 @app.get('/api/objects/{name}')
-async def get_object(name: str):
+async def get_object(request: Request, name: str, format: CachedFormat = "json"):
     """Get a specific object (data model or stored procedure) by name."""
-    obj = fetch_object_by_name(name)
-    return {'elements': [obj] if obj else []}
+    async def fetch():
+        obj = await fetch_object_by_name(name)
+        return {'elements': [obj] if obj else []}
+    return await cached_response(request, ('object', name), fetch, format)
+
+
+# Optional on the lineage endpoints, see neo4j_integration/lineage_paging.py
+Depth = Query(None, ge=0, description="Maximum hops from the start node")
+Direction = Literal["UPSTREAM", "DOWNSTREAM", "BOTH"]
+Limit = Query(None, ge=1, description="Maximum nodes per page")
+Cursor = Query(None, pattern=r"^\d+:", description="next_cursor of the previous page")
 
 
 @app.get('/api/object/lineage/{name}')
-async def get_object_lineage(name: str):
-    elements = fetch_object_lineage(name)    
-    return {"elements": elements}
+async def get_object_lineage(
+    request: Request,
+    name: str,
+    depth: Optional[int] = Depth,
+    direction: Direction = "BOTH",
+    limit: Optional[int] = Limit,
+    cursor: Optional[str] = Cursor,
+    format: CachedFormat = "json"
+):
+    async def fetch():
+        if not is_paged_request(depth, direction, limit, cursor):
+            elements = await fetch_object_lineage(name)
+            return {"elements": elements}
+        elements, next_cursor = await fetch_object_lineage_page(name, depth, direction, limit, cursor)
+        return {"elements": elements, "next_cursor": next_cursor}
+    return await cached_response(request, ('object_lineage', name, depth, direction, limit, cursor), fetch, format)
 
 
 @app.get('/api/object/lineage/edges/{name}')
-async def get_object_lineage_edges(name: str):
-    elements = fetch_object_lineage_edges(name)
-    return {"elements": elements}
+async def get_object_lineage_edges(request: Request, name: str, format: CachedFormat = "json"):
+    async def fetch():
+        elements = await fetch_object_lineage_edges(name)
+        return {"elements": elements}
+    return await cached_response(request, ('object_lineage_edges', name), fetch, format)
 
 
 @app.get('/api/columns/{datamodel_name}')
-async def get_columns(datamodel_name: str):
-    elements = fetch_columns(datamodel_name)
-    return {'elements': elements}
+async def get_columns(request: Request, datamodel_name: str, format: ResponseFormat = "json"):
+    if format in STREAM_WRITERS:
+        return await streamed_response(request, stream_columns(datamodel_name), format)
+
+    async def fetch():
+        elements = await fetch_columns(datamodel_name)
+        return {'elements': elements}
+    return await cached_response(request, ('columns', datamodel_name), fetch, format)
 
 @app.get('/api/column/lineage/{name}')
-async def get_column_lineage(name: str):
-    nodes = fetch_column_lineage_nodes(name)
-    edges = fetch_column_lineage_edges(name)
-    elements = nodes + edges
-    return {'elements': elements}
+async def get_column_lineage(
+    request: Request,
+    name: str,
+    depth: Optional[int] = Depth,
+    direction: Direction = "BOTH",
+    limit: Optional[int] = Limit,
+    cursor: Optional[str] = Cursor,
+    format: CachedFormat = "json"
+):
+    async def fetch():
+        if not is_paged_request(depth, direction, limit, cursor):
+            elements = await fetch_column_lineage(name)
+            return {'elements': elements}
+        elements, next_cursor = await fetch_column_lineage_page(name, depth, direction, limit, cursor)
+        return {'elements': elements, 'next_cursor': next_cursor}
+    return await cached_response(request, ('column_lineage', name, depth, direction, limit, cursor), fetch, format)
 
 # Legacy procedure endpoints removed - handled by object endpoints
 
@@ -1,4 +1,4 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 import os
 from dotenv import load_dotenv
 
@@ -10,17 +10,65 @@ URI = os.getenv("NEO4J_URI")
 USERNAME = os.getenv("NEO4J_USERNAME")
 PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-# Create the driver instance
-driver = GraphDatabase.driver(URI, auth=(USERNAME, PASSWORD))
+# Connection pool and result streaming settings
+MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "100"))
+CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+
+# The driver instance, opened and closed by the FastAPI lifespan (see app.py)
+driver = None
+
+
+async def open_driver():
+    global driver
+    driver = AsyncGraphDatabase.driver(
+        URI,
+        auth=(USERNAME, PASSWORD),
+        max_connection_pool_size=MAX_CONNECTION_POOL_SIZE,
+        connection_acquisition_timeout=CONNECTION_ACQUISITION_TIMEOUT,
+    )
+    return driver
+
+
+async def close_driver():
+    global driver
+    if driver is not None:
+        await driver.close()
+        driver = None
+
+
+async def fetch_records(tx, query, params):
+    result = await tx.run(query, params)
+    return [record async for record in result]
+
+
+async def run_read_query(query, **params):
+    """
+    Runs a read query on a pooled connection and returns all its records.
+    Awaiting the query does not block the event loop, so concurrent requests overlap.
+    """
+    async with driver.session(fetch_size=FETCH_SIZE) as session:
+        return await session.execute_read(fetch_records, query, params)
+
+
+async def stream_read_query(query, **params):
+    """
+    Yields the records of a read query while they arrive, FETCH_SIZE records per round trip,
+    so callers can process results of any size in constant memory.
+    Runs as an auto-commit transaction: a stream that was partly consumed can't be retried.
+    """
+    async with driver.session(fetch_size=FETCH_SIZE) as session:
+        result = await session.run(query, params)
+        async for record in result:
+            yield record
+
 
 # Method to check connection and verify credentials
-def verify_connection():
+async def verify_connection():
     try:
-        with driver.session() as session:
-            result = session.run("RETURN 1 as test")
-            record = result.single()
-            if record and record["test"] == 1:
-                return True, "Connection successful"
-            return False, "Connection returned invalid data"
+        records = await run_read_query("RETURN 1 as test")
+        if records and records[0]["test"] == 1:
+            return True, "Connection successful"
+        return False, "Connection returned invalid data"
     except Exception as e:
         return False, f"Connection failed: {str(e)}"
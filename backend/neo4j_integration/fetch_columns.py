@@ -1,9 +1,13 @@
+import asyncio
+
 # Import shared Neo4j connection
-from neo4j_integration.base_connector import driver
-from neo4j_integration.utils import create_node_elements, create_edge_elements
+from neo4j_integration.base_connector import run_read_query, stream_read_query
+from neo4j_integration.lineage_engine import fetch_start_ids, reachable
+from neo4j_integration.lineage_paging import get_lineage, paginate, add_hops
+from neo4j_integration.utils import create_node_elements, create_edge_elements, create_node_element
 
 
-def fetch_columns(datamodel_name):
+async def fetch_columns(datamodel_name):
     """
     Fetches all columns for a specific datamodel.
     
@@ -30,12 +34,97 @@ def fetch_columns(datamodel_name):
             c.object AS object,
             c.object_type AS object_type
     """
-    with driver.session() as session:
-        result = session.run(query, datamodel_name=datamodel_name)
-        return create_node_elements(result)
+    result = await run_read_query(query, datamodel_name=datamodel_name)
+    return create_node_elements(result)
+
 
+COLUMN_PROPERTIES = """
+            c.name AS name,
+            c.original_name AS original_name,
+            c.type AS type,
+            c.is_type_guessed AS is_type_guessed,
+            c.is_type_updated AS is_type_updated,
+            c.datamodel_name AS datamodel_name,
+            c.original_datamodel_name AS original_datamodel_name,
+            c.node_type AS node_type,
+            c.transformations AS transformations,
+            c.warehouse AS warehouse,
+            c.schema AS schema,
+            c.object AS object,
+            c.object_type AS object_type
+"""
 
-def fetch_column_lineage_nodes(name):
+
+async def stream_columns(datamodel_name):
+    """Yields the elements of fetch_columns one at a time."""
+    query = f"""
+        MATCH (d:DataModel {{name: $datamodel_name}})-[:HAS_COLUMN]->(c:Column)
+        RETURN {COLUMN_PROPERTIES}
+    """
+    async for record in stream_read_query(query, datamodel_name=datamodel_name):
+        yield create_node_element(record)
+
+
+async def traverse_column_lineage(name):
+    """
+    Collects the UPSTREAM_COLUMN relationships of a column in both directions.
+
+    Returns (element ids of the column and every column reachable from it, edge elements).
+    """
+    start_ids = await fetch_start_ids(name, ["Column"])
+    (upstream_ids, upstream_edges), (downstream_ids, downstream_edges) = await asyncio.gather(
+        reachable(start_ids, ["Column"], "UPSTREAM_COLUMN", "out"),
+        reachable(start_ids, ["Column"], "UPSTREAM_COLUMN", "in")
+    )
+
+    rows = create_column_edge_rows(downstream_edges, "DOWNSTREAM") + create_column_edge_rows(upstream_edges, "UPSTREAM")
+    return upstream_ids | downstream_ids, create_edge_elements(rows)
+
+
+def create_column_edge_rows(edges, direction):
+    return [
+        {
+            "source": edge["source"],
+            "target": edge["target"],
+            "relationship": "upstream_column",
+            "direction": direction,
+        }
+        for edge in edges.values()
+    ]
+
+
+async def fetch_columns_by_ids(ids):
+    query = f"""
+        UNWIND $ids AS id
+        MATCH (c:Column)
+        WHERE elementId(c) = id
+        RETURN {COLUMN_PROPERTIES}
+    """
+    result = await run_read_query(query, ids=list(ids))
+    return create_node_elements(result)
+
+
+async def fetch_columns_by_names(names):
+    query = f"""
+        UNWIND $names AS name
+        MATCH (c:Column {{name: name}})
+        RETURN {COLUMN_PROPERTIES}
+    """
+    result = await run_read_query(query, names=list(names))
+    return create_node_elements(result)
+
+
+async def fetch_column_lineage(name):
+    """
+    Fetches a column, all related upstream and downstream columns and the relationships between them.
+    The lineage is collected once, from the lineage index or by reachability (see lineage_engine).
+    """
+    ids, edges = await traverse_column_lineage(name)
+    nodes = await fetch_columns_by_ids(ids)
+    return nodes + edges
+
+
+async def fetch_column_lineage_nodes(name):
     """
     Fetches a column and all related upstream and downstream columns.
     
@@ -45,70 +134,11 @@ def fetch_column_lineage_nodes(name):
     Returns:
         list: A list of node elements representing the column lineage.
     """
-    query = """
-        // Column <n> itself
-        MATCH (a:Column)
-        WHERE a.name = $name
-        RETURN DISTINCT
-            a.name AS name,
-            a.original_name AS original_name,
-            a.type AS type,
-            a.is_type_guessed AS is_type_guessed,
-            a.is_type_updated AS is_type_updated,
-            a.datamodel_name AS datamodel_name,
-            a.original_datamodel_name AS original_datamodel_name,
-            a.node_type AS node_type,
-            a.transformations AS transformations,
-            a.warehouse AS warehouse,
-            a.schema AS schema,
-            a.object AS object,
-            a.object_type AS object_type
-
-        UNION
-
-        // Upstream columns
-        MATCH (a:Column)-[:UPSTREAM_COLUMN*]->(b:Column)
-        WHERE a.name = $name
-        RETURN DISTINCT
-            b.name AS name,
-            b.original_name AS original_name,
-            b.type AS type,
-            b.is_type_guessed AS is_type_guessed,
-            b.is_type_updated AS is_type_updated,
-            b.datamodel_name AS datamodel_name,
-            b.original_datamodel_name AS original_datamodel_name,
-            b.node_type AS node_type,
-            b.transformations AS transformations,
-            b.warehouse AS warehouse,
-            b.schema AS schema,
-            b.object AS object,
-            b.object_type AS object_type
-        UNION
-
-        // Downstream columns
-        MATCH (a:Column)<-[:UPSTREAM_COLUMN*]-(b:Column)
-        WHERE a.name = $name
-        RETURN DISTINCT
-            b.name AS name,
-            b.original_name AS original_name,
-            b.type AS type,
-            b.is_type_guessed AS is_type_guessed,
-            b.is_type_updated AS is_type_updated,
-            b.datamodel_name AS datamodel_name,
-            b.original_datamodel_name AS original_datamodel_name,
-            b.node_type AS node_type,
-            b.transformations AS transformations,
-            b.warehouse AS warehouse,
-            b.schema AS schema,
-            b.object AS object,
-            b.object_type AS object_type
-    """
-    with driver.session() as session:
-        result = session.run(query, name=name)
-        return create_node_elements(result)
-
-
-def fetch_column_lineage_edges(name):
+    ids, _ = await traverse_column_lineage(name)
+    return await fetch_columns_by_ids(ids)
+
+
+async def fetch_column_lineage_edges(name):
     """
     Fetches the relationships between a column and its upstream/downstream columns.
     
@@ -118,30 +148,19 @@ def fetch_column_lineage_edges(name):
     Returns:
         list: A list of edge elements representing the relationships.
     """
-    query = """
-        // Downstream to column <name>
-        MATCH p=(start:Column)-[:UPSTREAM_COLUMN*]->(end:Column)
-        WHERE end.name = $name
-        UNWIND relationships(p) AS rel
-        RETURN 
-            startNode(rel).name AS source,
-            endNode(rel).name AS target,
-            toLower(type(rel)) AS relationship,
-            'DOWNSTREAM' AS direction
+    _, edges = await traverse_column_lineage(name)
+    return edges
 
-        UNION
 
-        // Upstream from column <name>
-        MATCH p=(start:Column)-[:UPSTREAM_COLUMN*]->(end:Column)
-        WHERE start.name = $name
-        UNWIND relationships(p) AS rel
-        RETURN 
-            startNode(rel).name AS source,
-            endNode(rel).name AS target,
-            toLower(type(rel)) AS relationship,
-            'UPSTREAM' AS direction
+async def fetch_column_lineage_page(name, depth=None, direction="BOTH", limit=None, cursor=None):
     """
-
-    with driver.session() as session:
-        result = session.run(query, name=name)
-        return create_edge_elements(result)
+    Fetches the columns within `depth` hops of a column and the relationships between them,
+    one page of `limit` nodes at a time (see lineage_paging). Returns (elements, next cursor).
+    """
+    start_ids = await fetch_start_ids(name, ["Column"])
+    hops, expandable, edge_rows, order = await get_lineage(
+        name, start_ids, "UPSTREAM_COLUMN", direction, depth, create_column_edge_rows
+    )
+    page, page_edge_rows, next_cursor = paginate(order, hops, edge_rows, limit, cursor)
+    nodes = add_hops(await fetch_columns_by_names(page), hops, expandable)
+    return nodes + create_edge_elements(page_edge_rows), next_cursor
@@ -1,105 +1,113 @@
-from neo4j_integration.base_connector import driver
+import asyncio
+
+from neo4j_integration.base_connector import run_read_query
+from neo4j_integration.lineage_engine import fetch_start_ids, reachable, get_line_mode
+from neo4j_integration.lineage_paging import get_lineage, paginate, add_hops
 from neo4j_integration.utils import create_node_elements, create_edge_elements
-from concurrent.futures import ThreadPoolExecutor
-
-def fetch_object_lineage_edges_upstream(node_name):
-    query = """
-        MATCH path = (start {name: $node_name})-[:UPSTREAM_MODEL*]->(other)
-        UNWIND relationships(path) AS rel
-        WITH DISTINCT start, startNode(rel) AS sourceNode, endNode(rel) AS targetNode, rel
-        WHERE NOT (sourceNode:StoredProcedure AND targetNode.name = $node_name)
-        OPTIONAL MATCH (targetNode)-[r2:UPSTREAM_MODEL]->(sourceNode)
-        WITH sourceNode, targetNode, r2,
-            CASE 
-                WHEN (sourceNode:StoredProcedure OR targetNode:StoredProcedure) AND r2 IS NOT NULL THEN 'bi'
-                WHEN sourceNode:StoredProcedure THEN 'dash'
-                ELSE null
-            END AS line_mode
-        WHERE 
-            line_mode IS NULL
-            OR line_mode = 'dash'
-            OR (line_mode = 'bi' AND sourceNode:StoredProcedure)
-        RETURN DISTINCT
-            sourceNode.name AS source,
-            targetNode.name AS target,
-            'UPSTREAM' AS direction,
-            sourceNode.name + '.' + targetNode.name AS id,
-            line_mode
+
+# Only these carry UPSTREAM_MODEL relationships
+OBJECT_LABELS = ["DataModel", "StoredProcedure"]
+
+
+def create_object_edge_rows(edges, direction, node_name):
+    """Applies the stored procedure rules of the frontend to traversed UPSTREAM_MODEL edges."""
+    rows = []
+    for edge in edges.values():
+        # A stored procedure writing into the start node is shown by its reading edge
+        if direction == "UPSTREAM" and edge["source_is_procedure"] and edge["target"] == node_name:
+            continue
+        if direction == "DOWNSTREAM" and edge["target_is_procedure"] and edge["source"] == node_name:
+            continue
+
+        line_mode, keep = get_line_mode(edge, edges)
+        if not keep:
+            continue
+        rows.append({
+            "source": edge["source"],
+            "target": edge["target"],
+            "direction": direction,
+            "id": f'{edge["source"]}.{edge["target"]}',
+            "line_mode": line_mode,
+        })
+    return rows
+
+
+async def traverse_object_lineage(node_name):
     """
-    with driver.session() as session:
-        result = session.run(query, node_name=node_name)
-        return create_edge_elements(result)
-
-
-
-def fetch_object_lineage_edges_downstream(node_name):
-    query = """
-        MATCH path = (start {name: $node_name})<-[:UPSTREAM_MODEL*]-(other)
-        UNWIND relationships(path) AS rel
-        WITH DISTINCT start, startNode(rel) AS sourceNode, endNode(rel) AS targetNode, rel
-        WHERE NOT (targetNode:StoredProcedure AND sourceNode.name = $node_name)
-        OPTIONAL MATCH (targetNode)-[r2:UPSTREAM_MODEL]->(sourceNode)
-        WITH sourceNode, targetNode, r2,
-            CASE 
-                WHEN (sourceNode:StoredProcedure OR targetNode:StoredProcedure) AND r2 IS NOT NULL THEN 'bi'
-                WHEN sourceNode:StoredProcedure THEN 'dash'
-                ELSE null
-            END AS line_mode
-        WHERE 
-            line_mode IS NULL
-            OR line_mode = 'dash'
-            OR (line_mode = 'bi' AND sourceNode:StoredProcedure)
-        RETURN DISTINCT
-            sourceNode.name AS source,
-            targetNode.name AS target,
-            'DOWNSTREAM' AS direction,
-            sourceNode.name + '.' + targetNode.name AS id,
-            line_mode
+    Collects the UPSTREAM_MODEL relationships of an object in both directions.
+
+    Returns (element ids of the object and every object reachable from it, edge elements).
     """
-    with driver.session() as session:
-        result = session.run(query, node_name=node_name)
-        return create_edge_elements(result)
+    start_ids = await fetch_start_ids(node_name, OBJECT_LABELS)
+    (upstream_ids, upstream_edges), (downstream_ids, downstream_edges) = await asyncio.gather(
+        reachable(start_ids, OBJECT_LABELS, "UPSTREAM_MODEL", "out"),
+        reachable(start_ids, OBJECT_LABELS, "UPSTREAM_MODEL", "in")
+    )
 
+    rows = create_object_edge_rows(upstream_edges, "UPSTREAM", node_name) + create_object_edge_rows(downstream_edges, "DOWNSTREAM", node_name)
+    return upstream_ids | downstream_ids, create_edge_elements(rows)
 
 
-def fetch_nodes_by_name_list(node_names):
-    query = """
-        MATCH (n)
-        WHERE n.name IN $node_names
-        RETURN
+OBJECT_PROPERTIES = """
             n.name AS name,
             n.node_type as node_type,
             n.type as type,
             n.warehouse as warehouse,
             n.schema as schema,
             n.object as object
+"""
+
+
+async def fetch_nodes_by_ids(ids):
+    query = f"""
+        UNWIND $ids AS id
+        MATCH (n)
+        WHERE elementId(n) = id
+        RETURN {OBJECT_PROPERTIES}
     """
+    result = await run_read_query(query, ids=list(ids))
+    return create_node_elements(result)
 
-    with driver.session() as session:
-        result = session.run(query, node_names=node_names)
-        return create_node_elements(result)
-        
 
-def fetch_object_lineage(node_name):
-    edges = fetch_object_lineage_edges(node_name)
+async def fetch_nodes_by_name_list(node_names):
+    # One branch per label, so every lookup uses the name constraint of that label
+    lookups = " UNION ".join(
+        f"WITH name MATCH (n:{label} {{name: name}}) RETURN n" for label in OBJECT_LABELS
+    )
+    query = f"""
+        UNWIND $node_names AS name
+        CALL {{ {lookups} }}
+        RETURN {OBJECT_PROPERTIES}
+    """
+    result = await run_read_query(query, node_names=list(node_names))
+    return create_node_elements(result)
 
-    node_names = set()
-    for edge in edges:
-        node_names.add(edge['data']["source"])
-        node_names.add(edge['data']["target"])
-    
-    nodes = fetch_nodes_by_name_list(list(node_names))
+
+async def fetch_object_lineage(node_name):
+    """
+    Fetches an object, all related upstream and downstream objects and the relationships between them.
+    The lineage is collected once, from the lineage index or by reachability (see lineage_engine).
+    """
+    ids, edges = await traverse_object_lineage(node_name)
+    nodes = await fetch_nodes_by_ids(ids)
     return nodes + edges
 
 
-def fetch_object_lineage_edges(node_name):
-    with ThreadPoolExecutor() as executor:
-        downstream_edges_future = executor.submit(fetch_object_lineage_edges_downstream, node_name)
-        upstream_edges_future = executor.submit(fetch_object_lineage_edges_upstream, node_name)
-        downstream_edges = downstream_edges_future.result()
-        upstream_edges = upstream_edges_future.result()
-    
-    # Combine all edges
-    all_edges = upstream_edges + downstream_edges
-    
-    return all_edges
+async def fetch_object_lineage_edges(node_name):
+    _, edges = await traverse_object_lineage(node_name)
+    return edges
+
+
+async def fetch_object_lineage_page(node_name, depth=None, direction="BOTH", limit=None, cursor=None):
+    """
+    Fetches the objects within `depth` hops of an object and the relationships between them,
+    one page of `limit` nodes at a time (see lineage_paging). Returns (elements, next cursor).
+    """
+    start_ids = await fetch_start_ids(node_name, OBJECT_LABELS)
+    hops, expandable, edge_rows, order = await get_lineage(
+        node_name, start_ids, "UPSTREAM_MODEL", direction, depth,
+        lambda edges, lineage_direction: create_object_edge_rows(edges, lineage_direction, node_name)
+    )
+    page, page_edge_rows, next_cursor = paginate(order, hops, edge_rows, limit, cursor)
+    nodes = add_hops(await fetch_nodes_by_name_list(page), hops, expandable)
+    return nodes + create_edge_elements(page_edge_rows), next_cursor
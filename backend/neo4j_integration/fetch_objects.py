@@ -1,10 +1,11 @@
-from neo4j_integration.base_connector import driver
-from neo4j_integration.utils import create_node_elements, create_edge_elements
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 
+from neo4j_integration.base_connector import run_read_query, stream_read_query
+from neo4j_integration.graph_version import has_lineage_index
+from neo4j_integration.utils import create_node_elements, create_edge_elements, create_node_element, create_edge_element
 
-def fetch_all_object_nodes():
-    query = """
+
+OBJECT_NODES_QUERY = """
         MATCH (n)
         WHERE n:DataModel OR n:StoredProcedure
         RETURN
@@ -16,16 +17,30 @@ def fetch_all_object_nodes():
             n.schema AS schema,
             n.object AS object,
             head(labels(n)) AS label
-    """
+"""
 
-    with driver.session() as session:
-        result = session.run(query)
-        return create_node_elements(result)
 
+async def fetch_all_object_nodes():
+    result = await run_read_query(OBJECT_NODES_QUERY)
+    return create_node_elements(result)
 
 
-def fetch_all_object_edges():
-    query = """
+OBJECT_EDGES_QUERY = """
+        MATCH (a)-[r:UPSTREAM_MODEL]->(b)
+        WHERE 
+            (a:DataModel OR a:StoredProcedure) AND 
+            (b:DataModel OR b:StoredProcedure) AND
+            coalesce(r.drawn, true)
+        RETURN 
+            a.name AS source,
+            b.name AS target,
+            toLower(type(r)) AS relationship,
+            a.name + '.' + b.name AS id,
+            r.line_mode AS line_mode
+"""
+
+# Graphs loaded without the lineage index have no line_mode/drawn on their relationships
+COMPUTED_OBJECT_EDGES_QUERY = """
         MATCH (a)-[r:UPSTREAM_MODEL]->(b)
         WHERE 
             (a:DataModel OR a:StoredProcedure) AND 
@@ -47,25 +62,36 @@ def fetch_all_object_edges():
             toLower(type(r)) AS relationship,
             a.name + '.' + b.name AS id,
             line_mode
-    """
+"""
 
-    with driver.session() as session:
-        result = session.run(query)
-        return create_edge_elements(result)
 
+async def get_object_edges_query():
+    return OBJECT_EDGES_QUERY if await has_lineage_index() else COMPUTED_OBJECT_EDGES_QUERY
 
-def fetch_all_objects():
 
-    with ThreadPoolExecutor() as executor:
-        nodes_future = executor.submit(fetch_all_object_nodes)
-        edges_future = executor.submit(fetch_all_object_edges)
-        nodes = nodes_future.result()
-        edges = edges_future.result()
+async def fetch_all_object_edges():
+    result = await run_read_query(await get_object_edges_query())
+    return create_edge_elements(result)
+
+
+async def fetch_all_objects():
+    nodes, edges = await asyncio.gather(
+        fetch_all_object_nodes(),
+        fetch_all_object_edges()
+    )
 
     elements = nodes + edges
     return elements
 
-def fetch_object_by_name(name):
+
+async def stream_all_objects():
+    """Yields the elements of fetch_all_objects one at a time, nodes first."""
+    async for record in stream_read_query(OBJECT_NODES_QUERY):
+        yield create_node_element(record)
+    async for record in stream_read_query(await get_object_edges_query()):
+        yield create_edge_element(record)
+
+async def fetch_object_by_name(name):
     """
     Fetches a single data object (data model or stored procedure) by name.
     
@@ -90,7 +116,6 @@ def fetch_object_by_name(name):
         LIMIT 1
     """
 
-    with driver.session() as session:
-        result = session.run(query, name=name)
-        nodes = create_node_elements(result)
-        return nodes[0] if nodes else None
+    result = await run_read_query(query, name=name)
+    nodes = create_node_elements(result)
+    return nodes[0] if nodes else None
@@ -0,0 +1,54 @@
+"""
+Version stamp of the graph, written by json_to_graph at the end of every ingestion.
+"""
+import asyncio
+import os
+import time
+
+from neo4j_integration.base_connector import run_read_query
+
+# How long a fetched version is trusted before Neo4j is asked again
+GRAPH_VERSION_TTL_SECONDS = float(os.getenv("GRAPH_VERSION_TTL_SECONDS", "5"))
+
+_version = None
+_lineage_index = False
+_fetched_at = None
+_lock = asyncio.Lock()
+
+
+async def fetch_graph_version():
+    records = await run_read_query(
+        """
+        MATCH (v:GraphVersion {id: 'current'})
+        RETURN v.version AS version, coalesce(v.lineage_index, false) AS lineage_index
+        """
+    )
+    if not records:
+        return None, False
+    return records[0]["version"], records[0]["lineage_index"]
+
+
+async def refresh_graph_version():
+    """
+    Re-reads the version at most every GRAPH_VERSION_TTL_SECONDS, concurrent requests share one read.
+    """
+    global _version, _lineage_index, _fetched_at
+    if _fetched_at is not None and time.monotonic() - _fetched_at < GRAPH_VERSION_TTL_SECONDS:
+        return
+
+    async with _lock:
+        if _fetched_at is None or time.monotonic() - _fetched_at >= GRAPH_VERSION_TTL_SECONDS:
+            _version, _lineage_index = await fetch_graph_version()
+            _fetched_at = time.monotonic()
+
+
+async def get_graph_version():
+    """Returns the current graph version, or None for graphs loaded before versions existed."""
+    await refresh_graph_version()
+    return _version
+
+
+async def has_lineage_index():
+    """Whether the last ingestion wrote a complete lineage index (see lineage_engine)."""
+    await refresh_graph_version()
+    return _lineage_index
@@ -0,0 +1,309 @@
+"""
+Lineage traversal by reachability instead of path enumeration.
+
+`MATCH p=(a)-[:UPSTREAM_*]->(b)` + `UNWIND relationships(p)` enumerates every distinct path,
+which grows exponentially on diamond-shaped lineage. Here the graph is walked breadth-first
+from the start node: every hop is one query that expands the whole frontier (by elementId)
+and returns its relationships, nodes that were visited before are not expanded again.
+The result is the reachable node set and the relationships between those nodes, which are
+exactly the relationships the path queries returned, at a cost linear in their number.
+
+When json_to_graph stored its lineage index (DO_BUILD_LINEAGE_INDEX), the reachable set
+is read from the index instead: every node carries the [low, high, ...] intervals of the
+topological positions it reaches (lineage_out over lineage_topo, lineage_in over
+lineage_rtopo), so the set is one indexed range lookup per interval, and the relationships
+between its nodes are expanded in a single query. Nodes without intervals (too many to
+store) are walked over the condensed graph instead: cycles, like stored procedures that read
+and write the same datamodel, are single LineageComponent nodes there, so every component
+is expanded once. Graphs without a complete index are walked node by node.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+
+from neo4j_integration.base_connector import run_read_query
+from neo4j_integration.graph_version import has_lineage_index
+
+# How the frontier is expanded: from the source to the target of a relationship, or back
+EXPAND_PATTERNS = {
+    "out": "(frontier)-[r:{relationship}]->(next)",
+    "in": "(frontier)<-[r:{relationship}]-(next)",
+}
+
+# LineageComponent graph of every lineage relationship
+COMPONENT_GRAPHS = {
+    "UPSTREAM_MODEL": "objects",
+    "UPSTREAM_COLUMN": "columns",
+}
+
+COMPONENT_PATTERNS = {
+    "out": "(component)-[:UPSTREAM_COMPONENT]->(next)",
+    "in": "(component)<-[:UPSTREAM_COMPONENT]-(next)",
+}
+
+# Interval property and the position it refers to, per direction
+INDEX_PROPERTIES = {
+    "out": ("lineage_out", "lineage_topo"),
+    "in": ("lineage_in", "lineage_rtopo"),
+}
+
+
+async def fetch_start_ids(name: str, labels: List[str]) -> List[str]:
+    query = " UNION ".join(
+        f"MATCH (n:{label} {{name: $name}}) RETURN elementId(n) AS id" for label in labels
+    )
+    records = await run_read_query(query, name=name)
+    return [record["id"] for record in records]
+
+
+async def expand_frontier(frontier: List[str], relationship: str, direction: str):
+    pattern = EXPAND_PATTERNS[direction].format(relationship=relationship)
+    return await run_read_query(
+        f"""
+        UNWIND $ids AS id
+        MATCH (frontier)
+        WHERE elementId(frontier) = id
+        MATCH {pattern}
+        RETURN
+            elementId(frontier) AS frontier_id,
+            elementId(next) AS next_id,
+            frontier.name AS frontier_name,
+            next.name AS next_name,
+            frontier:StoredProcedure AS frontier_is_procedure,
+            next:StoredProcedure AS next_is_procedure,
+            r.line_mode AS line_mode,
+            r.drawn AS drawn
+        """,
+        ids=frontier
+    )
+
+
+async def traverse(start_ids: List[str], relationship: str, direction: str) -> Tuple[Set[str], Dict[Tuple[str, str], Dict]]:
+    """
+    Breadth-first walk over `relationship` in `direction` ("out" or "in") from `start_ids`.
+
+    Returns the visited element ids (start nodes included) and the traversed relationships,
+    keyed by (source name, target name) in the stored direction of the relationship, with
+    `source_is_procedure`/`target_is_procedure` flags and the stored line_mode/drawn, if any.
+    """
+    visited = set(start_ids)
+    frontier = list(start_ids)
+    edges = {}
+
+    while frontier:
+        next_frontier = []
+        for record in await expand_frontier(frontier, relationship, direction):
+            add_edge(edges, record, direction)
+            if record["next_id"] not in visited:
+                visited.add(record["next_id"])
+                next_frontier.append(record["next_id"])
+        frontier = next_frontier
+
+    return visited, edges
+
+
+async def fetch_expandable_names(ids: List[str], relationship: str, direction: str) -> Set[str]:
+    """Names of the nodes that have `relationship` relationships in `direction`."""
+    pattern = EXPAND_PATTERNS[direction].format(relationship=relationship)
+    records = await run_read_query(
+        f"""
+        UNWIND $ids AS id
+        MATCH (frontier)
+        WHERE elementId(frontier) = id AND EXISTS {{ MATCH {pattern} }}
+        RETURN frontier.name AS name
+        """,
+        ids=ids
+    )
+    return {record["name"] for record in records}
+
+
+async def traverse_bounded(name: str, start_ids: List[str], relationship: str, direction: str, depth: Optional[int] = None):
+    """
+    Breadth-first walk like traverse, that stops after `depth` hops (None: no limit).
+
+    Returns the hop distance of every visited node by name (the start node `name` is 0), the
+    traversed relationships (see traverse) and the names of the nodes at the depth limit that
+    have relationships which were not expanded.
+    """
+    hops = {name: 0}
+    visited = set(start_ids)
+    frontier = list(start_ids)
+    edges = {}
+    hop = 0
+
+    while frontier and (depth is None or hop < depth):
+        hop += 1
+        next_frontier = []
+        for record in await expand_frontier(frontier, relationship, direction):
+            add_edge(edges, record, direction)
+            if record["next_id"] not in visited:
+                visited.add(record["next_id"])
+                hops.setdefault(record["next_name"], hop)
+                next_frontier.append(record["next_id"])
+        frontier = next_frontier
+
+    expandable = await fetch_expandable_names(frontier, relationship, direction) if frontier else set()
+    return hops, edges, expandable
+
+
+def add_edge(edges: Dict[Tuple[str, str], Dict], record, direction: str):
+    frontier_node = (record["frontier_name"], record["frontier_is_procedure"])
+    next_node = (record["next_name"], record["next_is_procedure"])
+    (source, source_is_procedure), (target, target_is_procedure) = (
+        (frontier_node, next_node) if direction == "out" else (next_node, frontier_node)
+    )
+    edges[(source, target)] = {
+        "source": source,
+        "target": target,
+        "source_is_procedure": source_is_procedure,
+        "target_is_procedure": target_is_procedure,
+        "line_mode": record["line_mode"],
+        "drawn": record["drawn"],
+    }
+
+
+async def fetch_reachable_intervals(start_ids: List[str], direction: str) -> Optional[List[List[int]]]:
+    """[[low, high], ...] reached by the start nodes, None when one of them has no intervals."""
+    intervals_property, _ = INDEX_PROPERTIES[direction]
+    records = await run_read_query(
+        f"""
+        UNWIND $ids AS id
+        MATCH (n)
+        WHERE elementId(n) = id
+        RETURN n.{intervals_property} AS intervals
+        """,
+        ids=start_ids
+    )
+    if len(records) != len(start_ids) or any(record["intervals"] is None for record in records):
+        return None
+
+    intervals = set()
+    for record in records:
+        bounds = record["intervals"]
+        intervals.update((bounds[i], bounds[i + 1]) for i in range(0, len(bounds), 2))
+    return [list(interval) for interval in sorted(intervals)]
+
+
+async def fetch_ids_per_label(values: list, labels: List[str], condition: str) -> Set[str]:
+    """Element ids of the `labels` nodes `n` matching `condition` for any `value` of `values`."""
+    # One branch per label, so every lookup uses the index of that label
+    lookups = " UNION ".join(
+        f"""
+            WITH value
+            MATCH (n:{label})
+            WHERE {condition}
+            RETURN elementId(n) AS id
+        """
+        for label in labels
+    )
+    records = await run_read_query(
+        f"""
+        UNWIND $values AS value
+        CALL {{ {lookups} }}
+        RETURN id
+        """,
+        values=values
+    )
+    return {record["id"] for record in records}
+
+
+async def fetch_ids_in_intervals(intervals: List[List[int]], labels: List[str], direction: str) -> Set[str]:
+    _, position_property = INDEX_PROPERTIES[direction]
+    return await fetch_ids_per_label(
+        intervals, labels, f"n.{position_property} >= value[0] AND n.{position_property} <= value[1]"
+    )
+
+
+async def fetch_edges(ids: Set[str], relationship: str, direction: str) -> Dict[Tuple[str, str], Dict]:
+    edges = {}
+    # Every relationship leaving a reachable node ends at a reachable node
+    for record in await expand_frontier(list(ids), relationship, direction):
+        add_edge(edges, record, direction)
+    return edges
+
+
+async def lookup(start_ids: List[str], labels: List[str], relationship: str, direction: str):
+    """Same result as traverse, read from the lineage index. None when the index can't answer."""
+    intervals = await fetch_reachable_intervals(start_ids, direction)
+    if intervals is None:
+        return None
+
+    visited = await fetch_ids_in_intervals(intervals, labels, direction)
+    return visited, await fetch_edges(visited, relationship, direction)
+
+
+async def fetch_start_components(start_ids: List[str]) -> Optional[List[int]]:
+    records = await run_read_query(
+        """
+        UNWIND $ids AS id
+        MATCH (n)
+        WHERE elementId(n) = id
+        RETURN n.lineage_component AS component
+        """,
+        ids=start_ids
+    )
+    if len(records) != len(start_ids) or any(record["component"] is None for record in records):
+        return None
+    return [record["component"] for record in records]
+
+
+async def expand_components(frontier: List[int], graph: str, direction: str) -> List[int]:
+    records = await run_read_query(
+        f"""
+        UNWIND $components AS component_number
+        MATCH (component:LineageComponent {{graph: $graph, component: component_number}})
+        MATCH {COMPONENT_PATTERNS[direction]}
+        RETURN DISTINCT next.component AS component
+        """,
+        components=frontier,
+        graph=graph
+    )
+    return [record["component"] for record in records]
+
+
+async def traverse_components(start_ids: List[str], labels: List[str], relationship: str, direction: str):
+    """Same result as traverse, walked over the condensed graph. None when it isn't stored."""
+    start_components = await fetch_start_components(start_ids)
+    if start_components is None:
+        return None
+
+    visited_components = set(start_components)
+    frontier = list(visited_components)
+    while frontier:
+        frontier = [
+            component for component in await expand_components(frontier, COMPONENT_GRAPHS[relationship], direction)
+            if component not in visited_components
+        ]
+        visited_components.update(frontier)
+
+    visited = await fetch_ids_per_label(sorted(visited_components), labels, "n.lineage_component = value")
+    return visited, await fetch_edges(visited, relationship, direction)
+
+
+async def reachable(start_ids: List[str], labels: List[str], relationship: str, direction: str) -> Tuple[Set[str], Dict[Tuple[str, str], Dict]]:
+    """
+    Nodes and relationships reachable from `start_ids` (see traverse), from the lineage index
+    when it is complete, by traversal otherwise. `labels` are the labels carrying `relationship`.
+    """
+    if start_ids and await has_lineage_index():
+        result = await lookup(start_ids, labels, relationship, direction)
+        if result is None:
+            result = await traverse_components(start_ids, labels, relationship, direction)
+        if result is not None:
+            return result
+    return await traverse(start_ids, relationship, direction)
+
+
+def get_line_mode(edge: Dict, edges: Dict[Tuple[str, str], Dict]):
+    """
+    Stored procedures that read and write the same datamodel are drawn as one 'bi' edge,
+    other edges leaving a stored procedure are 'dash'. Returns (line_mode, keep the edge).
+    Uses the values json_to_graph stored on the relationship when there are some.
+    """
+    if edge["drawn"] is not None:
+        return edge["line_mode"], edge["drawn"]
+    has_reverse_edge = (edge["target"], edge["source"]) in edges
+    if (edge["source_is_procedure"] or edge["target_is_procedure"]) and has_reverse_edge:
+        # Only the edge starting at the stored procedure is drawn
+        return "bi", edge["source_is_procedure"]
+    if edge["source_is_procedure"]:
+        return "dash", True
+    return None, True
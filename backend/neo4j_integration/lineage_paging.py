@@ -0,0 +1,139 @@
+"""
+Depth-limited, paginated lineage.
+
+Instead of the complete transitive lineage, the lineage endpoints can return the nodes within
+`depth` hops of the start node, in one or both directions, in pages of `limit` nodes:
+
+- every node carries `hops`, its distance to the start node, and `has_more` when it lies on
+  the depth limit and has relationships that were not expanded, so the frontend can load
+  them lazily (the same endpoint with that node as start node)
+- nodes are ordered by (hops, name), `next_cursor` is "<hops>:<name>" of the last node of the
+  page or None on the last page, so a page starts at the same node even when the graph changed
+- an edge is sent with the page of its later endpoint, so every edge arrives exactly once and
+  never before both of its nodes
+
+The walked lineage is kept for the next pages: the LINEAGE_CACHE_SIZE most recently used
+lineages are cached per (relationship, name, depth, direction) and dropped with the graph version.
+"""
+import asyncio
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from neo4j_integration.graph_version import get_graph_version
+from neo4j_integration.lineage_engine import traverse_bounded
+
+LINEAGE_CACHE_SIZE = int(os.getenv("LINEAGE_CACHE_SIZE", "64"))
+
+# API direction -> lineage_engine direction
+LINEAGE_DIRECTIONS = {
+    "UPSTREAM": "out",
+    "DOWNSTREAM": "in",
+}
+
+
+_lineages = OrderedDict()
+_lineages_version = None
+
+
+def is_paged_request(depth: Optional[int], direction: str, limit: Optional[int], cursor: Optional[str]) -> bool:
+    """Without any of the parameters the endpoints return the complete lineage, as before."""
+    return depth is not None or direction != "BOTH" or limit is not None or cursor is not None
+
+
+def get_directions(direction: str) -> List[str]:
+    return list(LINEAGE_DIRECTIONS) if direction == "BOTH" else [direction]
+
+
+async def collect_lineage(
+    name: str,
+    start_ids: List[str],
+    relationship: str,
+    direction: str,
+    depth: Optional[int],
+    create_edge_rows: Callable[[Dict, str], List[Dict]]
+) -> Tuple[Dict[str, int], Set[str], List[Dict]]:
+    """
+    Bounded walk in every requested direction. `create_edge_rows(edges, direction)` turns the
+    traversed relationships into edge rows. Returns (hops by name, expandable names, edge rows).
+    """
+    directions = get_directions(direction)
+    results = await asyncio.gather(*(
+        traverse_bounded(name, start_ids, relationship, LINEAGE_DIRECTIONS[lineage_direction], depth)
+        for lineage_direction in directions
+    ))
+
+    hops, expandable, edge_rows = {}, set(), []
+    for lineage_direction, (direction_hops, edges, direction_expandable) in zip(directions, results):
+        for node_name, hop in direction_hops.items():
+            hops[node_name] = min(hop, hops.get(node_name, hop))
+        expandable |= direction_expandable
+        edge_rows += create_edge_rows(edges, lineage_direction)
+    return hops, expandable, edge_rows
+
+
+async def get_lineage(
+    name: str,
+    start_ids: List[str],
+    relationship: str,
+    direction: str,
+    depth: Optional[int],
+    create_edge_rows: Callable[[Dict, str], List[Dict]]
+) -> Tuple[Dict[str, int], Set[str], List[Dict], List[str]]:
+    """collect_lineage plus the node order of the pages, cached for the pages that follow."""
+    global _lineages_version
+    version = await get_graph_version()
+    if version != _lineages_version:
+        _lineages.clear()
+        _lineages_version = version
+
+    key = (relationship, name, depth, direction)
+    lineage = _lineages.get(key) if version is not None else None
+    if lineage is not None:
+        _lineages.move_to_end(key)
+        return lineage
+
+    hops, expandable, edge_rows = await collect_lineage(name, start_ids, relationship, direction, depth, create_edge_rows)
+    lineage = hops, expandable, edge_rows, sorted(hops, key=lambda node_name: (hops[node_name], node_name))
+    if version is not None and LINEAGE_CACHE_SIZE > 0:
+        _lineages[key] = lineage
+        while len(_lineages) > LINEAGE_CACHE_SIZE:
+            _lineages.popitem(last=False)
+    return lineage
+
+
+def format_cursor(hop: int, node_name: str) -> str:
+    return f"{hop}:{node_name}"
+
+
+def parse_cursor(cursor: str) -> Tuple[int, str]:
+    hop, _, node_name = cursor.partition(":")
+    return int(hop), node_name
+
+
+def paginate(order: List[str], hops: Dict[str, int], edge_rows: List[Dict], limit: Optional[int], cursor: Optional[str]):
+    """
+    `order` holds the node names sorted by (hops, name). Returns (node names of the page,
+    edge rows of the page, next cursor).
+    """
+    keys = [(hops[node_name], node_name) for node_name in order]
+    position = {node_name: index for index, node_name in enumerate(order)}
+    start = bisect_right(keys, parse_cursor(cursor)) if cursor else 0
+    end = len(order) if limit is None else min(start + limit, len(order))
+
+    page_edge_rows = [
+        row for row in edge_rows
+        if start <= max(position[row["source"]], position[row["target"]]) < end
+    ]
+    next_cursor = format_cursor(*keys[end - 1]) if end < len(order) else None
+    return order[start:end], page_edge_rows, next_cursor
+
+
+def add_hops(node_elements: List[Dict], hops: Dict[str, int], expandable: Set[str]):
+    for element in node_elements:
+        data = element["data"]
+        data["hops"] = hops[data["name"]]
+        data["has_more"] = data["name"] in expandable
+    node_elements.sort(key=lambda element: (element["data"]["hops"], element["data"]["name"]))
+    return node_elements
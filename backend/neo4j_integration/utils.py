@@ -15,34 +15,35 @@ def create_node_elements(results):
     if not results:
         return []
 
-    elements = []
-    for result in results:
-        record = dict(result)
-        data = {
-            "id": record["name"],
-        }
+    return [create_node_element(result) for result in results]
 
-        for k, v in record.items():
-            # Deduplicate transformations by converting to a set and back to a list
-            if k == "transformations" and v is not None:
-                data[k] = list(set(v))
-            else:
-                data[k] = v
 
-        elements.append({"data": data, "group": "nodes"})
+def create_node_element(result):
+    """Creates one node element, see create_node_elements."""
+    record = dict(result)
+    data = {
+        "id": record["name"],
+    }
 
-    return elements
+    for k, v in record.items():
+        # Deduplicate transformations by converting to a set and back to a list
+        if k == "transformations" and v is not None:
+            data[k] = list(set(v))
+        else:
+            data[k] = v
 
+    return {"data": data, "group": "nodes"}
 
 
 def create_edge_elements(result):
-    return [
-        {
-            "data": dict(record),
-            "group": "edges"
-        }
-        for record in result
-    ]
+    return [create_edge_element(record) for record in result]
+
+
+def create_edge_element(record):
+    return {
+        "data": dict(record),
+        "group": "edges"
+    }
 
 def create_edge_elements_2(result):
     """
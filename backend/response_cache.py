@@ -0,0 +1,96 @@
+"""
+In-memory cache of serialized API responses, keyed on the graph version.
+
+Entries are the encoded and compressed bodies (see serialization.py) with their content
+encoding, keyed per format and encoding, so a cache hit costs no serialization or compression
+and the memory cap is exact. The least recently used entries are evicted once
+RESPONSE_CACHE_MAX_BYTES is exceeded, and the whole cache is dropped when the graph version
+changes. Responses carry the graph version (and their format and encoding) as ETag, so a
+request with a matching If-None-Match gets a 304 without touching Neo4j or the cache.
+"""
+import os
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from neo4j_integration.graph_version import get_graph_version
+from serialization import encode_payload, compress, get_content_encoding, get_encoding_headers
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_entries = OrderedDict()
+_cache_version = None
+_cache_bytes = 0
+
+
+def cache_get(key):
+    """Returns (body, content encoding) or None."""
+    entry = _entries.get(key)
+    if entry is not None:
+        _entries.move_to_end(key)
+    return entry
+
+
+def cache_put(key, body: bytes, content_encoding=None):
+    global _cache_bytes
+    if len(body) > RESPONSE_CACHE_MAX_BYTES:
+        return
+    previous = _entries.pop(key, None)
+    if previous is not None:
+        _cache_bytes -= len(previous[0])
+    _entries[key] = (body, content_encoding)
+    _cache_bytes += len(body)
+    while _cache_bytes > RESPONSE_CACHE_MAX_BYTES:
+        _, (evicted, _) = _entries.popitem(last=False)
+        _cache_bytes -= len(evicted)
+
+
+def cache_clear(version=None):
+    global _cache_version, _cache_bytes
+    _entries.clear()
+    _cache_bytes = 0
+    _cache_version = version
+
+
+def get_etag(version, *variant):
+    """Strong ETag of one representation: the graph version plus format/encoding, if not default."""
+    return '"' + "-".join([version] + [part for part in variant if part not in (None, "json")]) + '"'
+
+
+def matches_etag(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def cached_response(request: Request, key, fetch, format: str = "json"):
+    """
+    Returns the JSON response of `fetch()` for `key` in `format` ("json" or "compact"),
+    compressed as the client accepts, from the cache when the graph did not change.
+    Without a graph version (graph loaded by an older json_to_graph), nothing is cached.
+    """
+    version = await get_graph_version()
+    encoding = get_content_encoding(request)
+    if version is None:
+        body, content_encoding = compress(encode_payload(await fetch(), format), encoding)
+        return Response(body, media_type="application/json", headers=get_encoding_headers(content_encoding))
+
+    etag = get_etag(version, format, encoding)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if matches_etag(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if version != _cache_version:
+        cache_clear(version)
+
+    entry = cache_get((key, format, encoding))
+    if entry is None:
+        body = encode_payload(await fetch(), format)
+        entry = compress(body, encoding)
+        # The graph may have changed while fetching, only cache under the version it was read with
+        if version == _cache_version:
+            cache_put((key, format, encoding), *entry)
+    body, content_encoding = entry
+    return Response(body, media_type="application/json", headers={**headers, **get_encoding_headers(content_encoding)})
@@ -0,0 +1,118 @@
+"""
+Response encoding: JSON serialization, the compact element format and compression.
+
+- Bodies are serialized with orjson, several times faster than the json module
+- `format=compact` replaces the {"data": {...}, "group": ...} elements by a string table and
+  one array per attribute (see to_compact), the frontend expands it (data.service.ts)
+- Bodies are compressed with brotli or gzip, whichever the client accepts (brotli only when
+  the optional `brotli` package is installed), once they exceed COMPRESSION_MIN_BYTES
+"""
+import gzip
+import os
+import zlib
+from typing import Dict, List, Optional
+
+import orjson
+from fastapi import Request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+def dumps(payload) -> bytes:
+    return orjson.dumps(payload)
+
+
+def compact_columns(rows: List[Dict], strings: Dict[str, int]) -> Dict:
+    """
+    One array per attribute of `rows`. Attributes whose values are all strings (or null) are
+    stored as positions in the string table and listed in `encoded`, others as they are.
+    """
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    columns = {}
+    encoded = []
+    for key in keys:
+        values = [row.get(key) for row in rows]
+        if all(value is None or isinstance(value, str) for value in values):
+            values = [None if value is None else strings.setdefault(value, len(strings)) for value in values]
+            encoded.append(key)
+        columns[key] = values
+    return {"count": len(rows), "columns": columns, "encoded": encoded}
+
+
+def to_compact(payload: Dict) -> Dict:
+    """
+    Columnar form of a {"elements": [...], ...} payload. Other keys are kept as they are.
+    Attributes missing on some elements come back as null when expanded.
+    """
+    strings = {}
+    elements = payload["elements"]
+    nodes = compact_columns([element["data"] for element in elements if element["group"] == "nodes"], strings)
+    edges = compact_columns([element["data"] for element in elements if element["group"] == "edges"], strings)
+    compact = {key: value for key, value in payload.items() if key != "elements"}
+    compact.update(format="compact", strings=list(strings), nodes=nodes, edges=edges)
+    return compact
+
+
+def encode_payload(payload: Dict, format: str) -> bytes:
+    if format == "compact":
+        payload = to_compact(payload)
+    return dumps(payload)
+
+
+def get_content_encoding(request: Request) -> Optional[str]:
+    """Preferred encoding of the client: br, gzip or None (identity)."""
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]):
+    """Returns (body, content encoding), small bodies are sent as they are."""
+    if encoding is None or len(body) < COMPRESSION_MIN_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    return gzip.compress(body, compresslevel=GZIP_LEVEL), encoding
+
+
+async def compress_chunks(chunks, encoding: Optional[str]):
+    """
+    Compresses a stream of byte chunks incrementally. Every chunk is flushed, so the client
+    receives (and can decode) each batch as soon as it is serialized instead of when the
+    compressor's buffer happens to fill up.
+    """
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    # wbits 31: gzip container
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY) if encoding == "br" else zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        if encoding == "br":
+            compressed = compressor.process(chunk) + compressor.flush()
+        else:
+            compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed:
+            yield compressed
+    yield compressor.finish() if encoding == "br" else compressor.flush()
+
+
+def get_encoding_headers(encoding: Optional[str]) -> Dict[str, str]:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return headers
@@ -0,0 +1,74 @@
+"""
+Streamed responses for large element lists.
+
+The elements are serialized while the records arrive from Neo4j, STREAM_CHUNK_ELEMENTS at a
+time, so memory stays constant in the graph size and the first bytes leave right away:
+
+- `ndjson`: one element per line (application/x-ndjson)
+- `json-stream`: the same {"elements": [...]} document as the default format, sent in chunks
+
+Chunks are compressed incrementally when the client accepts it (see serialization.py).
+Streamed responses bypass the response cache (they are never held in memory as a whole), but
+carry the graph version as ETag and answer a matching If-None-Match with a 304 like cached ones.
+"""
+import os
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from neo4j_integration.graph_version import get_graph_version
+from response_cache import get_etag, matches_etag
+from serialization import dumps, compress_chunks, get_content_encoding, get_encoding_headers
+
+STREAM_CHUNK_ELEMENTS = int(os.getenv("STREAM_CHUNK_ELEMENTS", "500"))
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json-stream": "application/json",
+}
+
+
+async def serialized_batches(elements):
+    batch = []
+    async for element in elements:
+        batch.append(dumps(element))
+        if len(batch) >= STREAM_CHUNK_ELEMENTS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_chunks(elements):
+    async for batch in serialized_batches(elements):
+        yield b"\n".join(batch) + b"\n"
+
+
+async def json_array_chunks(elements):
+    yield b'{"elements":['
+    separator = b""
+    async for batch in serialized_batches(elements):
+        yield separator + b",".join(batch)
+        separator = b","
+    yield b"]}"
+
+
+STREAM_WRITERS = {
+    "ndjson": ndjson_chunks,
+    "json-stream": json_array_chunks,
+}
+
+
+async def streamed_response(request: Request, elements, format: str):
+    """Streams the async iterable `elements` in `format` ("ndjson" or "json-stream")."""
+    version = await get_graph_version()
+    encoding = get_content_encoding(request)
+    headers = get_encoding_headers(encoding)
+    if version is not None:
+        etag = get_etag(version, format, encoding)
+        headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+        if matches_etag(request, etag):
+            return Response(status_code=304, headers=headers)
+
+    chunks = compress_chunks(STREAM_WRITERS[format](elements), encoding)
+    return StreamingResponse(chunks, media_type=STREAM_MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,78 @@
+import { TestBed } from '@angular/core/testing';
+import { provideHttpClient } from '@angular/common/http';
+import { HttpTestingController, provideHttpClientTesting } from '@angular/common/http/testing';
+
+import { DataService } from './data.service';
+
+// to_compact output of the backend, the same fixture as llm_to_graph/tests/test_serialization.py
+const COMPACT = {
+  next_cursor: '1:dwh.stg.b',
+  format: 'compact',
+  strings: ['dwh.stg.a', 'dwh.stg.p', 'dwh.stg.b', 'ROOT', 'StoredProcedure', 'table', 'dwh.stg.a.dwh.stg.p', 'dwh.stg.p.dwh.stg.b', 'dash'],
+  nodes: {
+    count: 3,
+    columns: {
+      id: [0, 1, 2],
+      name: [0, 1, 2],
+      node_type: [3, 4, null],
+      type: [5, null, null],
+      hops: [0, 1, 1],
+      has_more: [false, true, null]
+    },
+    encoded: ['id', 'name', 'node_type', 'type']
+  },
+  edges: {
+    count: 2,
+    columns: { source: [0, 1], target: [1, 2], id: [6, 7], line_mode: [null, 8] },
+    encoded: ['source', 'target', 'id', 'line_mode']
+  }
+};
+
+// The backend payload, with the properties missing on some elements as null
+const EXPANDED = {
+  next_cursor: '1:dwh.stg.b',
+  elements: [
+    { data: { id: 'dwh.stg.a', name: 'dwh.stg.a', node_type: 'ROOT', type: 'table', hops: 0, has_more: false }, group: 'nodes' },
+    { data: { id: 'dwh.stg.p', name: 'dwh.stg.p', node_type: 'StoredProcedure', type: null, hops: 1, has_more: true }, group: 'nodes' },
+    { data: { id: 'dwh.stg.b', name: 'dwh.stg.b', node_type: null, type: null, hops: 1, has_more: null }, group: 'nodes' },
+    { data: { source: 'dwh.stg.a', target: 'dwh.stg.p', id: 'dwh.stg.a.dwh.stg.p', line_mode: null }, group: 'edges' },
+    { data: { source: 'dwh.stg.p', target: 'dwh.stg.b', id: 'dwh.stg.p.dwh.stg.b', line_mode: 'dash' }, group: 'edges' }
+  ]
+};
+
+describe('DataService', () => {
+  let service: DataService;
+  let http: HttpTestingController;
+
+  beforeEach(() => {
+    TestBed.configureTestingModule({
+      providers: [provideHttpClient(), provideHttpClientTesting()]
+    });
+    service = TestBed.inject(DataService);
+    http = TestBed.inject(HttpTestingController);
+  });
+
+  afterEach(() => {
+    http.verify();
+  });
+
+  it('should expand compact responses into elements', () => {
+    let response: any;
+    service.getObjectLineage('dwh.stg.a', { limit: 3 }).subscribe(result => response = result);
+
+    const request = http.expectOne(req => req.url.endsWith('/object/lineage/dwh.stg.a'));
+    expect(request.request.params.get('format')).toBe('compact');
+    request.flush(COMPACT);
+
+    expect(response).toEqual(EXPANDED);
+  });
+
+  it('should return other responses as they are', () => {
+    let response: any;
+    service.getAllObjects().subscribe(result => response = result);
+
+    http.expectOne(req => req.url.endsWith('/objects')).flush({ elements: [] });
+
+    expect(response).toEqual({ elements: [] });
+  });
+});
@@ -4,6 +4,17 @@ import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import { map, shareReplay } from 'rxjs/operators';
 
+/**
+ * Optional bounds of a lineage request. Without them the complete lineage is returned.
+ * Nodes then carry `hops` and `has_more`, and the response `next_cursor` (null on the last page).
+ */
+export interface LineageOptions {
+  depth?: number;
+  direction?: 'UPSTREAM' | 'DOWNSTREAM' | 'BOTH';
+  limit?: number;
+  cursor?: string;
+}
+
 @Injectable({
   providedIn: 'root'
 })
@@ -44,9 +55,47 @@ export class DataService {
     return this.cache[cacheKey];
   }
 
-  getColumnLineage(column_name: string): Observable<any> {
+  getColumnLineage(column_name: string, options: LineageOptions = {}): Observable<any> {
     const url = `${this.baseUrl}/column/lineage/${column_name}`;
-    return this.http.get<any>(url);
+    const params = this.lineageParams(options).set('format', 'compact');
+    return this.http.get<any>(url, { params })
+      .pipe(map(response => this.expandCompact(response)));
+  }
+
+  private lineageParams(options: LineageOptions): HttpParams {
+    let params = new HttpParams();
+    for (const [key, value] of Object.entries(options)) {
+      if (value !== undefined && value !== null) {
+        params = params.set(key, value.toString());
+      }
+    }
+    return params;
+  }
+
+  /**
+   * Expands a `format=compact` response (a string table and one array per attribute)
+   * into the usual `{ elements: [...] }` response. Other responses are returned as they are.
+   */
+  private expandCompact(response: any): any {
+    if (response?.format !== 'compact') {
+      return response;
+    }
+    const { strings, nodes, edges, format, ...rest } = response;
+    const expand = (table: any, group: string) => {
+      const keys = Object.keys(table.columns);
+      const encoded = new Set<string>(table.encoded);
+      const elements = [];
+      for (let i = 0; i < table.count; i++) {
+        const data: any = {};
+        for (const key of keys) {
+          const value = table.columns[key][i];
+          data[key] = encoded.has(key) && value !== null ? strings[value] : value;
+        }
+        elements.push({ data, group });
+      }
+      return elements;
+    };
+    return { ...rest, elements: [...expand(nodes, 'nodes'), ...expand(edges, 'edges')] };
   }
 
   getDatamodelById(datamodelId: string): Observable<any> {
@@ -60,8 +109,9 @@ export class DataService {
     const cacheKey = 'all_objects';
     if (!this.cache[cacheKey]) {
       const url = `${this.baseUrl}/objects`;
-      this.cache[cacheKey] = this.http.get<any>(url)
-        .pipe(shareReplay(1));
+      const params = new HttpParams().set('format', 'compact');
+      this.cache[cacheKey] = this.http.get<any>(url, { params })
+        .pipe(map(response => this.expandCompact(response)), shareReplay(1));
     }
     return this.cache[cacheKey];
   }
@@ -82,12 +132,13 @@ export class DataService {
   /**
    * Get the lineage of a specific object (data model or stored procedure)
    */
-  getObjectLineage(name: string): Observable<any> {
-    const cacheKey = `object_lineage_${name}`;
+  getObjectLineage(name: string, options: LineageOptions = {}): Observable<any> {
+    const params = this.lineageParams(options);
+    const cacheKey = `object_lineage_${name}_${params.toString()}`;
     if (!this.cache[cacheKey]) {
       const url = `${this.baseUrl}/object/lineage/${name}`;
-      this.cache[cacheKey] = this.http.get<any>(url)
-        .pipe(shareReplay(1));
+      this.cache[cacheKey] = this.http.get<any>(url, { params: params.set('format', 'compact') })
+        .pipe(map(response => this.expandCompact(response)), shareReplay(1));
     }
     return this.cache[cacheKey];
   }
@@ -6,9 +6,50 @@ WAREHOUSE_DEFAULT_SCHEMA_MAPPING = {
 }
 DO_RESET_NEO4J_DATABASE = True
 DO_SIMPLE_EXTRACT = True
+USE_ALREADY_EXTRACTED = True
 DEFAULT_EXTRACTION_DIR = "extraction_runs"
 PATH_EXTRACTION_RUNS = "BURGER_SIMPLE"
 
+# Number of SQL files extracted concurrently (1 = sequential)
+EXTRACTION_CONCURRENCY = 8
+# Provider budgets enforced by the rate scheduler in front of every LLM call
+LLM_REQUESTS_PER_MINUTE = 200
+LLM_TOKENS_PER_MINUTE = 1_000_000
+# Files with several CREATE statements or more tokens than this are extracted in chunks
+SQL_CHUNK_MAX_TOKENS = 6000
+# Extract plain CREATE TABLE statements and simple SELECT views without the LLM
+DO_FAST_PATH_PARSE = True
+# Content-addressed store of validated extractions, shared by all extraction runs
+EXTRACTION_CACHE_PATH = f"{DEFAULT_EXTRACTION_DIR}/extraction_cache.sqlite"
+# Only apply added/changed/removed SQL files to the graph, based on the manifest of the last load
+DO_INCREMENTAL_RUN = False
+# Write the graph with batched UNWIND transactions instead of one query per node and edge
+DO_BULK_INSERT = True
+BULK_INSERT_BATCH_SIZE = 1000
+# Parallel sessions writing the bulk insert batches of one phase (1 = sequential)
+INGESTION_WORKERS = 4
+# Threads decoding response files while loading them into the graph (1 = sequential)
+JSON_LOAD_WORKERS = 8
+# Raw names kept by the memoized id resolver (per cache)
+ID_RESOLVER_CACHE_SIZE = 1_000_000
+# Insert extractions into the graph while the LLM is still extracting (always rebuilds the graph)
+DO_STREAMING_PIPELINE = False
+PIPELINE_QUEUE_SIZE = 256
+PIPELINE_WRITER_WORKERS = 1
+# Names per label looked up to report MERGE throughput before/after the schema setup (0 = off)
+SCHEMA_BENCHMARK_SAMPLE_SIZE = 0
+SCHEMA_AWAIT_TIMEOUT_SECONDS = 300
+# Nodes/relationships deleted per transaction when the graph is reset
+RESET_BATCH_SIZE = 10000
+# Only delete the nodes tagged with PATH_EXTRACTION_RUNS instead of wiping the database
+RESET_ONLY_EXTRACTION_RUN = False
+# Write neo4j-admin import CSVs instead of loading the graph through transactions
+DO_EXPORT_NEO4J_ADMIN_CSV = False
+ADMIN_CSV_EXPORT_DIR = f"{DEFAULT_EXTRACTION_DIR}/neo4j_admin_import"
+# Store reachability intervals on every node after loading, so the backend answers lineage without traversals
+DO_BUILD_LINEAGE_INDEX = True
+LINEAGE_INDEX_MAX_INTERVALS = 64
+
 
 # SQL file paths for processing
 DATAMODEL_SQL_PATHTS = [
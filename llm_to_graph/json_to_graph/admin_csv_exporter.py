@@ -0,0 +1,300 @@
+"""
+Offline export of an extraction run as CSV files for `neo4j-admin database import`.
+
+The response files are collected with the bulk writer's row builders, which resolve every id
+with the memoized id resolver and deduplicate nodes and edges in memory.
+The post-processing steps are then applied to the in-memory graph, in the same order and
+with the same rules as run_post_processing, so the imported graph is usable right away:
+propagated column types, node_type, orphaned columns connected to their datamodel and
+column metadata, plus the lineage index with its condensed graph (LineageComponent nodes)
+and the line_mode of every UPSTREAM_MODEL relationship. A GraphVersion node is exported as
+well, for the backend cache.
+Nothing is written to Neo4j.
+
+DataModel, StoredProcedure and Column use separate ID groups. UPSTREAM_MODEL relationships
+connect DataModels and StoredProcedures, so they are split into one file per pair of groups.
+"""
+import csv
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import tqdm
+
+from data_models import DataModel, StoredProcedure
+from json_to_graph.response_index import index_latest_responses, load_json_responses
+from json_to_graph.type_propagation import build_adjacency, propagate_types
+from json_to_graph.lineage_index import build_lineage_index, condense
+from json_to_graph.neo4j_integration.graph_version import GRAPH_VERSION_ID, new_graph_version
+from json_to_graph.neo4j_integration.bulk_writer import new_bulk_rows, add_datamodel_rows, add_procedure_rows
+from json_to_graph.neo4j_integration.post_processing.connect_orphaned_columns import get_column_datamodel_name
+from json_to_graph.neo4j_integration.post_processing.node_classification import classify_degree
+from json_to_graph.neo4j_integration.post_processing.build_lineage_index import get_component_id, get_edge_line_mode
+from logger import logg_print
+from config import ADMIN_CSV_EXPORT_DIR, PATH_EXTRACTION_RUNS, DO_BUILD_LINEAGE_INDEX, LINEAGE_INDEX_MAX_INTERVALS
+
+# File name -> (ID group / relationship type, header)
+NODE_FILES = {
+    "datamodels.csv": ("DataModel", [
+        "name:ID(DataModel)", "original_name", "warehouse", "schema", "object", "type",
+        "is_external:boolean", "node_type", "extraction_run",
+        "lineage_component:long", "lineage_topo:long", "lineage_rtopo:long", "lineage_out:long[]", "lineage_in:long[]", ":LABEL"
+    ]),
+    "stored_procedures.csv": ("StoredProcedure", [
+        "name:ID(StoredProcedure)", "original_name", "warehouse", "schema", "object", "type",
+        "node_type", "extraction_run",
+        "lineage_component:long", "lineage_topo:long", "lineage_rtopo:long", "lineage_out:long[]", "lineage_in:long[]", ":LABEL"
+    ]),
+    "columns.csv": ("Column", [
+        "name:ID(Column)", "original_name", "original_datamodel_name", "datamodel_name", "type",
+        "is_type_guessed:boolean", "is_type_updated:boolean", "transformations:string[]",
+        "warehouse", "schema", "object", "object_type", "node_type", "extraction_run",
+        "lineage_component:long", "lineage_topo:long", "lineage_rtopo:long", "lineage_out:long[]", "lineage_in:long[]", ":LABEL"
+    ]),
+    "lineage_components.csv": ("LineageComponent", ["id:ID(LineageComponent)", "graph", "component:long", "size:long", ":LABEL"]),
+    "graph_version.csv": ("GraphVersion", ["id:ID(GraphVersion)", "version", "extraction_run", "lineage_index:boolean", ":LABEL"]),
+}
+
+RELATIONSHIP_FILES = {
+    "upstream_model.csv": ("UPSTREAM_MODEL", [":START_ID(DataModel)", ":END_ID(DataModel)", "line_mode", "drawn:boolean", ":TYPE"]),
+    "procedure_reads.csv": ("UPSTREAM_MODEL", [":START_ID(DataModel)", ":END_ID(StoredProcedure)", "line_mode", "drawn:boolean", ":TYPE"]),
+    "procedure_writes.csv": ("UPSTREAM_MODEL", [":START_ID(StoredProcedure)", ":END_ID(DataModel)", "line_mode", "drawn:boolean", ":TYPE"]),
+    "has_column.csv": ("HAS_COLUMN", [":START_ID(DataModel)", ":END_ID(Column)", ":TYPE"]),
+    "upstream_column.csv": ("UPSTREAM_COLUMN", [":START_ID(Column)", ":END_ID(Column)", ":TYPE"]),
+    "upstream_component.csv": ("UPSTREAM_COMPONENT", [":START_ID(LineageComponent)", ":END_ID(LineageComponent)", ":TYPE"]),
+}
+
+ARRAY_DELIMITER = ";"
+
+
+def add_json_rows(bulk_rows: Dict[str, Dict], json_data: dict):
+    if json_data["data"]["type"] == 'stored_procedure':
+        add_procedure_rows(bulk_rows, StoredProcedure(**json_data["data"]))
+    elif json_data["data"]["type"] in ['table', 'view']:
+        add_datamodel_rows(bulk_rows, DataModel(**json_data["data"]))
+
+
+def build_nodes(bulk_rows: Dict[str, Dict]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, Dict]]:
+    """Merges the collected rows into one property dict per node, like the MERGE/SET phases would."""
+    datamodels = {}
+    for name, row in bulk_rows["ref_datamodels"].items():
+        datamodels[name] = dict(row)
+    for name, row in bulk_rows["datamodels"].items():
+        datamodels[name] = {**datamodels.get(name, {}), **row}
+
+    procedures = {
+        name: {**row, "type": "StoredProcedure", "node_type": "StoredProcedure"}
+        for name, row in bulk_rows["procedures"].items()
+    }
+
+    columns = {}
+    for name, row in bulk_rows["ref_columns"].items():
+        columns[name] = dict(row)
+    for name, row in bulk_rows["columns"].items():
+        columns[name] = {**columns.get(name, {}), **row, "is_type_guessed": False, "is_type_updated": False}
+    return datamodels, procedures, columns
+
+
+def propagate_types_in_memory(columns: Dict[str, Dict], column_edges: List[Tuple[str, str]]) -> int:
+    names = list(columns)
+    positions = {name: index for index, name in enumerate(names)}
+    types = [columns[name].get("type") for name in names]
+    seeds = [index for index, column_type in enumerate(types) if column_type is not None]
+    offsets, targets = build_adjacency(len(names), [(positions[source], positions[target]) for source, target in column_edges])
+
+    updates = propagate_types(types, offsets, targets, seeds)
+    for index, column_type in updates:
+        columns[names[index]].update(type=column_type, is_type_guessed=True, is_type_updated=True)
+    return len(updates)
+
+
+def classify_in_memory(nodes: Dict[str, Dict], edges: List[Tuple[str, str]]):
+    in_degrees = dict.fromkeys(nodes, 0)
+    out_degrees = dict.fromkeys(nodes, 0)
+    for source, target in edges:
+        if source in out_degrees:
+            out_degrees[source] += 1
+        if target in in_degrees:
+            in_degrees[target] += 1
+    for name, node in nodes.items():
+        node["node_type"] = classify_degree(in_degrees[name], out_degrees[name])
+
+
+def connect_orphans_in_memory(datamodels: Dict[str, Dict], columns: Dict[str, Dict], has_column_edges: List[Tuple[str, str]]) -> int:
+    connected_columns = {column_name for _, column_name in has_column_edges}
+    connected_count = 0
+    for column_name, column in columns.items():
+        if column_name in connected_columns:
+            continue
+        datamodel_name = get_column_datamodel_name(column_name)
+        if datamodel_name not in datamodels:
+            continue
+        has_column_edges.append((datamodel_name, column_name))
+        column["datamodel_name"] = datamodel_name
+        column["original_datamodel_name"] = datamodels[datamodel_name].get("original_name")
+        column.setdefault("is_type_guessed", True)
+        column.setdefault("is_type_updated", False)
+        connected_count += 1
+    return connected_count
+
+
+def add_metadata_in_memory(datamodels: Dict[str, Dict], columns: Dict[str, Dict], has_column_edges: List[Tuple[str, str]]):
+    for datamodel_name, column_name in has_column_edges:
+        datamodel = datamodels[datamodel_name]
+        columns[column_name].update(
+            warehouse=datamodel.get("warehouse"),
+            schema=datamodel.get("schema"),
+            object=datamodel.get("object"),
+            object_type=datamodel.get("type"),
+        )
+
+
+def add_lineage_index_in_memory(graph: str, nodes: Dict[str, Dict], edges: List[Tuple[str, str]]) -> Tuple[Dict[str, Dict], List[Tuple[str, str]]]:
+    """Labels the nodes, returns the LineageComponent nodes and UPSTREAM_COMPONENT edges of the graph."""
+    names = list(nodes)
+    positions = {name: index for index, name in enumerate(names)}
+    index_edges = [(positions[source], positions[target]) for source, target in edges if source in positions and target in positions]
+    labels, component_count, _ = build_lineage_index(len(names), index_edges, LINEAGE_INDEX_MAX_INTERVALS)
+    for name, label in zip(names, labels):
+        nodes[name].update(
+            lineage_component=label["component"],
+            lineage_topo=label["topo"],
+            lineage_rtopo=label["rtopo"],
+            lineage_out=label["out_intervals"],
+            lineage_in=label["in_intervals"],
+        )
+
+    component = [label["component"] for label in labels]
+    sizes = Counter(component)
+    component_nodes = {
+        get_component_id(graph, index): {"graph": graph, "component": index, "size": sizes[index]}
+        for index in range(component_count)
+    }
+    component_edges = [
+        (get_component_id(graph, source), get_component_id(graph, target))
+        for source, target in condense(len(names), index_edges, component)
+    ]
+    return component_nodes, component_edges
+
+
+def get_line_modes_in_memory(procedures: Dict[str, Dict], edges: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+    edge_set = set(edges)
+    line_modes = {}
+    for source, target in edges:
+        line_mode, drawn = get_edge_line_mode(source in procedures, target in procedures, (target, source) in edge_set)
+        line_modes[(source, target)] = {"line_mode": line_mode, "drawn": drawn}
+    return line_modes
+
+
+def format_value(value) -> str:
+    # Empty fields are not imported as properties, like unset properties in Neo4j
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ARRAY_DELIMITER.join(str(item) for item in value)
+    return str(value)
+
+
+def write_csv(file_path: str, header: List[str], rows) -> int:
+    count = 0
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def node_rows(nodes: Dict[str, Dict], header: List[str], label: str):
+    properties = [column.split(":")[0] for column in header[:-1]]
+    for name, node in nodes.items():
+        node = {**node, properties[0]: name, "extraction_run": PATH_EXTRACTION_RUNS}
+        yield [format_value(node.get(property)) for property in properties] + [label]
+
+
+def edge_rows(edges, header: List[str], relationship_type: str, edge_properties: Dict[Tuple[str, str], Dict]):
+    properties = [column.split(":")[0] for column in header[2:-1]]
+    for source, target in edges:
+        values = edge_properties.get((source, target), {})
+        yield [source, target] + [format_value(values.get(property)) for property in properties] + [relationship_type]
+
+
+def get_import_command(output_dir: str) -> str:
+    arguments = [f"--nodes={os.path.join(output_dir, file_name)}" for file_name in NODE_FILES]
+    arguments += [f"--relationships={os.path.join(output_dir, file_name)}" for file_name in RELATIONSHIP_FILES]
+    return f"neo4j-admin database import full neo4j --overwrite-destination --array-delimiter='{ARRAY_DELIMITER}' " + " ".join(arguments)
+
+
+def export_admin_csv(directory: str, logger, output_dir: str = ADMIN_CSV_EXPORT_DIR) -> str:
+    """Writes the node and relationship CSV files of an extraction run to `output_dir`.
+
+    Returns the `neo4j-admin database import` command that loads them into an empty database.
+    """
+    start_time = time.time()
+    bulk_rows = new_bulk_rows()
+    response_file_paths = index_latest_responses(directory)
+    for file_path, json_data, error in tqdm.tqdm(load_json_responses(response_file_paths), total=len(response_file_paths)):
+        try:
+            if error is not None:
+                raise error
+            add_json_rows(bulk_rows, json_data)
+        except Exception as e:
+            logger.error(f"Failed exporting: {file_path}")
+
+    datamodels, procedures, columns = build_nodes(bulk_rows)
+    model_edges = list(bulk_rows["model_edges"])
+    procedure_read_edges = list(bulk_rows["procedure_read_edges"])
+    procedure_write_edges = list(bulk_rows["procedure_write_edges"])
+    has_column_edges = [(row["datamodel_name"], name) for name, row in bulk_rows["columns"].items()]
+    column_edges = list(bulk_rows["column_edges"])
+
+    # Same steps and order as run_post_processing
+    propagated_count = propagate_types_in_memory(columns, column_edges)
+    classify_in_memory(datamodels, model_edges + procedure_read_edges + procedure_write_edges)
+    classify_in_memory(columns, column_edges)
+    connected_count = connect_orphans_in_memory(datamodels, columns, has_column_edges)
+    add_metadata_in_memory(datamodels, columns, has_column_edges)
+
+    os.makedirs(output_dir, exist_ok=True)
+    object_edges = model_edges + procedure_read_edges + procedure_write_edges
+    component_nodes, component_edges, line_modes = {}, [], {}
+    if DO_BUILD_LINEAGE_INDEX:
+        for graph, nodes, edges in (("objects", {**datamodels, **procedures}, object_edges), ("columns", columns, column_edges)):
+            graph_component_nodes, graph_component_edges = add_lineage_index_in_memory(graph, nodes, edges)
+            component_nodes.update(graph_component_nodes)
+            component_edges += graph_component_edges
+        line_modes = get_line_modes_in_memory(procedures, object_edges)
+
+    graph_version = {GRAPH_VERSION_ID: {"version": new_graph_version(), "lineage_index": DO_BUILD_LINEAGE_INDEX}}
+    nodes_by_file = {
+        "datamodels.csv": datamodels,
+        "stored_procedures.csv": procedures,
+        "columns.csv": columns,
+        "lineage_components.csv": component_nodes,
+        "graph_version.csv": graph_version,
+    }
+    edges_by_file = {
+        "upstream_model.csv": model_edges,
+        "procedure_reads.csv": procedure_read_edges,
+        "procedure_writes.csv": procedure_write_edges,
+        "has_column.csv": has_column_edges,
+        "upstream_column.csv": column_edges,
+        "upstream_component.csv": component_edges,
+    }
+    for file_name, (label, header) in NODE_FILES.items():
+        count = write_csv(os.path.join(output_dir, file_name), header, node_rows(nodes_by_file[file_name], header, label))
+        logg_print(logger, f"  - {file_name}: {count} {label} nodes")
+    for file_name, (relationship_type, header) in RELATIONSHIP_FILES.items():
+        count = write_csv(os.path.join(output_dir, file_name), header, edge_rows(edges_by_file[file_name], header, relationship_type, line_modes))
+        logg_print(logger, f"  - {file_name}: {count} {relationship_type} relationships")
+
+    logg_print(logger, f"☑️ Exported neo4j-admin CSVs to {output_dir} in {time.time() - start_time:.2f}s ({propagated_count} propagated column types, {connected_count} orphaned columns connected)")
+    import_command = get_import_command(os.path.abspath(output_dir))
+    logg_print(logger, f"📦 Import into a stopped, empty database with:\n{import_command}")
+    # A regular json_to_graph run would reset or rebuild the imported graph, so only the schema is created
+    logg_print(logger, "   Then start the database and create the constraints and indexes with:\npython -m json_to_graph.neo4j_integration.schema")
+    return import_command
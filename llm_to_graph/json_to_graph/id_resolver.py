@@ -0,0 +1,91 @@
+"""
+Memoized resolution of raw object and column names to graph ids.
+
+Gives the same results as split_warehouse_schema_object + get_id_name for the configured
+DEFAULT_WAREHOUSE and WAREHOUSE_DEFAULT_SCHEMA_MAPPING, but the case-insensitive schema
+mapping is precomputed once and every raw name is resolved once per process: results are
+kept in bounded LRU caches (ID_RESOLVER_CACHE_SIZE entries each) and the returned strings
+are interned, so the many rows referring to the same node share one id string.
+
+Run `python -m json_to_graph.id_resolver` from llm_to_graph for a micro-benchmark.
+"""
+import sys
+from functools import lru_cache
+from typing import Tuple
+
+from json_to_graph.split_warehouse_schema_object import SCHEMA_MISSING_MESSAGE
+from config import DEFAULT_WAREHOUSE, WAREHOUSE_DEFAULT_SCHEMA_MAPPING, ID_RESOLVER_CACHE_SIZE
+
+# Upper-cased warehouse -> default schema, the first matching key wins like in split_warehouse_schema_object
+DEFAULT_SCHEMA_BY_WAREHOUSE = {}
+for warehouse_key, default_schema in WAREHOUSE_DEFAULT_SCHEMA_MAPPING.items():
+    DEFAULT_SCHEMA_BY_WAREHOUSE.setdefault(warehouse_key.upper(), default_schema)
+
+
+@lru_cache(maxsize=ID_RESOLVER_CACHE_SIZE)
+def resolve_object(object_name: str) -> Tuple[str, str, str, str]:
+    """Returns (warehouse, schema, object, id_name) of a raw `[warehouse.]schema.object` name."""
+    parts = (object_name or "").rsplit('.', 2)
+    object = parts[-1]
+    schema = parts[-2] if len(parts) > 1 else ''
+    warehouse = parts[0] if len(parts) > 2 else ''
+
+    if warehouse == '':
+        warehouse = DEFAULT_WAREHOUSE
+    if schema == '':
+        schema = DEFAULT_SCHEMA_BY_WAREHOUSE.get(warehouse.upper(), SCHEMA_MISSING_MESSAGE)
+
+    id_name = f"{warehouse.upper()}.{schema.upper()}.{object.upper()}"
+    return sys.intern(warehouse), sys.intern(schema), sys.intern(object), sys.intern(id_name)
+
+
+def resolve_id_name(object_name: str) -> str:
+    return resolve_object(object_name)[3]
+
+
+@lru_cache(maxsize=ID_RESOLVER_CACHE_SIZE)
+def resolve_column_id_name(datamodel_name: str, column_name: str) -> str:
+    """Returns the id of column `column_name` of the raw datamodel name `datamodel_name`."""
+    return sys.intern(f"{resolve_object(datamodel_name)[3]}.{column_name.upper()}")
+
+
+def clear_cache():
+    resolve_object.cache_clear()
+    resolve_column_id_name.cache_clear()
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from json_to_graph.split_warehouse_schema_object import split_warehouse_schema_object, get_id_name
+
+    # Exactly one million, so the totals read as seconds per million names
+    NAME_COUNT = 1_000_000
+    DISTINCT_NAMES = 20_000
+    random.seed(0)
+    shapes = ["{o}", "{s}.{o}", "..{o}", "{w}.{s}.{o}", "{w}..{o}", "ware.{w}.{s}.{o}"]
+    warehouses = list(WAREHOUSE_DEFAULT_SCHEMA_MAPPING) + ["OtherWarehouse"]
+    distinct_names = [
+        random.choice(shapes).format(w=random.choice(warehouses), s=f"schema_{i % 50}", o=f"Object_{i}")
+        for i in range(DISTINCT_NAMES)
+    ]
+    names = [random.choice(distinct_names) for _ in range(NAME_COUNT)]
+
+    for name in distinct_names:
+        expected = split_warehouse_schema_object(name)
+        assert resolve_object(name) == (*expected, get_id_name(*expected)), name
+    clear_cache()
+
+    def benchmark(label, resolve):
+        start_time = time.perf_counter()
+        for name in names:
+            resolve(name)
+        elapsed = time.perf_counter() - start_time
+        print(f"{label:<42} {elapsed:6.2f}s per million names")
+
+    print(f"{NAME_COUNT} names, {DISTINCT_NAMES} distinct")
+    benchmark("split_warehouse_schema_object+get_id_name", lambda name: get_id_name(*split_warehouse_schema_object(name)))
+    benchmark("resolve_id_name (cold cache)", resolve_id_name)
+    benchmark("resolve_id_name (warm cache)", resolve_id_name)
+    print(resolve_object.cache_info())
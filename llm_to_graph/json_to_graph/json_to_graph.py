@@ -1,11 +1,13 @@
 import os
 import json
-from pathlib import Path
-import glob
 import tqdm
 
 from data_models import StoredProcedure, DataModel
-from json_to_graph.neo4j_integration.base_connector import reset_neo4j_database
+from json_to_graph.neo4j_integration.base_connector import driver, reset_neo4j_database
+from json_to_graph.neo4j_integration.schema import ensure_schema
+from json_to_graph.neo4j_integration.graph_version import write_graph_version
+from json_to_graph.neo4j_integration.sql_object_remover import remove_owned_objects
+from json_to_graph.neo4j_integration.bulk_writer import new_bulk_rows, add_datamodel_rows, add_procedure_rows, write_bulk_rows
 from json_to_graph.neo4j_integration.sql_stored_procedure_inserter import insert_procedure_into_neo4j
 from json_to_graph.neo4j_integration.sql_datamodel_inserter import insert_datamodel_into_neo4j
 
@@ -14,67 +16,172 @@ from json_to_graph.neo4j_integration.post_processing.connect_orphaned_columns im
 from json_to_graph.neo4j_integration.post_processing.classify_column_types import classify_column_types
 from json_to_graph.neo4j_integration.post_processing.classify_datamodel_types import classify_datamodel_types
 from json_to_graph.neo4j_integration.post_processing.propagate_column_types import propagate_column_types
-from json_to_graph.neo4j_integration.post_processing.create_indices_from_names import create_indices_from_names
+from json_to_graph.neo4j_integration.post_processing.build_lineage_index import build_lineage_indexes
+from json_to_graph.admin_csv_exporter import export_admin_csv
+from json_to_graph.response_index import index_latest_responses, load_json_responses
+from json_to_graph.run_manifest import (
+    MANIFEST_FILE_PATH,
+    add_owned_objects,
+    deserialize_objects,
+    diff_manifest,
+    get_settings,
+    get_touched_names,
+    load_manifest,
+    merge_objects,
+    new_objects,
+    save_manifest,
+    scan_extraction_run,
+    subtract_objects
+)
 
 from logger import logg_print
 from config import (
     DEFAULT_EXTRACTION_DIR, 
-    PATH_EXTRACTION_RUNS
+    PATH_EXTRACTION_RUNS,
+    DO_INCREMENTAL_RUN,
+    DO_BULK_INSERT,
+    DO_EXPORT_NEO4J_ADMIN_CSV,
+    DO_BUILD_LINEAGE_INDEX
 )
 
 
-def get_latest_response(file_path:str):
-    current_dir = '/'.join(str(file_path).split("/")[:-1]) + '/'
-    base_name = str(file_path).split(".")[-3]
-
-    pattern = os.path.join(current_dir, f'{base_name}.sql_response_*.json')
-    matches = glob.glob(pattern)
-    matches.sort()
-
-    if str(file_path) == matches[-1]: return file_path
-    return None
+def insert_json_data(json_data, logger, bulk_rows=None):
+    """Inserts one response, or only collects its rows when `bulk_rows` is given."""
+    if json_data["data"]["type"] == 'stored_procedure':
+        stored_procedure = StoredProcedure(**json_data["data"])
+        if bulk_rows is not None:
+            add_procedure_rows(bulk_rows, stored_procedure)
+            return
+        insert_procedure_into_neo4j(stored_procedure)
+        logger.info(f"Success inserting: {stored_procedure.name} [stored_procedure]")
+    elif json_data["data"]["type"] in ['table', 'view']:
+        datamodel = DataModel(**json_data["data"])
+        if bulk_rows is not None:
+            add_datamodel_rows(bulk_rows, datamodel)
+            return
+        insert_datamodel_into_neo4j(datamodel)
+        logger.info(f"Success inserting: {datamodel.name} [{datamodel.type}]")
 
 
 def load_json_files(directory, logger):
-    dir_path = Path(directory).resolve()
+    bulk_rows = new_bulk_rows() if DO_BULK_INSERT else None
+    response_file_paths = index_latest_responses(directory)
 
-    for file_path in tqdm.tqdm(list(Path(dir_path).glob('**/*.json'))):
-        latest_response_file_path = get_latest_response(file_path)
-        if latest_response_file_path is None:
-            continue
-    
+    for file_path, json_data, error in tqdm.tqdm(load_json_responses(response_file_paths), total=len(response_file_paths)):
         try:
-            with open(latest_response_file_path, 'r', encoding='utf-8') as file:
-                json_data = json.load(file)
-
-                if json_data["data"]["type"] == 'stored_procedure':
-                    stored_procedure = StoredProcedure(**json_data["data"])
-                    insert_procedure_into_neo4j(stored_procedure)
-                    logger.info(f"Success inserting: {stored_procedure.name} [stored_procedure]")
-                elif json_data["data"]["type"] in ['table', 'view']:
-                    datamodel = DataModel(**json_data["data"])
-                    insert_datamodel_into_neo4j(datamodel)
-                    logger.info(f"Success inserting: {datamodel.name} [{datamodel.type}]")
+            if error is not None:
+                raise error
+            insert_json_data(json_data, logger, bulk_rows)
                 
         except Exception as e:
-            logger.error(f"Failed inserting: {latest_response_file_path}")
+            logger.error(f"Failed inserting: {file_path}")
 
-def json_to_graph(logger):
+    if bulk_rows is not None:
+        write_bulk_rows(bulk_rows, logger)
 
-    dir_path = os.path.join(DEFAULT_EXTRACTION_DIR, PATH_EXTRACTION_RUNS)
-    
-    logg_print(logger, "----- JSON to Neo4j ----")
-    reset_neo4j_database()
-    load_json_files(dir_path, logger)
 
+def run_post_processing(logger, datamodel_names=None, column_names=None):
     print()
     logg_print(logger, "----- Post processing ----")
-    propagate_column_types(logger)
-    classify_datamodel_types(logger)
-    classify_column_types(logger)
-    connect_orphaned_columns(logger)
-    add_metadata_to_columns(logger)
-    create_indices_from_names(logger)
+    propagate_column_types(logger, column_names=column_names)
+    classify_datamodel_types(logger, datamodel_names=datamodel_names)
+    classify_column_types(logger, column_names=column_names)
+    connect_orphaned_columns(logger, datamodel_names=datamodel_names, column_names=column_names)
+    add_metadata_to_columns(logger, datamodel_names=datamodel_names, column_names=column_names)
+    # Whole graph, also in incremental runs
+    lineage_index = build_lineage_indexes(logger) if DO_BUILD_LINEAGE_INDEX else False
+    # Last step, so the backend only drops its cache once the graph is complete
+    write_graph_version(logger, lineage_index=lineage_index)
     logg_print(logger, "")
 
 
+def insert_manifest_files(files, sql_files, logger):
+    """Inserts the responses of the given SQL files and records the graph objects they own."""
+    bulk_rows = new_bulk_rows() if DO_BULK_INSERT else None
+    for sql_file in tqdm.tqdm(sql_files):
+        entry = files[sql_file]
+        entry["objects"] = new_objects()
+        for json_file, json_data in zip(entry["json_files"], entry["responses"]):
+            try:
+                add_owned_objects(entry["objects"], json_data)
+                insert_json_data(json_data, logger, bulk_rows)
+            except Exception as e:
+                logger.error(f"Failed inserting: {json_file}")
+                # Not recorded in the manifest, so the next run retries it
+                entry["failed"] = True
+
+    if bulk_rows is not None:
+        write_bulk_rows(bulk_rows, logger)
+
+
+def save_loaded_manifest(files):
+    save_manifest({sql_file: entry for sql_file, entry in files.items() if not entry.get("failed")})
+
+
+def is_graph_empty():
+    with driver.session() as session:
+        return session.run("MATCH (n:DataModel) RETURN n LIMIT 1").single() is None
+
+
+def full_json_to_graph(files, logger):
+    reset_neo4j_database()
+    insert_manifest_files(files, sorted(files), logger)
+    run_post_processing(logger)
+    save_loaded_manifest(files)
+
+
+def incremental_json_to_graph(dir_path, logger):
+    files = scan_extraction_run(dir_path, logger)
+    manifest = load_manifest()
+
+    if manifest is None or manifest["settings"] != get_settings() or is_graph_empty():
+        logg_print(logger, f"📒 No usable manifest at {MANIFEST_FILE_PATH}, rebuilding the whole graph")
+        full_json_to_graph(files, logger)
+        return
+
+    previous_files = manifest["files"]
+    added, changed, removed, unchanged = diff_manifest(previous_files, files)
+    logg_print(logger, f"📒 Manifest: {len(added)} added, {len(changed)} changed, {len(removed)} removed, {len(unchanged)} unchanged SQL files")
+    if not (added or changed or removed):
+        return
+
+    for sql_file in unchanged:
+        files[sql_file]["objects"] = deserialize_objects(previous_files[sql_file]["objects"])
+    for sql_file in added + changed:
+        files[sql_file]["objects"] = new_objects()
+        for json_data in files[sql_file]["responses"]:
+            add_owned_objects(files[sql_file]["objects"], json_data)
+
+    previous_objects = merge_objects(deserialize_objects(previous_files[sql_file]["objects"]) for sql_file in changed + removed)
+    current_objects = merge_objects(files[sql_file]["objects"] for sql_file in files)
+    deleted_count = remove_owned_objects(subtract_objects(previous_objects, current_objects))
+    logg_print(logger, f"🗑️  Removed objects of {len(changed) + len(removed)} SQL files ({deleted_count} nodes deleted)")
+
+    insert_manifest_files(files, added + changed, logger)
+
+    touched_objects = merge_objects([previous_objects] + [files[sql_file]["objects"] for sql_file in added + changed])
+    datamodel_names, column_names = get_touched_names(touched_objects)
+    logg_print(logger, f"🔎 Post processing {len(datamodel_names)} datamodels and {len(column_names)} columns")
+    run_post_processing(logger, datamodel_names=datamodel_names, column_names=column_names)
+
+    save_loaded_manifest(files)
+
+
+def json_to_graph(logger):
+
+    dir_path = os.path.join(DEFAULT_EXTRACTION_DIR, PATH_EXTRACTION_RUNS)
+    
+    if DO_EXPORT_NEO4J_ADMIN_CSV:
+        logg_print(logger, "----- JSON to neo4j-admin CSV ----")
+        export_admin_csv(dir_path, logger)
+        return
+
+    logg_print(logger, "----- JSON to Neo4j ----")
+    ensure_schema(logger, reset_follows=not DO_INCREMENTAL_RUN)
+    if DO_INCREMENTAL_RUN:
+        incremental_json_to_graph(dir_path, logger)
+        return
+
+    reset_neo4j_database()
+    load_json_files(dir_path, logger)
+    run_post_processing(logger)
@@ -0,0 +1,187 @@
+"""
+Reachability index over a lineage graph (UPSTREAM_MODEL or UPSTREAM_COLUMN).
+
+Strongly connected components are condensed first, so the graph becomes a DAG and all
+nodes of a cycle share one label. Every component gets two positions:
+
+- `topo`: its position in a reverse DFS postorder of the DAG (a topological order)
+- `rtopo`: the same over the reversed DAG
+
+The nodes reachable along outgoing edges of a component are stored as sorted, disjoint
+[low, high] intervals of `topo` positions (`out_intervals`), the nodes reachable along
+incoming edges as intervals of `rtopo` positions (`in_intervals`). A DFS numbering keeps
+every DFS subtree contiguous, so tree-like lineage needs a single interval and every extra
+merge adds few. Component sets with more than `max_intervals` intervals are not labelled
+(None), lookups fall back to a traversal for those.
+
+Nodes are numbered 0..n-1 with a CSR adjacency from type_propagation.build_adjacency.
+This module does not talk to Neo4j.
+"""
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from json_to_graph.type_propagation import build_adjacency
+
+Intervals = Optional[List[Tuple[int, int]]]
+
+
+def strongly_connected_components(node_count: int, offsets: Sequence[int], targets: Sequence[int]) -> Tuple[array, int]:
+    """Iterative Tarjan. Returns (component of every node, number of components)."""
+    unvisited = -1
+    index = array('q', [unvisited]) * node_count
+    lowlink = array('q', [0]) * node_count
+    on_stack = bytearray(node_count)
+    component = array('q', [unvisited]) * node_count
+    stack = []
+    next_index = 0
+    component_count = 0
+
+    for root in range(node_count):
+        if index[root] != unvisited:
+            continue
+        # (node, position of the next edge to look at)
+        work = [(root, offsets[root])]
+        index[root] = lowlink[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack[root] = 1
+
+        while work:
+            node, edge = work[-1]
+            if edge < offsets[node + 1]:
+                work[-1] = (node, edge + 1)
+                target = targets[edge]
+                if index[target] == unvisited:
+                    index[target] = lowlink[target] = next_index
+                    next_index += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, offsets[target]))
+                elif on_stack[target]:
+                    lowlink[node] = min(lowlink[node], index[target])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component[member] = component_count
+                    if member == node:
+                        break
+                component_count += 1
+
+    return component, component_count
+
+
+def condense(node_count: int, edges: List[Tuple[int, int]], component: Sequence[int]) -> List[Tuple[int, int]]:
+    """Returns the distinct edges between different components."""
+    return list({
+        (component[source], component[target])
+        for source, target in edges
+        if component[source] != component[target]
+    })
+
+
+def reverse_postorder_positions(node_count: int, offsets: Sequence[int], targets: Sequence[int]) -> array:
+    """Position of every node in the reverse DFS postorder (a topological order of a DAG)."""
+    position = array('q', [-1]) * node_count
+    visited = bytearray(node_count)
+    next_position = node_count - 1
+
+    for root in range(node_count):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        work = [(root, offsets[root])]
+        while work:
+            node, edge = work[-1]
+            if edge < offsets[node + 1]:
+                work[-1] = (node, edge + 1)
+                target = targets[edge]
+                if not visited[target]:
+                    visited[target] = 1
+                    work.append((target, offsets[target]))
+                continue
+            work.pop()
+            position[node] = next_position
+            next_position -= 1
+    return position
+
+
+def merge_intervals(interval_lists: List[List[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+    """Union of interval lists, adjacent intervals are joined."""
+    merged = []
+    for low, high in sorted(interval for intervals in interval_lists for interval in intervals):
+        if merged and low <= merged[-1][1] + 1:
+            if high > merged[-1][1]:
+                merged[-1] = (merged[-1][0], high)
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def reachability_intervals(
+    node_count: int,
+    offsets: Sequence[int],
+    targets: Sequence[int],
+    position: Sequence[int],
+    max_intervals: int
+) -> List[Intervals]:
+    """Intervals of the positions reachable from every node of a DAG (the node included).
+
+    Nodes are processed in decreasing position, so all successors of a node are done first.
+    """
+    intervals: List[Intervals] = [None] * node_count
+    for node in sorted(range(node_count), key=lambda node: position[node], reverse=True):
+        successor_intervals = [intervals[target] for target in targets[offsets[node]:offsets[node + 1]]]
+        if any(successor is None for successor in successor_intervals):
+            # A successor overflowed, so does this node
+            continue
+        own = [(position[node], position[node])]
+        merged = merge_intervals([own] + successor_intervals)
+        intervals[node] = merged if len(merged) <= max_intervals else None
+    return intervals
+
+
+def flatten_intervals(intervals: Intervals) -> Optional[List[int]]:
+    # Neo4j has no nested lists, [(1, 3), (5, 5)] is stored as [1, 3, 5, 5]
+    if intervals is None:
+        return None
+    return [bound for interval in intervals for bound in interval]
+
+
+def build_lineage_index(node_count: int, edges: List[Tuple[int, int]], max_intervals: int):
+    """
+    Returns (labels, component count, overflowed nodes). `labels[i]` is a dict with the
+    component, topo, rtopo, out_intervals and in_intervals (flat lists or None) of node i.
+    """
+    offsets, targets = build_adjacency(node_count, edges)
+    component, component_count = strongly_connected_components(node_count, offsets, targets)
+
+    dag_edges = condense(node_count, edges, component)
+    dag_offsets, dag_targets = build_adjacency(component_count, dag_edges)
+    reverse_offsets, reverse_targets = build_adjacency(component_count, [(target, source) for source, target in dag_edges])
+
+    topo = reverse_postorder_positions(component_count, dag_offsets, dag_targets)
+    rtopo = reverse_postorder_positions(component_count, reverse_offsets, reverse_targets)
+    out_intervals = reachability_intervals(component_count, dag_offsets, dag_targets, topo, max_intervals)
+    in_intervals = reachability_intervals(component_count, reverse_offsets, reverse_targets, rtopo, max_intervals)
+
+    labels = []
+    overflowed = 0
+    for node in range(node_count):
+        node_component = component[node]
+        if out_intervals[node_component] is None or in_intervals[node_component] is None:
+            overflowed += 1
+        labels.append({
+            "component": node_component,
+            "topo": topo[node_component],
+            "rtopo": rtopo[node_component],
+            "out_intervals": flatten_intervals(out_intervals[node_component]),
+            "in_intervals": flatten_intervals(in_intervals[node_component]),
+        })
+    return labels, component_count, overflowed
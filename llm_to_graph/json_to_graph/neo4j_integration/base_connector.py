@@ -2,9 +2,14 @@
 Base Neo4j connector that provides shared connection and database operations
 """
 import os
+from typing import Optional
+
+import tqdm
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+from config import PATH_EXTRACTION_RUNS, RESET_BATCH_SIZE, RESET_ONLY_EXTRACTION_RUN
+
 # Load environment variables
 load_dotenv()
 
@@ -13,21 +18,87 @@ uri = os.getenv("NEO4J_URI")
 username = os.getenv("NEO4J_USERNAME")
 password = os.getenv("NEO4J_PASSWORD")
 
+# Labels of the nodes the loaders tag with `extraction_run`
+RUN_NODE_LABELS = ["Column", "StoredProcedure", "DataModel"]
+
 # Create a shared driver instance
 driver = GraphDatabase.driver(uri, auth=(username, password))
 
-def reset_neo4j_database():
+def delete_batch(tx, query: str, params: dict) -> int:
+    return tx.run(query, params).single()["deleted"]
+
+
+def delete_in_batches(session, count_query: str, delete_query: str, params: dict, description: str) -> int:
+    """Runs `delete_query` (LIMIT $batch_size ... RETURN count(*) AS deleted) until nothing is left."""
+    total = session.run(count_query, params).single()["total"]
+    deleted_total = 0
+    with tqdm.tqdm(total=total, desc=description, unit=" items") as progress:
+        while True:
+            deleted = session.execute_write(delete_batch, delete_query, params)
+            if deleted == 0:
+                break
+            deleted_total += deleted
+            progress.update(deleted)
+    return deleted_total
+
+
+def reset_neo4j_database(extraction_run: Optional[str] = None, batch_size: int = RESET_BATCH_SIZE):
     """
     Reset the Neo4j database by removing all nodes and relationships.
     This is a shared operation that can be used by any module.
+
+    Deletes in transactions of `batch_size` relationships/nodes, so large graphs do not run out
+    of transaction memory. With `extraction_run` (or RESET_ONLY_EXTRACTION_RUN), only the nodes
+    tagged with that extraction run are deleted, together with their relationships.
+    Schema (constraints and indexes) is kept.
     """
+    if extraction_run is None and RESET_ONLY_EXTRACTION_RUN:
+        extraction_run = PATH_EXTRACTION_RUNS
+
+    params = {"batch_size": batch_size, "extraction_run": extraction_run}
     with driver.session() as session:
-        session.run(
-            "match (a) -[r] -> () delete a, r"
-        )
+        if extraction_run is not None:
+            # One pass per label, so the extraction_run indexes are used
+            return sum(
+                delete_in_batches(
+                    session,
+                    f"MATCH (n:{label} {{extraction_run: $extraction_run}}) RETURN count(n) AS total",
+                    f"""
+                    MATCH (n:{label} {{extraction_run: $extraction_run}})
+                    WITH n LIMIT $batch_size
+                    DETACH DELETE n
+                    RETURN count(*) AS deleted
+                    """,
+                    params,
+                    f"Deleting {label} nodes of {extraction_run}"
+                )
+                for label in RUN_NODE_LABELS
+            )
 
-        session.run(
-            "match (a) delete a"
+        # Relationships first, so every node batch is cheap to delete
+        delete_in_batches(
+            session,
+            "MATCH ()-[r]->() RETURN count(r) AS total",
+            """
+            MATCH ()-[r]->()
+            WITH r LIMIT $batch_size
+            DELETE r
+            RETURN count(*) AS deleted
+            """,
+            params,
+            "Deleting relationships"
+        )
+        return delete_in_batches(
+            session,
+            "MATCH (n) RETURN count(n) AS total",
+            """
+            MATCH (n)
+            WITH n LIMIT $batch_size
+            DETACH DELETE n
+            RETURN count(*) AS deleted
+            """,
+            params,
+            "Deleting nodes"
         )
 
 def get_driver():
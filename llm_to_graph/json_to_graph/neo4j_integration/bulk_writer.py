@@ -0,0 +1,322 @@
+"""
+Bulk ingestion path for datamodels, columns and stored procedures.
+
+Rows are collected from many extraction files first and then written with parameterized
+UNWIND batches, each batch in its own explicit write transaction. The MERGE/SET semantics
+are the ones of sql_datamodel_inserter, sql_column_inserter and sql_stored_procedure_inserter.
+
+Phases run in dependency order, so every MATCH finds the nodes created before it:
+reference datamodels -> defined datamodels -> stored procedures -> UPSTREAM_MODEL edges ->
+stored procedure read/write edges -> reference columns -> defined columns (+ HAS_COLUMN) ->
+UPSTREAM_COLUMN edges. Properties of defined objects are written after those of references,
+so a definition always wins over a reference to the same object.
+
+Within a phase, rows are sharded over INGESTION_WORKERS sessions by the hashed id of the
+node they lock, so parallel writers rarely contend for the same DataModel or Column.
+"""
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from data_models import DataModel, StoredProcedure
+from json_to_graph.id_resolver import resolve_object, resolve_column_id_name
+from json_to_graph.neo4j_integration.sql_column_inserter import get_transformations
+from json_to_graph.neo4j_integration.base_connector import driver
+from logger import logg_print
+from config import DEFAULT_WAREHOUSE, DO_SIMPLE_EXTRACT, BULK_INSERT_BATCH_SIZE, INGESTION_WORKERS, PATH_EXTRACTION_RUNS
+
+PHASES = [
+    (
+        "reference datamodels",
+        "ref_datamodels",
+        """
+        UNWIND $rows AS row
+        MERGE (o:DataModel {name: row.name})
+        SET o.original_name = row.original_name,
+            o.warehouse = row.warehouse,
+            o.schema = row.schema,
+            o.object = row.object,
+            o.is_external = coalesce(row.is_external, o.is_external),
+            o.extraction_run = $extraction_run
+        """
+    ),
+    (
+        "datamodels",
+        "datamodels",
+        """
+        UNWIND $rows AS row
+        MERGE (o:DataModel {name: row.name})
+        SET o.original_name = row.original_name,
+            o.warehouse = row.warehouse,
+            o.schema = row.schema,
+            o.object = row.object,
+            o.type = row.type,
+            o.is_external = row.is_external,
+            o.extraction_run = $extraction_run
+        """
+    ),
+    (
+        "stored procedures",
+        "procedures",
+        """
+        UNWIND $rows AS row
+        MERGE (p:StoredProcedure {name: row.name})
+        SET p.original_name = row.original_name,
+            p.warehouse = row.warehouse,
+            p.schema = row.schema,
+            p.object = row.object,
+            p.node_type = 'StoredProcedure',
+            p.type = 'StoredProcedure',
+            p.extraction_run = $extraction_run
+        """
+    ),
+    (
+        "UPSTREAM_MODEL edges",
+        "model_edges",
+        """
+        UNWIND $rows AS row
+        MATCH (t:DataModel {name: row.source})
+        MATCH (d:DataModel {name: row.target})
+        MERGE (t)-[:UPSTREAM_MODEL]->(d)
+        """
+    ),
+    (
+        "stored procedure reads",
+        "procedure_read_edges",
+        """
+        UNWIND $rows AS row
+        MATCH (o:DataModel {name: row.source})
+        MATCH (p:StoredProcedure {name: row.target})
+        MERGE (o)-[:UPSTREAM_MODEL]->(p)
+        """
+    ),
+    (
+        "stored procedure writes",
+        "procedure_write_edges",
+        """
+        UNWIND $rows AS row
+        MATCH (p:StoredProcedure {name: row.source})
+        MATCH (o:DataModel {name: row.target})
+        MERGE (p)-[:UPSTREAM_MODEL]->(o)
+        """
+    ),
+    (
+        "reference columns",
+        "ref_columns",
+        """
+        UNWIND $rows AS row
+        MERGE (t:Column {name: row.name})
+        SET t.original_name = row.original_name,
+            t.extraction_run = $extraction_run
+        """
+    ),
+    (
+        "columns",
+        "columns",
+        """
+        UNWIND $rows AS row
+        MATCH (d:DataModel {name: row.datamodel_name})
+        MERGE (t:Column {name: row.name})
+        SET t.original_name = row.original_name,
+            t.original_datamodel_name = row.original_datamodel_name,
+            t.type = row.type,
+            t.is_type_guessed = false,
+            t.is_type_updated = false,
+            t.datamodel_name = row.datamodel_name,
+            t.transformations = row.transformations,
+            t.extraction_run = $extraction_run
+        MERGE (d)-[:HAS_COLUMN]->(t)
+        """
+    ),
+    (
+        "UPSTREAM_COLUMN edges",
+        "column_edges",
+        """
+        UNWIND $rows AS row
+        MATCH (t:Column {name: row.source})
+        MATCH (d:Column {name: row.target})
+        MERGE (t)-[:UPSTREAM_COLUMN]->(d)
+        """
+    ),
+]
+
+# Row field that decides the ingestion worker of a row, by phase (default: "name").
+# Columns are grouped by their datamodel, which HAS_COLUMN locks; edges by their target.
+SHARD_KEYS = {
+    "columns": "datamodel_name",
+    "model_edges": "target",
+    "procedure_read_edges": "target",
+    "procedure_write_edges": "target",
+    "column_edges": "target",
+}
+
+
+def new_bulk_rows() -> Dict[str, Dict]:
+    # Keyed by node name / (source, target), so repeated objects are written once
+    return {row_key: {} for _, row_key, _ in PHASES}
+
+
+def get_object_row(full_object_name: str) -> Dict:
+    warehouse, schema, object, id_name = resolve_object(full_object_name)
+    return {
+        "name": id_name,
+        "original_name": full_object_name,
+        "warehouse": warehouse,
+        "schema": schema,
+        "object": object,
+    }
+
+
+def is_external_warehouse(warehouse: str) -> bool:
+    return False if warehouse.upper() == DEFAULT_WAREHOUSE.upper() else True
+
+
+def add_reference_datamodel(bulk_rows: Dict[str, Dict], full_object_name: str, with_is_external: bool) -> str:
+    row = get_object_row(full_object_name)
+    row["is_external"] = is_external_warehouse(row["warehouse"]) if with_is_external else None
+
+    previous_row = bulk_rows["ref_datamodels"].get(row["name"])
+    if row["is_external"] is None and previous_row is not None:
+        row["is_external"] = previous_row["is_external"]
+    bulk_rows["ref_datamodels"][row["name"]] = row
+    return row["name"]
+
+
+def add_datamodel_rows(bulk_rows: Dict[str, Dict], datamodel: DataModel):
+    """Collects the rows insert_datamodel_into_neo4j would write for one datamodel."""
+    row = get_object_row(datamodel.name)
+    row["type"] = datamodel.type.lower() if datamodel.type else datamodel.type
+    row["is_external"] = is_external_warehouse(row["warehouse"])
+    bulk_rows["datamodels"][row["name"]] = row
+    datamodel_id_name = row["name"]
+
+    for downstream_model in datamodel.downstream_models:
+        # Datamodel references do not set is_external, stored procedure references do
+        downstream_model_id_name = add_reference_datamodel(bulk_rows, downstream_model, with_is_external=False)
+        bulk_rows["model_edges"][(downstream_model_id_name, datamodel_id_name)] = {"source": downstream_model_id_name, "target": datamodel_id_name}
+
+    if DO_SIMPLE_EXTRACT or not datamodel.columns:
+        return
+
+    for column in datamodel.columns:
+        column_id_name = resolve_column_id_name(datamodel.name, column.name)
+        bulk_rows["columns"][column_id_name] = {
+            "name": column_id_name,
+            "datamodel_name": datamodel_id_name,
+            "original_datamodel_name": datamodel.name,
+            "original_name": column.name,
+            "type": column.type,
+            "transformations": get_transformations(column),
+        }
+
+        for downstream_column in column.downstream_columns or []:
+            downstream_column_id_name = resolve_column_id_name(downstream_column.datamodel, downstream_column.name)
+            bulk_rows["ref_columns"][downstream_column_id_name] = {
+                "name": downstream_column_id_name,
+                "original_name": downstream_column.name
+            }
+            bulk_rows["column_edges"][(downstream_column_id_name, column_id_name)] = {"source": downstream_column_id_name, "target": column_id_name}
+
+
+def add_procedure_rows(bulk_rows: Dict[str, Dict], stored_procedure: StoredProcedure):
+    """Collects the rows insert_procedure_into_neo4j would write for one stored procedure."""
+    row = get_object_row(stored_procedure.name)
+    bulk_rows["procedures"][row["name"]] = row
+    procedure_id_name = row["name"]
+
+    for source_object in stored_procedure.source_objects:
+        source_id_name = add_reference_datamodel(bulk_rows, source_object, with_is_external=True)
+        bulk_rows["procedure_read_edges"][(source_id_name, procedure_id_name)] = {"source": source_id_name, "target": procedure_id_name}
+
+    for target_object in stored_procedure.target_objects:
+        target_id_name = add_reference_datamodel(bulk_rows, target_object, with_is_external=True)
+        bulk_rows["procedure_write_edges"][(procedure_id_name, target_id_name)] = {"source": procedure_id_name, "target": target_id_name}
+
+
+def merge_bulk_rows(bulk_rows: Dict[str, Dict], other_rows: Dict[str, Dict]):
+    """Adds `other_rows` to `bulk_rows` as if they had been collected into it directly."""
+    for row_key, rows in other_rows.items():
+        if row_key != "ref_datamodels":
+            bulk_rows[row_key].update(rows)
+            continue
+        for name, row in rows.items():
+            # Same rule as add_reference_datamodel, an unknown is_external keeps the earlier one
+            previous_row = bulk_rows[row_key].get(name)
+            if row["is_external"] is None and previous_row is not None:
+                row = {**row, "is_external": previous_row["is_external"]}
+            bulk_rows[row_key][name] = row
+
+
+def count_bulk_rows(bulk_rows: Dict[str, Dict]) -> int:
+    return sum(len(rows) for rows in bulk_rows.values())
+
+
+def run_batch(tx, query: str, rows):
+    # Every node written by this run is tagged, so reset_neo4j_database can drop only this run
+    tx.run(query, {"rows": rows, "extraction_run": PATH_EXTRACTION_RUNS}).consume()
+
+
+def shard_rows(row_key: str, rows: List[Dict], workers: int, batch_size: int) -> List[List[Dict]]:
+    """Splits the rows of a phase by the hashed id of the node they lock the most.
+
+    Rows that MERGE the same node (or hang columns/edges on the same node) end up on the
+    same worker, so concurrent transactions rarely wait on each other's locks.
+    """
+    if workers <= 1 or len(rows) <= batch_size:
+        return [rows]
+    shard_key = SHARD_KEYS.get(row_key, "name")
+    shards = [[] for _ in range(workers)]
+    for row in rows:
+        shards[zlib.crc32(row[shard_key].encode("utf-8")) % workers].append(row)
+    return [shard for shard in shards if shard]
+
+
+def write_shard(phase_name: str, query: str, rows: List[Dict], batch_size: int, logger) -> int:
+    """Writes one shard in batches on its own session. Returns the number of batches."""
+    batch_count = (len(rows) + batch_size - 1) // batch_size
+    with driver.session() as session:
+        for batch_index in range(batch_count):
+            batch = rows[batch_index * batch_size:(batch_index + 1) * batch_size]
+            batch_start_time = time.time()
+            try:
+                # execute_write retries transient errors (deadlocks, leader switches) with backoff
+                session.execute_write(run_batch, query, batch)
+            except Exception as e:
+                logger.error(f"Failed bulk inserting {phase_name} (batch {batch_index + 1}/{batch_count}): {e}")
+                continue
+            elapsed = max(time.time() - batch_start_time, 1e-6)
+            logger.info(f"Bulk inserted {phase_name} batch {batch_index + 1}/{batch_count}: {len(batch)} rows in {elapsed:.2f}s ({len(batch) / elapsed:.0f} rows/s)")
+    return batch_count
+
+
+def write_bulk_rows(bulk_rows: Dict[str, Dict], logger, batch_size: int = BULK_INSERT_BATCH_SIZE, print_summary: bool = True, workers: int = INGESTION_WORKERS):
+    """Writes all collected rows phase by phase in UNWIND batches of `batch_size` rows.
+
+    Within a phase the rows are sharded over `workers` sessions; a phase only starts when the
+    previous one is done, so nodes always exist before the edges that MATCH them.
+    Returns the number of rows written. With `print_summary=False` the per phase and total
+    summaries only go to the log file.
+    """
+    log_summary = (lambda msg: logg_print(logger, msg)) if print_summary else logger.info
+    total_rows = count_bulk_rows(bulk_rows)
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for phase_name, row_key, query in PHASES:
+            rows = list(bulk_rows[row_key].values())
+            if not rows:
+                continue
+
+            phase_start_time = time.time()
+            shards = shard_rows(row_key, rows, workers, batch_size)
+            batch_count = sum(executor.map(
+                lambda shard: write_shard(phase_name, query, shard, batch_size, logger), shards
+            ))
+
+            phase_elapsed = max(time.time() - phase_start_time, 1e-6)
+            log_summary(f"  - {phase_name}: {len(rows)} rows in {batch_count} batches on {len(shards)} workers ({len(rows) / phase_elapsed:.0f} rows/s)")
+
+    elapsed = max(time.time() - start_time, 1e-6)
+    log_summary(f"☑️ Bulk inserted {total_rows} rows in {elapsed:.2f}s ({total_rows / elapsed:.0f} rows/s)")
+    return total_rows
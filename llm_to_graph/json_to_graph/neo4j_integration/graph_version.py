@@ -0,0 +1,35 @@
+"""
+Version stamp of the graph, read by the backend to key its response cache and ETags.
+
+A single (:GraphVersion {id: 'current'}) node gets a new random version every time an
+ingestion changes the graph, so every cached backend response of the previous graph is stale.
+"""
+import uuid
+
+from json_to_graph.neo4j_integration.base_connector import driver
+from logger import logg_print
+from config import PATH_EXTRACTION_RUNS
+
+GRAPH_VERSION_ID = "current"
+
+
+def new_graph_version() -> str:
+    return uuid.uuid4().hex
+
+
+def write_graph_version(logger, version: str = None, lineage_index: bool = False) -> str:
+    """Stamps the graph with a new version. `lineage_index` tells the backend whether the lineage index is complete."""
+    version = version or new_graph_version()
+    with driver.session() as session:
+        session.run(
+            """
+            MERGE (v:GraphVersion {id: $id})
+            SET v.version = $version,
+                v.extraction_run = $extraction_run,
+                v.lineage_index = $lineage_index,
+                v.updated_at = datetime()
+            """,
+            {"id": GRAPH_VERSION_ID, "version": version, "extraction_run": PATH_EXTRACTION_RUNS, "lineage_index": lineage_index}
+        ).consume()
+    logg_print(logger, f"🏷️ Graph version {version}")
+    return version
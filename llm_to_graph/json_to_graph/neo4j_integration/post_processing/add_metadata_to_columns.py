@@ -1,42 +1,60 @@
+import time
+
 from json_to_graph.neo4j_integration.base_connector import driver
 from logger import logg_print
+from config import BULK_INSERT_BATCH_SIZE
 
-def add_metadata_to_columns(logger):
+def add_metadata_to_columns(logger, datamodel_names=None, column_names=None):
     """Add warehouse, schema, and object metadata to columns by traversing the HAS_COLUMN relationship in reverse.
     For each column, find the object node that has the column via the HAS_COLUMN relationship
     and add the warehouse, schema, and object properties to the column.
+    With `datamodel_names`/`column_names`, only the columns of those datamodels and those columns are updated.
+
+    The copy runs graph-side in one statement, committed in chunks of BULK_INSERT_BATCH_SIZE rows.
     """
-    
-    with driver.session() as session:
-        # Get all columns and their parent objects
-        result = session.run("""
+    start_time = time.time()
+
+    # Get all columns and their parent objects
+    if datamodel_names is None and column_names is None:
+        match_clause = """
         MATCH (obj)-[:HAS_COLUMN]->(col:Column)
-        RETURN col.name as column_name, obj.warehouse as warehouse, obj.schema as schema, obj.object as object, obj.type as object_type
-        """)
-        
-        for record in result:
-            column_name = record["column_name"]
-            warehouse = record["warehouse"]
-            schema = record["schema"]
-            object_name = record["object"]
-            object_type = record["object_type"]
-            
-            try:
-                # Update the column with warehouse, schema, and object information directly from parent object
-                session.run("""
-                MATCH (col:Column {name: $column_name})
-                SET col.warehouse = $warehouse,
-                    col.schema = $schema,
-                    col.object = $object,
-                    col.object_type = $object_type
-                """, {
-                    "column_name": column_name,
-                    "warehouse": warehouse,
-                    "schema": schema,
-                    "object": object_name,
-                    "object_type": object_type
-                })
-            except Exception as e:
-                logg_print(logger, f"❌ Error adding metadata to column {column_name}: {e}")
-    
-    logg_print(logger, "☑️ Finished adding metadata to columns")
\ No newline at end of file
+        """
+    else:
+        match_clause = """
+        CALL {
+            MATCH (obj:DataModel)-[:HAS_COLUMN]->(col:Column)
+            WHERE obj.name IN $datamodel_names
+            RETURN obj, col
+            UNION
+            MATCH (obj)-[:HAS_COLUMN]->(col:Column)
+            WHERE col.name IN $column_names
+            RETURN obj, col
+        }
+        """
+
+    try:
+        with driver.session() as session:
+            # CALL ... IN TRANSACTIONS needs an auto-commit transaction, hence session.run
+            result = session.run(
+                f"""
+                {match_clause}
+                CALL {{
+                    WITH obj, col
+                    SET col.warehouse = obj.warehouse,
+                        col.schema = obj.schema,
+                        col.object = obj.object,
+                        col.object_type = obj.type
+                }} IN TRANSACTIONS OF {int(BULK_INSERT_BATCH_SIZE)} ROWS
+                RETURN count(*) AS updated
+                """,
+                {
+                    "datamodel_names": list(datamodel_names or []),
+                    "column_names": list(column_names or [])
+                }
+            )
+            updated_count = result.single()["updated"]
+    except Exception as e:
+        logg_print(logger, f"❌ Error adding metadata to columns: {e}")
+        return
+
+    logg_print(logger, f"☑️ Finished adding metadata to {updated_count} columns in {time.time() - start_time:.2f}s")
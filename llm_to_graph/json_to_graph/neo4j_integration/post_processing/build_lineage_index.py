@@ -0,0 +1,172 @@
+import time
+from collections import Counter
+
+from json_to_graph.neo4j_integration.base_connector import driver, delete_in_batches
+from json_to_graph.lineage_index import build_lineage_index, condense
+from logger import logg_print
+from config import BULK_INSERT_BATCH_SIZE, LINEAGE_INDEX_MAX_INTERVALS, RESET_BATCH_SIZE
+
+# (graph, node match, relationship type)
+LINEAGE_GRAPHS = [
+    ("objects", "MATCH (n) WHERE n:DataModel OR n:StoredProcedure", "UPSTREAM_MODEL"),
+    ("columns", "MATCH (n:Column)", "UPSTREAM_COLUMN"),
+]
+
+
+def get_component_id(graph: str, component: int) -> str:
+    return f"{graph}:{component}"
+
+
+def get_edge_line_mode(source_is_procedure: bool, target_is_procedure: bool, has_reverse_edge: bool):
+    """
+    Stored procedures that read and write the same datamodel are drawn as one 'bi' edge,
+    other edges leaving a stored procedure are 'dash'. Returns (line_mode, drawn).
+    """
+    if (source_is_procedure or target_is_procedure) and has_reverse_edge:
+        # Only the edge starting at the stored procedure is drawn
+        return "bi", source_is_procedure
+    if source_is_procedure:
+        return "dash", True
+    return None, True
+
+
+def write_lineage_labels(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (n)
+        WHERE elementId(n) = row.id
+        SET n.lineage_component = row.component,
+            n.lineage_topo = row.topo,
+            n.lineage_rtopo = row.rtopo,
+            n.lineage_out = row.out_intervals,
+            n.lineage_in = row.in_intervals
+        """,
+        {"rows": rows}
+    ).consume()
+
+
+def write_line_modes(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH ()-[r]->()
+        WHERE elementId(r) = row.id
+        SET r.line_mode = row.line_mode,
+            r.drawn = row.drawn
+        """,
+        {"rows": rows}
+    ).consume()
+
+
+def write_components(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        CREATE (:LineageComponent {id: row.id, graph: row.graph, component: row.component, size: row.size})
+        """,
+        {"rows": rows}
+    ).consume()
+
+
+def write_component_edges(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (source:LineageComponent {id: row.source})
+        MATCH (target:LineageComponent {id: row.target})
+        CREATE (source)-[:UPSTREAM_COMPONENT]->(target)
+        """,
+        {"rows": rows}
+    ).consume()
+
+
+def write_in_batches(session, write, rows):
+    for batch_start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+        session.execute_write(write, rows[batch_start:batch_start + BULK_INSERT_BATCH_SIZE])
+
+
+def delete_components(session, graph: str):
+    delete_in_batches(
+        session,
+        "MATCH (c:LineageComponent {graph: $graph}) RETURN count(c) AS total",
+        """
+        MATCH (c:LineageComponent {graph: $graph})
+        WITH c LIMIT $batch_size
+        DETACH DELETE c
+        RETURN count(*) AS deleted
+        """,
+        {"graph": graph, "batch_size": RESET_BATCH_SIZE},
+        f"Deleting {graph} lineage components"
+    )
+
+
+def index_lineage_graph(session, logger, graph: str, node_match: str, relationship: str):
+    start_time = time.time()
+    nodes = session.run(f"{node_match} RETURN elementId(n) AS id, n:StoredProcedure AS is_procedure").data()
+    positions = {node["id"]: index for index, node in enumerate(nodes)}
+    relationships = [
+        (record["id"], positions[record["source"]], positions[record["target"]])
+        for record in session.run(
+            f"MATCH (s)-[r:{relationship}]->(t) RETURN elementId(r) AS id, elementId(s) AS source, elementId(t) AS target"
+        )
+        if record["source"] in positions and record["target"] in positions
+    ]
+    edges = [(source, target) for _, source, target in relationships]
+
+    labels, component_count, overflowed = build_lineage_index(len(nodes), edges, LINEAGE_INDEX_MAX_INTERVALS)
+    write_in_batches(session, write_lineage_labels, [{"id": node["id"], **label} for node, label in zip(nodes, labels)])
+
+    # The condensed DAG: one LineageComponent per strongly connected component
+    component = [label["component"] for label in labels]
+    sizes = Counter(component)
+    component_edges = condense(len(nodes), edges, component)
+    delete_components(session, graph)
+    write_in_batches(session, write_components, [
+        {"id": get_component_id(graph, index), "graph": graph, "component": index, "size": sizes[index]}
+        for index in range(component_count)
+    ])
+    write_in_batches(session, write_component_edges, [
+        {"source": get_component_id(graph, source), "target": get_component_id(graph, target)}
+        for source, target in component_edges
+    ])
+
+    # Only the object lineage has stored procedures, the backend reads line_mode from here
+    if any(node["is_procedure"] for node in nodes):
+        edge_set = set(edges)
+        line_mode_rows = []
+        for relationship_id, source, target in relationships:
+            line_mode, drawn = get_edge_line_mode(
+                nodes[source]["is_procedure"], nodes[target]["is_procedure"], (target, source) in edge_set
+            )
+            line_mode_rows.append({"id": relationship_id, "line_mode": line_mode, "drawn": drawn})
+        write_in_batches(session, write_line_modes, line_mode_rows)
+
+    interval_count = sum(len(label["out_intervals"] or []) + len(label["in_intervals"] or []) for label in labels) // 2
+    cyclic_count = sum(1 for size in sizes.values() if size > 1)
+    logg_print(logger, f"  - {graph}: {len(nodes)} nodes, {len(edges)} {relationship} edges, {component_count} components ({cyclic_count} cycles), {len(component_edges)} component edges, {interval_count} intervals, {overflowed} nodes without labels, {time.time() - start_time:.2f}s")
+
+
+def build_lineage_indexes(logger) -> bool:
+    """
+    Materializes the reachability index (json_to_graph.lineage_index) of the object and the
+    column lineage on every node: lineage_component, lineage_topo, lineage_rtopo and the
+    flat [low, high, ...] interval lists lineage_out and lineage_in.
+
+    The condensed DAG is stored as well: a (:LineageComponent {graph, component, size}) per
+    strongly connected component, connected by UPSTREAM_COMPONENT, and the frontend's
+    line_mode/drawn on every UPSTREAM_MODEL relationship.
+
+    Always rebuilt for the whole graph, since any new edge can move every position.
+    Returns whether the index is complete, the backend only uses it then.
+    """
+    try:
+        with driver.session() as session:
+            for graph, node_match, relationship in LINEAGE_GRAPHS:
+                index_lineage_graph(session, logger, graph, node_match, relationship)
+    except Exception as e:
+        logg_print(logger, f"❌ Error building the lineage index: {e}")
+        return False
+
+    logg_print(logger, "☑️ Lineage index built")
+    return True
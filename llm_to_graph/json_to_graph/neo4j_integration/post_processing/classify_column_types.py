@@ -1,7 +1,8 @@
 from json_to_graph.neo4j_integration.base_connector import driver
+from json_to_graph.neo4j_integration.post_processing.node_classification import classify_nodes
 from logger import logg_print
 
-def classify_column_types(logger):
+def classify_column_types(logger, column_names=None):
     """
     Classifies Column nodes in Neo4j as:
     - Root: columns with no upstream columns (no incoming UPSTREAM_COLUMN relationships)
@@ -9,56 +10,15 @@ def classify_column_types(logger):
     - Normal: columns that have both upstream and downstream columns
     
     This classification is set in a property called 'node_type' for each Column.
+    With `column_names`, only those columns are (re)classified.
+
+    The classification is computed in a single pass from the in/out degree of every node and
+    written in batches. Nodes without any UPSTREAM_COLUMN relationship are LEAF.
     """
     with driver.session() as session:
-        # Identify and mark root columns (columns with no upstream columns)
-        session.run(
-            """
-            MATCH (col:Column)
-            WHERE NOT EXISTS { MATCH (col)<-[:UPSTREAM_COLUMN]-() }
-            SET col.node_type = "ROOT"
-            RETURN count(col) as root_count
-            """
-        )
-
-        # Identify and mark leaf columns (columns with no downstream columns)
-        session.run(
-            """
-            MATCH (col:Column)
-            WHERE NOT EXISTS { MATCH (col)-[:UPSTREAM_COLUMN]->() }
-            SET col.node_type = "LEAF"
-            RETURN count(col) as leaf_count
-            """
-        )
-
-        # Mark all remaining columns as normal (have both upstream and downstream)
-        session.run(
-            """
-            MATCH (col:Column)
-            WHERE 
-              EXISTS { MATCH (col)<-[:UPSTREAM_COLUMN]-() } AND
-              EXISTS { MATCH (col)-[:UPSTREAM_COLUMN]->() }
-            SET col.node_type = "NORMAL"
-            RETURN count(col) as normal_count
-            """
-        )
+        stats, elapsed = classify_nodes(session, "Column", "UPSTREAM_COLUMN", column_names)
 
-        # Get statistics for each column type
-        result = session.run(
-            """
-            MATCH (col:Column)
-            RETURN 
-              col.node_type as node_type, 
-              count(col) as count
-            ORDER BY node_type
-            """
-        )
-        
-        stats = {}
-        for record in result:
-            node_type = record["node_type"] if record["node_type"] else "UNCLASSIFIED"
-            stats[node_type] = record["count"]
-        
-        logg_print(logger, f"☑️ Column classification complete:")
-        for node_type, count in stats.items():
-            logg_print(logger, f"  - {node_type}: {count} columns")
+    scope = "" if column_names is None else f" (reclassified {sum(stats.values())} touched columns)"
+    logg_print(logger, f"☑️ Column classification complete{scope} in {elapsed:.2f}s:")
+    for node_type, count in sorted(stats.items()):
+        logg_print(logger, f"  - {node_type}: {count} columns")
@@ -1,17 +1,71 @@
+import time
+from typing import Optional
+
 from json_to_graph.neo4j_integration.base_connector import driver
-from json_to_graph.split_warehouse_schema_object import split_warehouse_schema_object, get_id_name
+from json_to_graph.id_resolver import resolve_id_name
 from logger import logg_print
+from config import BULK_INSERT_BATCH_SIZE
+
+def get_column_datamodel_name(column_name: str) -> Optional[str]:
+    """Returns the id name of the datamodel a column name belongs to, None if it has too few parts."""
+    # Extract the last part as the actual column name
+    parts = column_name.split('.')
+    if len(parts) < 3:
+        # Not enough parts to determine datamodel
+        return None
+
+    # Use our existing function to extract the datamodel parts
+    # Column name follows format WAREHOUSE.SCHEMA.TABLE.COLUMN
+    # So to get datamodel, we join all but the last part
+    datamodel_name_parts = '.'.join(parts[:-1])
+
+    # Get the standardized datamodel name
+    return resolve_id_name(datamodel_name_parts)
+
 
-def connect_orphaned_columns(logger):
+def connect_columns(tx, rows) -> int:
+    result = tx.run(
+        """
+        UNWIND $rows AS row
+        // Find the datamodel and orphaned column
+        MATCH (d:DataModel {name: row.datamodel_name})
+        MATCH (c:Column {name: row.column_name})
+        WHERE NOT ()-[:HAS_COLUMN]->(c)
+        
+        // Connect them and update properties
+        MERGE (d)-[:HAS_COLUMN]->(c)
+        
+        // Update properties to match columns created through insert_column
+        // LEAVE original_name INTACT
+        SET c.datamodel_name = d.name,
+            c.original_datamodel_name = d.original_name,
+            c.is_type_guessed = COALESCE(c.is_type_guessed, true),
+            c.is_type_updated = COALESCE(c.is_type_updated, false)
+        
+        RETURN count(c) as connected
+        """,
+        {"rows": rows}
+    )
+    return result.single()["connected"]
+
+
+def connect_orphaned_columns(logger, datamodel_names=None, column_names=None):
     """
     Post-processing step to connect orphaned columns to their respective data models.
     
     This function identifies column nodes that don't have an incoming HAS_COLUMN relationship
     (orphaned columns) and connects them to the appropriate DataModel nodes.
     
-    It uses the existing split_warehouse_schema_object function to extract datamodel components
+    It uses the memoized id resolver (json_to_graph.id_resolver) to extract datamodel components
     from column names rather than doing this parsing in Cypher.
+
+    With `datamodel_names`/`column_names`, only orphaned columns that are in `column_names`
+    or belong to a datamodel in `datamodel_names` are connected.
+
+    The datamodel of every orphan is resolved in Python and the connections are written in
+    UNWIND batches of BULK_INSERT_BATCH_SIZE rows.
     """
+    start_time = time.time()
     try:
         # Use a single session for the entire operation
         with driver.session() as session:
@@ -35,57 +89,25 @@ def connect_orphaned_columns(logger):
                 logg_print(logger, f"☑️ Found {total_columns} total Column nodes, 0 orphaned columns to connect")
                 return
                 
-            connected_count = 0
-                
-            # Step 2: Process each orphaned column using Python logic
+            # Step 2: Resolve the datamodel of each orphaned column using Python logic
+            rows = []
             for column_name in orphaned_columns:
-                # Extract the last part as the actual column name
-                parts = column_name.split('.')
-                if len(parts) < 3:
-                    # Not enough parts to determine datamodel
+                datamodel_name = get_column_datamodel_name(column_name)
+                if datamodel_name is None:
                     continue
-                    
-                # The last part is the column name
-                actual_column_name = parts[-1]
-                
-                # Use our existing function to extract the datamodel parts
-                # Column name follows format WAREHOUSE.SCHEMA.TABLE.COLUMN
-                # So to get datamodel, we join all but the last part
-                datamodel_name_parts = '.'.join(parts[:-1])
-                
-                # Get the standardized datamodel name
-                warehouse, schema, object_name = split_warehouse_schema_object(datamodel_name_parts)
-                datamodel_name = get_id_name(warehouse, schema, object_name)
-                
-                # Now connect the column to its datamodel (using the same session)
-                result = session.run(
-                    """
-                    // Find the datamodel and orphaned column
-                    MATCH (d:DataModel {name: $datamodel_name})
-                    MATCH (c:Column {name: $column_name})
-                    WHERE NOT ()-[:HAS_COLUMN]->(c)
-                    
-                    // Connect them and update properties
-                    MERGE (d)-[:HAS_COLUMN]->(c)
-                    
-                    // Update properties to match columns created through insert_column
-                    // LEAVE original_name INTACT
-                    SET c.datamodel_name = d.name,
-                        c.original_datamodel_name = d.original_name,
-                        c.is_type_guessed = COALESCE(c.is_type_guessed, true),
-                        c.is_type_updated = COALESCE(c.is_type_updated, false)
-                    
-                    RETURN count(c) as connected
-                    """,
-                    {"datamodel_name": datamodel_name, "column_name": column_name}
-                )
-                
-                record = result.single()
-                if record and record["connected"] > 0:
-                    connected_count += 1
+
+                if datamodel_names is not None and datamodel_name not in datamodel_names and column_name not in (column_names or ()):
+                    continue
+                rows.append({"datamodel_name": datamodel_name, "column_name": column_name})
+
+            # Step 3: Connect them in UNWIND batches
+            connected_count = 0
+            for batch_start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+                batch = rows[batch_start:batch_start + BULK_INSERT_BATCH_SIZE]
+                connected_count += session.execute_write(connect_columns, batch)
             
             # Print the single line summary
-            logg_print(logger, f"☑️ Found {total_columns} total Column nodes, successfully connected {connected_count} orphaned columns")
+            logg_print(logger, f"☑️ Found {total_columns} total Column nodes, successfully connected {connected_count} of {len(rows)} orphaned columns in {time.time() - start_time:.2f}s")
                 
     except Exception as e:
         logg_print(logger, f"❌ Error connecting orphaned columns: {e}")
@@ -1,77 +1,148 @@
+import time
+
 from json_to_graph.neo4j_integration.base_connector import driver
+from json_to_graph.type_propagation import build_adjacency, propagate_types
 from logger import logg_print
+from config import BULK_INSERT_BATCH_SIZE
 
-def propagate_column_types(logger):
-    visited = set()
-    queue = []
+def reset_propagated_types(session, column_names) -> list:
+    """Clears the types that were propagated into or downstream of the given columns.
 
-    # Step 1: Initialize queue with all columns that have a type
-    with driver.session() as session:
+    Returns the names of the reset columns, they are typed again by the scoped propagation.
+    """
+    result = session.run(
+        """
+        MATCH (c:Column)
+        WHERE c.name IN $names
+        MATCH (c)-[:UPSTREAM_COLUMN*0..]->(d:Column)
+        WHERE d.is_type_updated = true
+        WITH DISTINCT d
+        SET d.type = null,
+            d.is_type_updated = false
+        RETURN d.name AS name
+        """,
+        {"names": list(column_names)}
+    )
+    return [record["name"] for record in result]
+
+
+def load_columns(session, column_names=None):
+    """Returns (column element ids, their types, seed positions) of the columns to propagate over.
+
+    Without `column_names` these are all columns and every typed column is a seed. With
+    `column_names`, the seeds are the typed columns in, or directly upstream of, the
+    neighbourhood and only the columns reachable from them are loaded.
+    """
+    if column_names is None:
         result = session.run(
             """
             MATCH (c:Column)
-            WHERE c.type IS NOT NULL
-            RETURN c.name AS name, c.type AS type
+            RETURN elementId(c) AS id, c.type AS type
+            """
+        )
+        records = [(record["id"], record["type"]) for record in result]
+        ids = [column_id for column_id, _ in records]
+        types = [column_type for _, column_type in records]
+        seeds = [index for index, column_type in enumerate(types) if column_type is not None]
+        return ids, types, seeds
+
+    names = set(column_names) | set(reset_propagated_types(session, column_names))
+    result = session.run(
+        """
+        MATCH (c:Column)
+        WHERE c.name IN $names AND c.type IS NOT NULL
+        RETURN elementId(c) AS id
+        UNION
+        MATCH (c:Column)-[:UPSTREAM_COLUMN]->(d:Column)
+        WHERE d.name IN $names AND c.type IS NOT NULL
+        RETURN elementId(c) AS id
+        """,
+        {"names": list(names)}
+    )
+    seed_ids = [record["id"] for record in result]
+
+    result = session.run(
+        """
+        MATCH (s:Column)
+        WHERE elementId(s) IN $seed_ids
+        MATCH (s)-[:UPSTREAM_COLUMN*0..]->(c:Column)
+        RETURN DISTINCT elementId(c) AS id, c.type AS type
+        """,
+        {"seed_ids": seed_ids}
+    )
+    records = [(record["id"], record["type"]) for record in result]
+    ids = [column_id for column_id, _ in records]
+    types = [column_type for _, column_type in records]
+    positions = {column_id: index for index, column_id in enumerate(ids)}
+    seeds = [positions[seed_id] for seed_id in seed_ids if seed_id in positions]
+    return ids, types, seeds
+
+
+def load_column_edges(session, ids, positions, scoped: bool):
+    if not scoped:
+        result = session.run(
+            """
+            MATCH (s:Column)-[:UPSTREAM_COLUMN]->(t:Column)
+            RETURN elementId(s) AS source, elementId(t) AS target
             """
         )
+    else:
+        result = session.run(
+            """
+            UNWIND $ids AS id
+            MATCH (s:Column)-[:UPSTREAM_COLUMN]->(t:Column)
+            WHERE elementId(s) = id
+            RETURN elementId(s) AS source, elementId(t) AS target
+            """,
+            {"ids": ids}
+        )
+    return [
+        (positions[record["source"]], positions[record["target"]])
+        for record in result
+        if record["source"] in positions and record["target"] in positions
+    ]
+
+
+def write_propagated_types(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (c:Column)
+        WHERE elementId(c) = row.id
+        SET c.type = row.type,
+            c.is_type_guessed = true,
+            c.is_type_updated = true
+        """,
+        {"rows": rows}
+    ).consume()
+
+
+def propagate_column_types(logger, column_names=None):
+    """Propagates column types along UPSTREAM_COLUMN edges to columns without a type.
+
+    The adjacency is loaded once and the propagation runs in memory (see
+    json_to_graph.type_propagation), the new types are written back in UNWIND batches.
+
+    With `column_names`, only the neighbourhood of those columns is re-propagated: previously
+    propagated types downstream of them are cleared and propagation starts from the typed
+    columns in, or directly upstream of, that neighbourhood.
+    """
+    start_time = time.time()
+
+    with driver.session() as session:
+        ids, types, seeds = load_columns(session, column_names)
+        positions = {column_id: index for index, column_id in enumerate(ids)}
+        edges = load_column_edges(session, ids, positions, scoped=column_names is not None)
+
+        offsets, targets = build_adjacency(len(ids), edges)
+        updates = propagate_types(types, offsets, targets, seeds)
+
+        rows = [{"id": ids[index], "type": column_type} for index, column_type in updates]
+        for batch_start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            batch = rows[batch_start:batch_start + BULK_INSERT_BATCH_SIZE]
+            try:
+                session.execute_write(write_propagated_types, batch)
+            except Exception as e:
+                logg_print(logger, f"❌ Error writing propagated column types: {e}")
 
-        queue = [{"name": record["name"], "type": record["type"]} for record in result]
-
-    # Step 2: BFS-like propagation of types
-    while queue:
-        current = queue.pop(0)
-        current_name = current["name"]
-        current_type = current["type"]
-
-        if current_name in visited:
-            continue
-        visited.add(current_name)
-
-        with driver.session() as session:
-            # Find upstream columns that don't have a type
-            result = session.run(
-                """
-                MATCH (start:Column {name: $current_name})
-                MATCH path = (start)-[:UPSTREAM_COLUMN]->(upstream)
-                WHERE upstream.type is null
-                RETURN upstream.name AS name         
-                """, 
-                {
-                    "current_name": current_name
-                }
-            )
-
-            upstream_columns = [record["name"] for record in result]
-
-            # Update upstream column types and add them to queue
-            for upstream_name in upstream_columns:
-                try:
-                    session.run(
-                        """
-                        MATCH (c:Column {name: $name})
-                        SET c.type = $type,
-                            c.is_type_guessed = true,
-                            c.is_type_updated = true
-                        """, 
-                        {
-                            "name": upstream_name, 
-                            "type": current_type
-                        }
-                    )
-                    queue.append({"name": upstream_name, "type": current_type})
-                except Exception as e:
-                    # If there's an error, mark the column as not updated
-                    try:
-                        session.run(
-                            """
-                            MATCH (c:Column {name: $name})
-                            SET c.is_type_updated = false
-                            """, 
-                            {
-                                "name": upstream_name
-                            }
-                        )
-                    except Exception:
-                        # If even setting the error flag fails, just continue
-                        pass
-    logg_print(logger, "☑️ Propagated column types")
\ No newline at end of file
+    logg_print(logger, f"☑️ Propagated column types: {len(rows)} of {len(ids)} columns typed over {len(edges)} edges in {time.time() - start_time:.2f}s")
@@ -0,0 +1,176 @@
+"""
+Schema of the lineage graph: uniqueness constraints and supporting indexes.
+
+ensure_schema runs before anything is loaded, so every `MERGE (... {name: ...})` of the
+inserters, the bulk writer and post-processing is an index seek instead of a label scan.
+Plain `name` indexes created by older versions are dropped first, because Neo4j does not
+allow a uniqueness constraint next to an index on the same label and property.
+
+Run `python -m json_to_graph.neo4j_integration.schema` from llm_to_graph to only create the
+schema, without resetting or loading anything, e.g. after a neo4j-admin CSV import.
+"""
+import time
+from typing import Dict, Optional
+
+from json_to_graph.neo4j_integration.base_connector import driver
+from logger import logg_print
+from config import SCHEMA_AWAIT_TIMEOUT_SECONDS, SCHEMA_BENCHMARK_SAMPLE_SIZE
+
+# (constraint name, label), on the `name` property
+UNIQUE_NAME_CONSTRAINTS = [
+    ("datamodel_name_unique", "DataModel"),
+    ("stored_procedure_name_unique", "StoredProcedure"),
+    ("column_name_unique", "Column"),
+]
+
+# (index name, label, properties)
+INDEXES = [
+    ("column_datamodel_name", "Column", ["datamodel_name"]),
+    ("datamodel_warehouse_schema", "DataModel", ["warehouse", "schema"]),
+    ("stored_procedure_warehouse_schema", "StoredProcedure", ["warehouse", "schema"]),
+    ("column_warehouse_schema", "Column", ["warehouse", "schema"]),
+    ("datamodel_extraction_run", "DataModel", ["extraction_run"]),
+    ("stored_procedure_extraction_run", "StoredProcedure", ["extraction_run"]),
+    ("column_extraction_run", "Column", ["extraction_run"]),
+    ("datamodel_lineage_topo", "DataModel", ["lineage_topo"]),
+    ("datamodel_lineage_rtopo", "DataModel", ["lineage_rtopo"]),
+    ("stored_procedure_lineage_topo", "StoredProcedure", ["lineage_topo"]),
+    ("stored_procedure_lineage_rtopo", "StoredProcedure", ["lineage_rtopo"]),
+    ("column_lineage_topo", "Column", ["lineage_topo"]),
+    ("column_lineage_rtopo", "Column", ["lineage_rtopo"]),
+    ("datamodel_lineage_component", "DataModel", ["lineage_component"]),
+    ("stored_procedure_lineage_component", "StoredProcedure", ["lineage_component"]),
+    ("column_lineage_component", "Column", ["lineage_component"]),
+    ("lineage_component_id", "LineageComponent", ["id"]),
+    ("lineage_component_graph_component", "LineageComponent", ["graph", "component"]),
+]
+
+
+def get_existing_schema(session):
+    constraints = session.run(
+        "SHOW CONSTRAINTS YIELD name, type, labelsOrTypes, properties"
+    ).data()
+    indexes = session.run(
+        "SHOW INDEXES YIELD name, type, labelsOrTypes, properties, owningConstraint"
+    ).data()
+    return constraints, indexes
+
+
+def has_unique_name_constraint(constraints, label: str) -> bool:
+    return any(
+        ("UNIQUENESS" in constraint["type"] or constraint["type"] == "NODE_KEY")
+        and constraint["labelsOrTypes"] == [label]
+        and constraint["properties"] == ["name"]
+        for constraint in constraints
+    )
+
+
+def drop_conflicting_name_indexes(session, indexes, logger):
+    """Drops plain indexes on `name` of the constrained labels, they would block the constraints."""
+    constrained_labels = {label for _, label in UNIQUE_NAME_CONSTRAINTS}
+    for index in indexes:
+        if (
+            index["owningConstraint"] is None
+            and index["type"] == "RANGE"
+            and index["properties"] == ["name"]
+            and index["labelsOrTypes"]
+            and index["labelsOrTypes"][0] in constrained_labels
+        ):
+            session.run(f"DROP INDEX `{index['name']}` IF EXISTS")
+            logg_print(logger, f"🧹 Dropped index {index['name']} on :{index['labelsOrTypes'][0]}(name), replaced by a uniqueness constraint")
+
+
+def create_schema(session, logger):
+    constraints, indexes = get_existing_schema(session)
+    missing_constraints = [
+        (constraint_name, label) for constraint_name, label in UNIQUE_NAME_CONSTRAINTS
+        if not has_unique_name_constraint(constraints, label)
+    ]
+    if missing_constraints:
+        drop_conflicting_name_indexes(session, indexes, logger)
+
+    for constraint_name, label in missing_constraints:
+        try:
+            session.run(f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.name IS UNIQUE").consume()
+            logg_print(logger, f"🔑 Created uniqueness constraint on :{label}(name)")
+        except Exception as e:
+            # Duplicate names from an older load, keep a plain index so lookups stay fast
+            logger.error(f"Failed creating the uniqueness constraint on :{label}(name), reset the database to remove duplicates: {e}")
+            session.run(f"CREATE INDEX {constraint_name.replace('_unique', '')} IF NOT EXISTS FOR (n:{label}) ON (n.name)").consume()
+
+    existing_index_names = {index["name"] for index in indexes}
+    for index_name, label, properties in INDEXES:
+        if index_name in existing_index_names:
+            continue
+        property_list = ", ".join(f"n.{property}" for property in properties)
+        session.run(f"CREATE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON ({property_list})").consume()
+        logg_print(logger, f"🗂️ Created index on :{label}({', '.join(properties)})")
+
+    session.run("CALL db.awaitIndexes($timeout)", {"timeout": SCHEMA_AWAIT_TIMEOUT_SECONDS}).consume()
+
+
+def merge_existing_names(tx, label: str, names) -> int:
+    # Every name exists already, so MERGE only measures the lookup
+    result = tx.run(
+        f"""
+        UNWIND $names AS name
+        MERGE (n:{label} {{name: name}})
+        RETURN count(n) AS count
+        """,
+        {"names": names}
+    )
+    return result.single()["count"]
+
+
+def measure_merge_throughput(session, sample_size: int = SCHEMA_BENCHMARK_SAMPLE_SIZE) -> Optional[Dict[str, float]]:
+    """Returns MERGE lookups per second by label on existing names, or None when the graph is empty."""
+    throughput = {}
+    for _, label in UNIQUE_NAME_CONSTRAINTS:
+        names = [
+            record["name"] for record in session.run(
+                f"MATCH (n:{label}) WHERE n.name IS NOT NULL RETURN n.name AS name LIMIT $limit",
+                {"limit": sample_size}
+            )
+        ]
+        if not names:
+            continue
+        start_time = time.time()
+        session.execute_write(merge_existing_names, label, names)
+        throughput[label] = len(names) / max(time.time() - start_time, 1e-6)
+    return throughput or None
+
+
+def log_merge_throughput(logger, moment: str, throughput: Optional[Dict[str, float]]):
+    if throughput is None:
+        return
+    summary = ", ".join(f"{label}: {rows_per_second:.0f}/s" for label, rows_per_second in throughput.items())
+    logg_print(logger, f"⏱️ MERGE lookups {moment} schema setup: {summary}")
+
+
+def ensure_schema(logger, reset_follows: bool = False):
+    """
+    Creates the uniqueness constraints on `name` and the supporting indexes if they are missing,
+    and waits until all indexes are online. Meant to run before loading, on an empty or existing graph.
+
+    With SCHEMA_BENCHMARK_SAMPLE_SIZE > 0 and a non empty graph, the MERGE lookup throughput is
+    reported before and after the schema is created. It is skipped when `reset_follows`, since the
+    measured graph is about to be deleted.
+    """
+    start_time = time.time()
+    with driver.session() as session:
+        benchmark = SCHEMA_BENCHMARK_SAMPLE_SIZE > 0 and not reset_follows
+        if benchmark:
+            log_merge_throughput(logger, "before", measure_merge_throughput(session))
+
+        create_schema(session, logger)
+
+        if benchmark:
+            log_merge_throughput(logger, "after", measure_merge_throughput(session))
+
+    logg_print(logger, f"☑️ Graph schema ready in {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    from logger import get_logger
+
+    ensure_schema(get_logger())
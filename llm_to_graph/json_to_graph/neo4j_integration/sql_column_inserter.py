@@ -1,5 +1,6 @@
 from data_models import Column
-from json_to_graph.split_warehouse_schema_object import split_warehouse_schema_object, get_id_name
+from json_to_graph.id_resolver import resolve_id_name, resolve_column_id_name
+from config import PATH_EXTRACTION_RUNS
 
 
 def get_transformations(column: Column):
@@ -15,9 +16,8 @@ def get_transformations(column: Column):
 
 
 def insert_column(session, column: Column, datamodel_name: str):
-    warehouse, schema, object = split_warehouse_schema_object(datamodel_name)
-    datamodel_id_name = get_id_name(warehouse, schema, object)
-    column_id_name = f"{datamodel_id_name}.{column.name.upper()}"
+    datamodel_id_name = resolve_id_name(datamodel_name)
+    column_id_name = resolve_column_id_name(datamodel_name, column.name)
 
     transformations = get_transformations(column)
 
@@ -33,7 +33,8 @@ def insert_column(session, column: Column, datamodel_name: str):
             t.is_type_guessed = false,
             t.is_type_updated = false,
             t.datamodel_name = $datamodel_name,
-            t.transformations = $transformations
+            t.transformations = $transformations,
+            t.extraction_run = $extraction_run
 
         MERGE (d)-[:HAS_COLUMN]->(t)
         """,
@@ -43,23 +44,20 @@ def insert_column(session, column: Column, datamodel_name: str):
             "column_name": column_id_name,
             "original_name": column.name,
             "type": column.type,
-            "transformations": transformations
+            "transformations": transformations,
+            "extraction_run": PATH_EXTRACTION_RUNS
         }
     )
         
 
 def insert_downstream_columns(session, column: Column, datamodel_name: str):
-    warehouse, schema, object = split_warehouse_schema_object(datamodel_name)
-    current_datamodel_id_name = get_id_name(warehouse, schema, object)
-    current_column_id_name = f"{current_datamodel_id_name}.{column.name.upper()}"
+    current_column_id_name = resolve_column_id_name(datamodel_name, column.name)
 
     if not column.downstream_columns:
         return
 
     for downstream_column in column.downstream_columns:
-        warehouse, schema, object = split_warehouse_schema_object(downstream_column.datamodel)
-        downstream_datamodel_id_name = get_id_name(warehouse, schema, object)
-        downstream_column_id_name = f"{downstream_datamodel_id_name}.{downstream_column.name.upper()}"
+        downstream_column_id_name = resolve_column_id_name(downstream_column.datamodel, downstream_column.name)
 
         # Use the provided session instead of creating a new one
         session.run(
@@ -67,13 +65,15 @@ def insert_downstream_columns(session, column: Column, datamodel_name: str):
             MATCH (d:Column {name: $current_column_name})
 
             MERGE (t:Column {name: $downstream_column_name})
-            SET t.original_name = $original_downstream_name
+            SET t.original_name = $original_downstream_name,
+                t.extraction_run = $extraction_run
 
             MERGE (t)-[:UPSTREAM_COLUMN]->(d)
             """,
             {
                 "current_column_name": current_column_id_name,
                 "downstream_column_name": downstream_column_id_name,
-                "original_downstream_name": downstream_column.name
+                "original_downstream_name": downstream_column.name,
+                "extraction_run": PATH_EXTRACTION_RUNS
             }
         )
\ No newline at end of file
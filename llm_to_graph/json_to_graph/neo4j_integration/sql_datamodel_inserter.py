@@ -1,16 +1,15 @@
 from data_models import DataModel
-from json_to_graph.split_warehouse_schema_object import split_warehouse_schema_object, get_id_name
+from json_to_graph.id_resolver import resolve_object, resolve_id_name
 from json_to_graph.neo4j_integration.sql_column_inserter import insert_column, insert_downstream_columns
 from json_to_graph.neo4j_integration.base_connector import driver
-from config import DEFAULT_WAREHOUSE, DO_SIMPLE_EXTRACT
+from config import DEFAULT_WAREHOUSE, DO_SIMPLE_EXTRACT, PATH_EXTRACTION_RUNS
 
 def insert_datamodel(session, full_object_name:str, datamodel_type:str): 
     datamodel_type = datamodel_type.lower()
     if datamodel_type not in ["table", "view"]:
         print(full_object_name, "yooo")
     
-    warehouse, schema, object = split_warehouse_schema_object(full_object_name)
-    id_name = get_id_name(warehouse, schema, object)
+    warehouse, schema, object, id_name = resolve_object(full_object_name)
     is_external = False if warehouse.upper() == DEFAULT_WAREHOUSE.upper() else True
 
     session.run(
@@ -21,7 +20,8 @@ def insert_datamodel(session, full_object_name:str, datamodel_type:str):
             o.schema = $schema,
             o.object = $object,
             o.type = $datamodel_type,
-            o.is_external = $is_external
+            o.is_external = $is_external,
+            o.extraction_run = $extraction_run
         """,
         {
             "name": id_name,
@@ -31,6 +31,7 @@ def insert_datamodel(session, full_object_name:str, datamodel_type:str):
             "object": object,
             "datamodel_type": datamodel_type,
             "is_external": is_external,
+            "extraction_run": PATH_EXTRACTION_RUNS,
         }
     )
 
@@ -40,12 +41,10 @@ def insert_downstream_datamodels(session, datamodel: DataModel):
     if not datamodel.downstream_models:
         return
     
-    warehouse, schema, object  = split_warehouse_schema_object(datamodel.name)
-    datamodel_id_name = get_id_name(warehouse, schema, object)
+    datamodel_id_name = resolve_id_name(datamodel.name)
 
     for downstream_model in datamodel.downstream_models:
-        warehouse, schema, object  = split_warehouse_schema_object(downstream_model)
-        downstream_model_id_name = get_id_name(warehouse, schema, object)
+        warehouse, schema, object, downstream_model_id_name = resolve_object(downstream_model)
         
         # Use the provided session parameter instead of creating a new one
         session.run(
@@ -57,7 +56,8 @@ def insert_downstream_datamodels(session, datamodel: DataModel):
                 t.original_name = $original_downstream_name,
                 t.warehouse = $warehouse,
                 t.schema = $schema,
-                t.object = $object
+                t.object = $object,
+                t.extraction_run = $extraction_run
 
             MERGE (t)-[:UPSTREAM_MODEL]->(d)
             """,
@@ -67,7 +67,8 @@ def insert_downstream_datamodels(session, datamodel: DataModel):
                 "original_downstream_name": downstream_model,
                 "warehouse": warehouse,
                 "schema": schema,
-                "object": object
+                "object": object,
+                "extraction_run": PATH_EXTRACTION_RUNS
             }
         )
 
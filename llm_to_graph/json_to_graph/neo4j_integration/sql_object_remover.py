@@ -0,0 +1,98 @@
+from typing import Dict
+
+from json_to_graph.neo4j_integration.base_connector import driver
+
+
+def delete_owned_edges(session, objects: Dict[str, set]):
+    edge_queries = {
+        "model_edges": "MATCH (s:DataModel {name: edge[0]})-[r:UPSTREAM_MODEL]->(t:DataModel {name: edge[1]})",
+        "procedure_read_edges": "MATCH (s:DataModel {name: edge[0]})-[r:UPSTREAM_MODEL]->(t:StoredProcedure {name: edge[1]})",
+        "procedure_write_edges": "MATCH (s:StoredProcedure {name: edge[0]})-[r:UPSTREAM_MODEL]->(t:DataModel {name: edge[1]})",
+        "has_column_edges": "MATCH (s:DataModel {name: edge[0]})-[r:HAS_COLUMN]->(t:Column {name: edge[1]})",
+        "column_edges": "MATCH (s:Column {name: edge[0]})-[r:UPSTREAM_COLUMN]->(t:Column {name: edge[1]})",
+    }
+    for key, match_clause in edge_queries.items():
+        edges = [list(edge) for edge in objects[key]]
+        if not edges:
+            continue
+        session.run(
+            f"""
+            UNWIND $edges AS edge
+            {match_clause}
+            DELETE r
+            """,
+            {"edges": edges}
+        )
+
+
+def strip_undefined_columns(session, column_names):
+    if not column_names:
+        return
+    # Columns that are still referenced go back to what insert_downstream_columns creates,
+    # post-processing fills in the rest again
+    session.run(
+        """
+        UNWIND $names AS name
+        MATCH (c:Column {name: name})
+        REMOVE c.type, c.is_type_guessed, c.is_type_updated, c.transformations,
+               c.datamodel_name, c.original_datamodel_name,
+               c.warehouse, c.schema, c.object, c.object_type, c.node_type
+        """,
+        {"names": list(column_names)}
+    )
+
+
+def strip_undefined_datamodels(session, datamodel_names):
+    if not datamodel_names:
+        return
+    session.run(
+        """
+        UNWIND $names AS name
+        MATCH (d:DataModel {name: name})
+        REMOVE d.type, d.node_type
+        """,
+        {"names": list(datamodel_names)}
+    )
+
+
+def delete_unconnected_nodes(session, label: str, names, relationship_check: str) -> int:
+    if not names:
+        return 0
+    result = session.run(
+        f"""
+        UNWIND $names AS name
+        MATCH (n:{label} {{name: name}})
+        WHERE {relationship_check}
+        DETACH DELETE n
+        RETURN count(n) AS deleted
+        """,
+        {"names": list(names)}
+    )
+    return result.single()["deleted"]
+
+
+def remove_owned_objects(objects: Dict[str, set]) -> int:
+    """Removes graph objects that no SQL file owns anymore.
+
+    `objects` must only contain what is not owned by any remaining file. Owned edges are deleted,
+    defined nodes are stripped back to reference nodes, and nodes that have no lineage
+    relationships left are deleted. Returns the number of deleted nodes.
+    """
+    with driver.session() as session:
+        delete_owned_edges(session, objects)
+        strip_undefined_columns(session, objects["columns"])
+        strip_undefined_datamodels(session, objects["datamodels"])
+
+        deleted_count = delete_unconnected_nodes(
+            session, "Column", objects["columns"] | objects["referenced_columns"],
+            "NOT (n)-[:UPSTREAM_COLUMN]-()"
+        )
+        deleted_count += delete_unconnected_nodes(
+            session, "DataModel", objects["datamodels"] | objects["referenced_datamodels"],
+            "NOT (n)-[:UPSTREAM_MODEL]-() AND NOT (n)-[:HAS_COLUMN]->()"
+        )
+        deleted_count += delete_unconnected_nodes(
+            session, "StoredProcedure", objects["stored_procedures"],
+            "NOT (n)-[:UPSTREAM_MODEL]-()"
+        )
+    return deleted_count
@@ -1,13 +1,12 @@
 from typing import List
 from data_models import StoredProcedure
-from json_to_graph.split_warehouse_schema_object import split_warehouse_schema_object, get_id_name
+from json_to_graph.id_resolver import resolve_object, resolve_id_name
 from json_to_graph.neo4j_integration.base_connector import driver
 
-from config import DEFAULT_WAREHOUSE
+from config import DEFAULT_WAREHOUSE, PATH_EXTRACTION_RUNS
 
 def insert_stored_procedure(session, stored_procedure: StoredProcedure):
-    warehouse, schema, object  = split_warehouse_schema_object(stored_procedure.name)
-    id_name = get_id_name(warehouse, schema, object)
+    warehouse, schema, object, id_name = resolve_object(stored_procedure.name)
 
     # Insert the stored procedure node
     session.run(
@@ -18,29 +17,29 @@ def insert_stored_procedure(session, stored_procedure: StoredProcedure):
             p.schema = $schema,
             p.object = $object,
             p.node_type = 'StoredProcedure',
-            p.type = 'StoredProcedure'
+            p.type = 'StoredProcedure',
+            p.extraction_run = $extraction_run
         """,
         {
             "name": id_name,
             "original_name": stored_procedure.name,
             "warehouse": warehouse,
             "schema": schema,
-            "object": object
+            "object": object,
+            "extraction_run": PATH_EXTRACTION_RUNS
         }
     )
 
 
 # Process source objects (UPSTREAM_STORED_PROCEDURE)
 def insert_datamodel_reads_from(session, stored_procedure_name:str, source_objects: List[str]):
-    warehouse, schema, object  = split_warehouse_schema_object(stored_procedure_name)
-    procedure_id_name = get_id_name(warehouse, schema, object)
+    procedure_id_name = resolve_id_name(stored_procedure_name)
 
     for source_object in source_objects:
         full_object_name = source_object
         insert_sp_adjacent_datamodel(session, full_object_name)
 
-        warehouse, schema, object  = split_warehouse_schema_object(full_object_name)
-        reads_from_id_name = get_id_name(warehouse, schema, object)
+        reads_from_id_name = resolve_id_name(full_object_name)
 
         # Create the UPSTREAM_STORED_PROCEDURE relationship
         session.run(
@@ -57,15 +56,13 @@ def insert_datamodel_reads_from(session, stored_procedure_name:str, source_objec
             
 
 def insert_datamodel_writes_to(session, stored_procedure_name: str, target_objects: List[str]):
-    warehouse, schema, object  = split_warehouse_schema_object(stored_procedure_name)
-    procedure_id_name = get_id_name(warehouse, schema, object)
+    procedure_id_name = resolve_id_name(stored_procedure_name)
 
     for target_object in target_objects:
         full_object_name = target_object
         insert_sp_adjacent_datamodel(session, full_object_name)
 
-        warehouse, schema, object  = split_warehouse_schema_object(full_object_name)
-        writes_to_id_name = get_id_name(warehouse, schema, object)
+        writes_to_id_name = resolve_id_name(full_object_name)
 
         # Create the UPSTREAM_MODEL relationship
         session.run(
@@ -83,8 +80,7 @@ def insert_datamodel_writes_to(session, stored_procedure_name: str, target_objec
 
 def insert_sp_adjacent_datamodel(session, full_object_name:str): 
     
-    warehouse, schema, object = split_warehouse_schema_object(full_object_name)
-    id_name = get_id_name(warehouse, schema, object)
+    warehouse, schema, object, id_name = resolve_object(full_object_name)
     is_external = False if warehouse.upper() == DEFAULT_WAREHOUSE.upper() else True
 
     session.run(
@@ -94,7 +90,8 @@ def insert_sp_adjacent_datamodel(session, full_object_name:str):
             o.warehouse = $warehouse,
             o.schema = $schema,
             o.object = $object,
-            o.is_external = $is_external
+            o.is_external = $is_external,
+            o.extraction_run = $extraction_run
         """,
         {
             "name": id_name,
@@ -103,6 +100,7 @@ def insert_sp_adjacent_datamodel(session, full_object_name:str):
             "schema": schema,
             "object": object,
             "is_external": is_external,
+            "extraction_run": PATH_EXTRACTION_RUNS,
         }
     )
 
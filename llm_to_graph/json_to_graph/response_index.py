@@ -0,0 +1,50 @@
+"""
+Index of the latest extraction response per SQL file (or chunk part) of an extraction run.
+
+One os.walk over the run directory maps every `<base>.sql_response_<attempt>.json` to the
+highest numeric attempt of its base name, so `_10` is newer than `_2` and no directory is
+globbed more than once. Decoding the selected files can be spread over a thread pool.
+"""
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from config import JSON_LOAD_WORKERS
+
+RESPONSE_FILE_PATTERN = re.compile(r'^(.*)\.sql_response_(\d+)\.json$')
+
+
+def index_latest_responses(directory: str) -> List[str]:
+    """Returns the path of the highest attempt of every response base name, sorted."""
+    latest = {}
+    for dir_path, _, file_names in os.walk(os.path.abspath(directory)):
+        for file_name in file_names:
+            match = RESPONSE_FILE_PATTERN.match(file_name)
+            if not match:
+                continue
+            key = (dir_path, match.group(1))
+            attempt = int(match.group(2))
+            if key not in latest or attempt > latest[key][0]:
+                latest[key] = (attempt, os.path.join(dir_path, file_name))
+    return sorted(file_path for _, file_path in latest.values())
+
+
+def read_json_file(file_path: str) -> Tuple[str, Optional[dict], Optional[Exception]]:
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file_path, json.load(file), None
+    except Exception as e:
+        return file_path, None, e
+
+
+def load_json_responses(file_paths: List[str], workers: int = JSON_LOAD_WORKERS) -> Iterator[Tuple[str, Optional[dict], Optional[Exception]]]:
+    """Yields (file_path, json_data, error) in the order of `file_paths`."""
+    if workers <= 1:
+        for file_path in file_paths:
+            yield read_json_file(file_path)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(read_json_file, file_paths)
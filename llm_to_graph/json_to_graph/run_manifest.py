@@ -0,0 +1,230 @@
+"""
+Manifest of the SQL files that are loaded into the graph, used for incremental runs.
+
+For every SQL file the manifest records a hash of the SQL text, a hash of its extraction,
+the response files it was loaded from and the graph objects those responses produced.
+Comparing it with the current response files tells which SQL files were added, changed or
+removed since the last run, and which nodes and edges belong to them.
+
+The manifest is stored next to the extraction run folder (not inside it), so it is never
+picked up as a response file.
+"""
+import datetime
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from data_models import DataModel, StoredProcedure
+from json_to_graph.response_index import index_latest_responses, load_json_responses
+from json_to_graph.id_resolver import resolve_id_name, resolve_column_id_name
+from config import (
+    DEFAULT_EXTRACTION_DIR,
+    PATH_EXTRACTION_RUNS,
+    DEFAULT_WAREHOUSE,
+    WAREHOUSE_DEFAULT_SCHEMA_MAPPING,
+    DO_SIMPLE_EXTRACT
+)
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE_PATH = os.path.join(DEFAULT_EXTRACTION_DIR, f"{PATH_EXTRACTION_RUNS}.manifest.json")
+
+# Node names and edges a SQL file put into the graph.
+# Edges are [source, target] pairs following the direction of the relationship.
+OBJECT_KEYS = [
+    "datamodels",               # DataModel nodes defined by the file
+    "referenced_datamodels",    # DataModel nodes the file only points to
+    "stored_procedures",
+    "columns",                  # Column nodes defined by the file (with HAS_COLUMN)
+    "referenced_columns",
+    "model_edges",              # (:DataModel)-[:UPSTREAM_MODEL]->(:DataModel)
+    "procedure_read_edges",     # (:DataModel)-[:UPSTREAM_MODEL]->(:StoredProcedure)
+    "procedure_write_edges",    # (:StoredProcedure)-[:UPSTREAM_MODEL]->(:DataModel)
+    "has_column_edges",         # (:DataModel)-[:HAS_COLUMN]->(:Column)
+    "column_edges",             # (:Column)-[:UPSTREAM_COLUMN]->(:Column)
+]
+EDGE_KEYS = {"model_edges", "procedure_read_edges", "procedure_write_edges", "has_column_edges", "column_edges"}
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_sql_file(sql_file: str) -> Optional[str]:
+    try:
+        with open(sql_file, 'r', encoding='utf-8') as file:
+            return hash_text(file.read())
+    except OSError:
+        return None
+
+
+def get_settings() -> Dict:
+    """Configuration that changes how responses become graph objects, a change forces a full rebuild."""
+    return {
+        "default_warehouse": DEFAULT_WAREHOUSE,
+        "warehouse_default_schema_mapping": WAREHOUSE_DEFAULT_SCHEMA_MAPPING,
+        "do_simple_extract": DO_SIMPLE_EXTRACT,
+    }
+
+
+def new_objects() -> Dict[str, set]:
+    return {key: set() for key in OBJECT_KEYS}
+
+
+def add_owned_objects(objects: Dict[str, set], json_data: Dict):
+    """Adds the graph objects the inserters create for one response, using the same id names."""
+    data = json_data["data"]
+
+    if data["type"] == 'stored_procedure':
+        stored_procedure = StoredProcedure(**data)
+        procedure_id_name = resolve_id_name(stored_procedure.name)
+        objects["stored_procedures"].add(procedure_id_name)
+        for source_object in stored_procedure.source_objects:
+            source_id_name = resolve_id_name(source_object)
+            objects["referenced_datamodels"].add(source_id_name)
+            objects["procedure_read_edges"].add((source_id_name, procedure_id_name))
+        for target_object in stored_procedure.target_objects:
+            target_id_name = resolve_id_name(target_object)
+            objects["referenced_datamodels"].add(target_id_name)
+            objects["procedure_write_edges"].add((procedure_id_name, target_id_name))
+        return
+
+    if data["type"] not in ['table', 'view']:
+        return
+
+    datamodel = DataModel(**data)
+    datamodel_id_name = resolve_id_name(datamodel.name)
+    objects["datamodels"].add(datamodel_id_name)
+    for downstream_model in datamodel.downstream_models:
+        downstream_model_id_name = resolve_id_name(downstream_model)
+        objects["referenced_datamodels"].add(downstream_model_id_name)
+        objects["model_edges"].add((downstream_model_id_name, datamodel_id_name))
+
+    if DO_SIMPLE_EXTRACT:
+        return
+
+    for column in datamodel.columns:
+        column_id_name = resolve_column_id_name(datamodel.name, column.name)
+        objects["columns"].add(column_id_name)
+        objects["has_column_edges"].add((datamodel_id_name, column_id_name))
+        for downstream_column in column.downstream_columns or []:
+            downstream_column_id_name = resolve_column_id_name(downstream_column.datamodel, downstream_column.name)
+            objects["referenced_columns"].add(downstream_column_id_name)
+            objects["column_edges"].add((downstream_column_id_name, column_id_name))
+
+
+def serialize_objects(objects: Dict[str, set]) -> Dict[str, List]:
+    return {key: sorted([list(value) for value in values] if key in EDGE_KEYS else values) for key, values in objects.items()}
+
+
+def deserialize_objects(objects: Dict[str, List]) -> Dict[str, set]:
+    return {
+        key: {tuple(value) for value in objects.get(key, [])} if key in EDGE_KEYS else set(objects.get(key, []))
+        for key in OBJECT_KEYS
+    }
+
+
+def merge_objects(objects_list) -> Dict[str, set]:
+    merged = new_objects()
+    for objects in objects_list:
+        for key in OBJECT_KEYS:
+            merged[key] |= objects[key]
+    return merged
+
+
+def subtract_objects(objects: Dict[str, set], still_owned: Dict[str, set]) -> Dict[str, set]:
+    return {key: objects[key] - still_owned[key] for key in OBJECT_KEYS}
+
+
+def get_touched_names(objects: Dict[str, set]):
+    """Returns the (DataModel/StoredProcedure names, Column names) whose neighbourhood changes with these objects."""
+    model_names = objects["datamodels"] | objects["referenced_datamodels"] | objects["stored_procedures"]
+    column_names = objects["columns"] | objects["referenced_columns"]
+    return model_names, column_names
+
+
+def new_manifest_entry(sql_hash: Optional[str], file_responses: List) -> Dict:
+    """Builds the manifest entry of a SQL file from its (json_file, json_data) responses."""
+    return {
+        "sql_hash": sql_hash,
+        "extraction_hash": hash_text(json.dumps([json_data["data"] for _, json_data in file_responses], sort_keys=True)),
+        "json_files": [file_path for file_path, _ in file_responses],
+        "responses": [json_data for _, json_data in file_responses],
+    }
+
+
+def scan_extraction_run(directory: str, logger) -> Dict[str, Dict]:
+    """Groups the latest response files of an extraction run by the SQL file they were extracted from.
+
+    Responses of SQL files that no longer exist are left out, so their graph objects are removed.
+    """
+    responses = defaultdict(list)
+    for file_path, json_data, error in load_json_responses(index_latest_responses(directory)):
+        if error is not None:
+            logger.error(f"Failed reading: {file_path} ({error})")
+            continue
+        sql_file = json_data.get("metadata", {}).get("sql_file") or str(file_path)
+        responses[sql_file].append((file_path, json_data))
+
+    sql_hashes = {sql_file: hash_sql_file(sql_file) for sql_file in responses}
+    # If no source can be found at all we are most likely not running from the extraction directory
+    can_see_sources = any(sql_hash is not None for sql_hash in sql_hashes.values())
+
+    files = {}
+    for sql_file, file_responses in responses.items():
+        if sql_hashes[sql_file] is None and can_see_sources:
+            logger.info(f"Source removed, dropping its responses: {sql_file}")
+            continue
+        files[sql_file] = new_manifest_entry(sql_hashes[sql_file], file_responses)
+    return files
+
+
+def load_manifest() -> Optional[Dict]:
+    if not os.path.exists(MANIFEST_FILE_PATH):
+        return None
+    try:
+        with open(MANIFEST_FILE_PATH, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except Exception:
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(files: Dict[str, Dict]):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "settings": get_settings(),
+        "files": {
+            sql_file: {
+                "sql_hash": entry["sql_hash"],
+                "extraction_hash": entry["extraction_hash"],
+                "json_files": entry["json_files"],
+                "objects": serialize_objects(entry["objects"]),
+            }
+            for sql_file, entry in sorted(files.items())
+        }
+    }
+    os.makedirs(os.path.dirname(MANIFEST_FILE_PATH) or '.', exist_ok=True)
+    temp_file_path = f"{MANIFEST_FILE_PATH}.tmp"
+    with open(temp_file_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(temp_file_path, MANIFEST_FILE_PATH)
+
+
+def diff_manifest(previous_files: Dict[str, Dict], current_files: Dict[str, Dict]):
+    """Returns the SQL files that were (added, changed, removed, unchanged) since the previous run."""
+    added, changed, removed, unchanged = [], [], [], []
+    for sql_file, entry in current_files.items():
+        previous_entry = previous_files.get(sql_file)
+        if previous_entry is None:
+            added.append(sql_file)
+        elif previous_entry["extraction_hash"] != entry["extraction_hash"]:
+            changed.append(sql_file)
+        else:
+            unchanged.append(sql_file)
+    removed = [sql_file for sql_file in previous_files if sql_file not in current_files]
+    return added, changed, removed, unchanged
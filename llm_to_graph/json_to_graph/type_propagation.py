@@ -0,0 +1,61 @@
+"""
+In-memory column type propagation over the UPSTREAM_COLUMN graph.
+
+Columns are numbered 0..n-1 and the edges are stored as a compressed sparse row (CSR)
+adjacency: the out-neighbours of column i are targets[offsets[i]:offsets[i + 1]].
+This module does not talk to Neo4j, so the same propagation can run on any edge list.
+"""
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+def build_adjacency(node_count: int, edges: Iterable[Tuple[int, int]]) -> Tuple[array, array]:
+    """Returns (offsets, targets) of the CSR adjacency of `(source, target)` edges."""
+    edges = list(edges)
+    offsets = array('q', [0]) * (node_count + 1)
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+
+    targets = array('q', [0]) * len(edges)
+    positions = array('q', offsets[:-1])
+    for source, target in edges:
+        targets[positions[source]] = target
+        positions[source] += 1
+    return offsets, targets
+
+
+def propagate_types(
+    types: Sequence[Optional[str]],
+    offsets: Sequence[int],
+    targets: Sequence[int],
+    seeds: Iterable[int]
+) -> List[Tuple[int, str]]:
+    """Breadth-first propagation of types to untyped out-neighbours.
+
+    Starting from `seeds` (typed columns, in order), every column hands its type to the
+    out-neighbours that have none yet; those are queued in turn. A column that has a type
+    is never overwritten, so the first column to reach it wins. Returns the (column, type)
+    assignments in the order they were made; `types` is not modified.
+    """
+    types = list(types)
+    visited = bytearray(len(types))
+    queue = deque(seeds)
+    updates = []
+
+    while queue:
+        current = queue.popleft()
+        if visited[current]:
+            continue
+        visited[current] = 1
+
+        current_type = types[current]
+        for target in targets[offsets[current]:offsets[current + 1]]:
+            if types[target] is None:
+                types[target] = current_type
+                updates.append((target, current_type))
+                queue.append(target)
+
+    return updates
@@ -0,0 +1,114 @@
+"""
+Content-addressed cache for validated LLM extractions.
+
+An extraction is stored under a hash of everything that can change its result:
+the normalized SQL text, the prompt template, the Pydantic schema and the model name.
+Renaming or moving a SQL file therefore still hits the cache, while changing the
+prompt or the model produces a new key instead of silently reusing stale output.
+
+The cache also remembers which response files were last written for each SQL file into
+each output directory, so an unchanged rerun can skip writing (and globbing for) response
+files entirely, while a new run folder sharing the cache still gets its own files.
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+
+def normalize_sql(sql_script: str) -> str:
+    """Normalizes whitespace that does not change the meaning of a SQL script."""
+    lines = [line.rstrip() for line in sql_script.replace('\r\n', '\n').replace('\r', '\n').split('\n')]
+    normalized = '\n'.join(lines).strip()
+    return re.sub(r'\n{3,}', '\n\n', normalized)
+
+
+def describe_prompt(prompt_template) -> str:
+    """Returns a stable text representation of a prompt template."""
+    template = getattr(prompt_template, "template", None)
+    if template is None:
+        return str(prompt_template)
+
+    partial_variables = getattr(prompt_template, "partial_variables", None) or {}
+    return template + json.dumps(partial_variables, sort_keys=True, default=str)
+
+
+def get_cache_key(sql_script: str, prompt_template, model_class: Type[BaseModel], model_name: str) -> str:
+    digest = hashlib.sha256()
+    for part in (
+        normalize_sql(sql_script),
+        describe_prompt(prompt_template),
+        model_class.schema_json(),
+        model_name or "",
+    ):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                cache_key TEXT PRIMARY KEY,
+                model_class TEXT NOT NULL,
+                model_name TEXT,
+                data TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        # Replaced by materialized_files, which older caches keyed on the SQL file alone
+        self.connection.execute("DROP TABLE IF EXISTS sql_files")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS materialized_files (
+                sql_file TEXT NOT NULL,
+                output_dir TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                json_files TEXT NOT NULL,
+                PRIMARY KEY (sql_file, output_dir)
+            )
+            """
+        )
+
+    def get(self, cache_key: str) -> Optional[Union[Dict, List[Dict]]]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data FROM extractions WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, cache_key: str, model_class: Type[BaseModel], model_name: str, data: Union[Dict, List[Dict]]):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?)",
+                (cache_key, model_class.__name__, model_name, json.dumps(data), datetime.datetime.now().isoformat())
+            )
+
+    def get_materialized(self, sql_file: str, output_dir: str) -> Optional[Tuple[str, List[str]]]:
+        """Returns (cache_key, json_files) of the responses last written for a SQL file into `output_dir`."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT cache_key, json_files FROM materialized_files WHERE sql_file = ? AND output_dir = ?",
+                (sql_file, os.path.normpath(output_dir))
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set_materialized(self, sql_file: str, output_dir: str, cache_key: str, json_files: List[str]):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO materialized_files VALUES (?, ?, ?, ?)",
+                (sql_file, os.path.normpath(output_dir), cache_key, json.dumps(json_files))
+            )
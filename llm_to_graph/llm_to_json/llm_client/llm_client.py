@@ -15,10 +15,17 @@ warnings.filterwarnings(
 GEMINI_TOKEN_PICKLE_PATH='token_new.pickle'
 GEMINI_MODEL='gemini-2.0-flash' #'gemini-1.5-pro-001'
 GEMINI_PROJECT='your-google-project'
+# Throttled requests (429) are retried by llm_to_json.rate_scheduler, keep client retries low
+GEMINI_MAX_RETRIES=1
 
 # Ollama Configuration
 OLLAMA_MODEL='llama3.2:3b-instruct-q4_K_M'
 
+def get_model_name(model) -> str:
+    # ChatVertexAI/OpenAI expose `model_name`, OllamaLLM exposes `model`
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+
 class LLMClient:
     def __init__(self):
         self.scopes = [
@@ -43,7 +50,7 @@ class LLMClient:
             model=GEMINI_MODEL,
             temperature=0,
             max_tokens=None,
-            max_retries=6,
+            max_retries=GEMINI_MAX_RETRIES,
             stop=None,
             project=GEMINI_PROJECT,
             credentials=credentials,
@@ -1,16 +1,22 @@
+import asyncio
 import datetime
-import glob
 import json
 import os
+import re
 import time
 from collections import defaultdict
 from pathlib import Path
+from typing import List, Optional
 
 import tqdm
 from pydantic import BaseModel
 
 from data_models import DataModel, DataModelSimple, StoredProcedure, StoredProcedureSimple
-from llm_to_json.llm_client.llm_client import LLMClient
+from llm_to_json.extraction_cache import ExtractionCache, get_cache_key
+from llm_to_json.llm_client.llm_client import LLMClient, get_model_name
+from llm_to_json.rate_scheduler import RateScheduler
+from llm_to_json.sql_chunking import chunk_sql_script, merge_partial_extractions
+from llm_to_json.sql_fast_path import parse_simple_sql
 from llm_to_json.sql_datamodel_extraction.feedback import feedback_template as datamodel_feedback_template
 from llm_to_json.sql_datamodel_extraction.prompt import prompt as datamodel_prompt
 from llm_to_json.sql_datamodel_extraction.prompt_simple import prompt_simple as datamodel_simple_prompt
@@ -30,27 +36,56 @@ from config import(
     PATH_EXTRACTION_RUNS,
     DATAMODEL_SQL_PATHTS,
     STORED_PROCEDURE_SQL_PATHS,
-    DO_SIMPLE_EXTRACT
+    DO_SIMPLE_EXTRACT,
+    USE_ALREADY_EXTRACTED,
+    EXTRACTION_CONCURRENCY,
+    EXTRACTION_CACHE_PATH,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    SQL_CHUNK_MAX_TOKENS,
+    DO_FAST_PATH_PARSE
 )
 
 DO_COST_ESTIMATE_WITHOUT_LLM = True
 
 llm_client = LLMClient()
 initialized_llm = llm_client.get_model()
+model_name = get_model_name(initialized_llm)
+extraction_cache = ExtractionCache(EXTRACTION_CACHE_PATH)
+rate_scheduler = RateScheduler(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, max_concurrency=EXTRACTION_CONCURRENCY)
 
 all_stats = []
+# Called with (sql_file_path, parsed_models, json_file_paths) for every validated extraction,
+# whether it came from the cache, the fast path or the LLM
+extraction_listeners = []
 
-stats = {
-    "loaded_file_count": 0,
-    "use_ai_file_count": 0,
-    "success_count": 0,
-    "error_count": 0,
-    "warning_count": 0,
-    "token_in_count": 0,
-    "token_out_count": 0,
-    "cost_in": 0,
-    "cost_out": 0
-}
+STAT_KEYS = [
+    "loaded_file_count",
+    "use_ai_file_count",
+    "fast_path_file_count",
+    "chunked_file_count",
+    "success_count",
+    "error_count",
+    "warning_count",
+    "token_in_count",
+    "token_out_count",
+    "cost_in",
+    "cost_out"
+]
+
+
+def new_stats():
+    return {key: 0 for key in STAT_KEYS}
+
+
+stats = new_stats()
+
+
+def merge_stats(file_stats):
+    # Each file collects its own counters and merges them once it is done,
+    # so concurrent extractions never interleave partial updates.
+    for key, value in file_stats.items():
+        stats[key] += value
 
 
 def get_ouput_file_dir(sql_file_path: str):
@@ -59,8 +94,26 @@ def get_ouput_file_dir(sql_file_path: str):
     output_file_dir = os.path.join(DEFAULT_EXTRACTION_DIR, PATH_EXTRACTION_RUNS, sql_file_path)
     return output_file_dir
 
-def save_extraction_to_file(parsed_model_class: BaseModel, sql_file_path: str, attempt: int, logger) -> bool:
-    base_name = sql_file_path.stem
+def remove_stale_extraction_files(sql_file_path: str, keep_file_paths: List[str], previous_file_paths: List[str] = ()):
+    # Older attempts (or parts of a previously chunked file) would otherwise shadow the new response in json_to_graph
+    stale_file_paths = set(previous_file_paths)
+    # Files written before the cache recorded them: exactly the names save_extraction_to_file
+    # emits for this SQL file, so the files of a sibling like `<name>__other.sql` are left alone
+    own_file_pattern = re.compile(rf'{re.escape(sql_file_path.stem)}(?:__\d+)?\.sql_response_\d+\.json')
+    output_file_dir = get_ouput_file_dir(sql_file_path)
+    if os.path.isdir(output_file_dir):
+        stale_file_paths.update(
+            os.path.join(output_file_dir, file_name)
+            for file_name in os.listdir(output_file_dir)
+            if own_file_pattern.fullmatch(file_name)
+        )
+    for file_path in stale_file_paths - set(keep_file_paths):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def save_extraction_to_file(parsed_model_class: BaseModel, sql_file_path: str, attempt: int, logger, part: Optional[int] = None) -> Optional[str]:
+    base_name = sql_file_path.stem if part is None else f"{sql_file_path.stem}__{part}"
     output_file_dir = get_ouput_file_dir(sql_file_path)
     os.makedirs(output_file_dir, exist_ok=True)
     json_file_path = os.path.join(output_file_dir, f"{base_name}.sql_response_{attempt}.json")
@@ -76,17 +129,57 @@ def save_extraction_to_file(parsed_model_class: BaseModel, sql_file_path: str, a
         }
         with open(json_file_path, 'w', encoding='utf-8') as f:
             json.dump(save_data, f, indent=2)
-        return True
+        return json_file_path
         
     except Exception as e:
 
         logger.warning(f"Failed to save response to file: {str(e)}")
-        return False
+        return None
 
 
-def extract_first_attempt(sql_script, prompt_template):
+def write_extraction_files(parsed_models: List[BaseModel], sql_file_path: str, cache_key: str, attempt: int, logger) -> List[str]:
+    """Writes the response files for a SQL file unless the same extraction is already on disk."""
+    # Keyed on the output directory too: the cache is shared by every run folder
+    output_file_dir = get_ouput_file_dir(sql_file_path)
+    materialized = extraction_cache.get_materialized(str(sql_file_path), output_file_dir)
+    previous_file_paths = materialized[1] if materialized is not None else []
+    if materialized is not None:
+        materialized_cache_key, json_file_paths = materialized
+        if materialized_cache_key == cache_key and all(os.path.exists(path) for path in json_file_paths):
+            return json_file_paths
+
+    if len(parsed_models) == 1:
+        json_file_paths = [save_extraction_to_file(parsed_models[0], sql_file_path, attempt, logger)]
+    else:
+        json_file_paths = [
+            save_extraction_to_file(parsed_model, sql_file_path, attempt, logger, part=index)
+            for index, parsed_model in enumerate(parsed_models, start=1)
+        ]
+    json_file_paths = [path for path in json_file_paths if path is not None]
+
+    remove_stale_extraction_files(sql_file_path, json_file_paths, previous_file_paths)
+    extraction_cache.set_materialized(str(sql_file_path), output_file_dir, cache_key, json_file_paths)
+    return json_file_paths
+
+
+def publish_extraction(sql_file_path, parsed_models: List[BaseModel], json_file_paths: List[str]):
+    for listener in extraction_listeners:
+        listener(sql_file_path, parsed_models, json_file_paths)
+
+
+def materialize_extractions(parsed_models: List[BaseModel], sql_file_path: str, cache_key: str, attempt: int, logger) -> List[str]:
+    """Writes the response files of a validated extraction and hands it to the extraction listeners."""
+    json_file_paths = write_extraction_files(parsed_models, sql_file_path, cache_key, attempt, logger)
+    publish_extraction(sql_file_path, parsed_models, json_file_paths)
+    return json_file_paths
+
+
+def extract_first_attempt(sql_script, prompt_template, estimated_tokens):
     extraction_chain = prompt_template | initialized_llm
-    response = extraction_chain.invoke({"sql_script": sql_script})
+    response = rate_scheduler.run_sync(
+        lambda: extraction_chain.invoke({"sql_script": sql_script}),
+        estimated_tokens
+    )
     return response
 
 
@@ -95,95 +188,331 @@ def extract_fallback(
     sql_script,
     last_error,
     model_class,
-    feedback_template
+    feedback_template,
+    estimated_tokens
 ):
     feedback_chain = feedback_template | initialized_llm
-    response = feedback_chain.invoke({
-        "sql_script": sql_script,
-        "previous_output": previous_output,
-        "error_message": last_error,
-        "schema": model_class.schema_json(indent=2)
-    })
+    response = rate_scheduler.run_sync(
+        lambda: feedback_chain.invoke({
+            "sql_script": sql_script,
+            "previous_output": previous_output,
+            "error_message": last_error,
+            "schema": model_class.schema_json(indent=2)
+        }),
+        estimated_tokens
+    )
 
     return response
 
 
-def get_latest_extraction_file_path(sql_file_path):
-    base_name = sql_file_path.stem
-    output_file_dir = get_ouput_file_dir(sql_file_path)
+async def extract_first_attempt_async(sql_script, prompt_template, estimated_tokens):
+    extraction_chain = prompt_template | initialized_llm
+    response = await rate_scheduler.run(
+        lambda: extraction_chain.ainvoke({"sql_script": sql_script}),
+        estimated_tokens
+    )
+    return response
 
-    pattern = os.path.join(output_file_dir, f"{base_name}.sql_response_*.json")
-    matches = glob.glob(pattern, recursive=True)
-    matches.sort()
 
-    if not matches: return None
-    return matches[-1]
+async def extract_fallback_async(
+    previous_output,
+    sql_script,
+    last_error,
+    model_class,
+    feedback_template,
+    estimated_tokens
+):
+    feedback_chain = feedback_template | initialized_llm
+    response = await rate_scheduler.run(
+        lambda: feedback_chain.ainvoke({
+            "sql_script": sql_script,
+            "previous_output": previous_output,
+            "error_message": last_error,
+            "schema": model_class.schema_json(indent=2)
+        }),
+        estimated_tokens
+    )
+
+    return response
 
 
-def get_latest_extraction(sql_file_path):
-    latest_extraction_file_path = get_latest_extraction_file_path(sql_file_path)
-    if latest_extraction_file_path is None: return None
-    with open(latest_extraction_file_path, 'r', encoding='utf-8') as file:
-        json_data = json.load(file)
-    data_part = json_data.get("data", {})
-    return json.dumps(data_part, indent=2)
+def read_sql_script(sql_file_path):
+    with open(sql_file_path, 'r', encoding='utf-8') as file:
+        return file.read()
 
 
-def extract_single_sql(
-    sql_file_path, 
+def prepare_sql_file(sql_file_path, prompt_template, model_class):
+    sql_script = read_sql_script(sql_file_path)
+    cache_key = get_cache_key(sql_script, prompt_template, model_class, model_name)
+    return sql_script, cache_key
+
+
+def reuse_cached_extraction(sql_file_path, sql_script, cache_key, prompt_template, model_class, file_stats, logger) -> bool:
+    if not USE_ALREADY_EXTRACTED: return False
+
+    cached_data = extraction_cache.get(cache_key)
+    if cached_data is None: return False
+
+    # Chunked files are cached as the list of their merged objects
+    cached_objects = cached_data if isinstance(cached_data, list) else [cached_data]
+    cached_content = json.dumps(cached_data, indent=2)
+    for cached_object in cached_objects:
+        success, _, _ = validate_output(json.dumps(cached_object), model_class)
+        if not success: return False
+
+    parsed_models = [model_class(**cached_object) for cached_object in cached_objects]
+    materialize_extractions(parsed_models, sql_file_path, cache_key, 1, logger)
+    logger.info(f"📁 Success validated from cache: {sql_file_path}")
+    if DO_COST_ESTIMATE_WITHOUT_LLM:
+        token_in_count, input_cost, _ = calculate_token_costs(str(prompt_template) + str(sql_script))
+        token_out_count, _, output_cost = calculate_token_costs(cached_content)
+        file_stats['token_in_count'] += token_in_count
+        file_stats['cost_in'] += input_cost
+        file_stats['token_out_count'] += token_out_count
+        file_stats['cost_out'] += output_cost
+
+    file_stats['loaded_file_count'] += 1
+    file_stats['success_count'] += 1
+    return True
+
+
+def get_full_prompt(sql_script, prompt_template, feedback_template, model_class, previous_output, last_error):
+    if previous_output is None:
+        return prompt_template.format_prompt(sql_script=sql_script)
+    return f"{str(feedback_template)}\n{previous_output}\n{last_error}\n{model_class.schema_json(indent=2)}"
+
+
+def estimate_prompt_tokens(sql_script, prompt_template, feedback_template, model_class, previous_output, last_error):
+    full_prompt = get_full_prompt(sql_script, prompt_template, feedback_template, model_class, previous_output, last_error)
+    token_in_count, input_cost, _ = calculate_token_costs(str(full_prompt))
+    return token_in_count, input_cost
+
+
+def handle_response(response, token_in_count, input_cost, label, cache_key, model_class, file_stats, logger):
+    """Counts tokens for one attempt and caches the response if it validates.
+
+    Returns:
+        Tuple of (parsed_model or None, response_content, error_message)
+    """
+    token_out_count, _, output_cost = calculate_token_costs(str(response))
+    rate_scheduler.record_output_tokens(token_out_count)
+    file_stats['token_in_count'] += token_in_count
+    file_stats['cost_in'] += input_cost
+    file_stats['token_out_count'] += token_out_count
+    file_stats['cost_out'] += output_cost
+
+    response_content = response.content if hasattr(response, 'content') else str(response)
+    success, error, parsed_json = validate_output(response_content, model_class)
+
+    if success:
+        parsed_model_class = model_class(**parsed_json)
+        extraction_cache.put(cache_key, model_class, model_name, parsed_model_class.model_dump())
+        logger.info(f"🧠 Success validating from LLM output: {label}")
+        return parsed_model_class, response_content, None
+
+    logger.warning(f"Failed: {label}")
+    return None, response_content, error
+
+
+def log_extraction_failure(label, max_attempts, last_error, logger):
+    error_message = f"Failed after {max_attempts} attempts ({label}). Last error: {last_error}"
+    logger.error(error_message)
+
+
+def extract_sql_text(
+    label,
+    sql_script,
+    cache_key,
     prompt_template,
     feedback_template,
     model_class,
     max_attempts,
+    file_stats,
     logger
 ):
+    """Runs the extraction with self-correction for one SQL text (a file or a chunk of one).
+
+    Returns:
+        Tuple of (parsed_model or None, number of attempts used)
+    """
     previous_output = None
     last_error = None
-    logger.info(f"Extract with LLM: {sql_file_path}")
-    with open(sql_file_path, 'r', encoding='utf-8') as file:
-        sql_script = file.read()    
+    logger.info(f"Extract with LLM: {label}")
+
+    for attempt in range(max_attempts):
+        token_in_count, input_cost = estimate_prompt_tokens(sql_script, prompt_template, feedback_template, model_class, previous_output, last_error)
+        estimated_tokens = rate_scheduler.estimate_tokens(token_in_count)
+        if attempt == 0:
+            response = extract_first_attempt(sql_script, prompt_template, estimated_tokens)
+        else:
+            logger.warning(f"Retry {attempt}/{max_attempts} with self-correction...")
+            file_stats['warning_count'] += 1
+            response = extract_fallback(previous_output, sql_script, last_error, model_class, feedback_template, estimated_tokens)
 
-        for attempt in range(max_attempts):
-            if attempt == 0:
-                response = extract_first_attempt(sql_script, prompt_template)
-                full_prompt = prompt_template.format_prompt(sql_script=sql_script)
+        parsed_model, previous_output, last_error = handle_response(response, token_in_count, input_cost, label, cache_key, model_class, file_stats, logger)
+        if parsed_model is not None:
+            return parsed_model, attempt + 1
+
+    log_extraction_failure(label, max_attempts, last_error, logger)
+    return None, max_attempts
+
+
+async def extract_sql_text_async(
+    label,
+    sql_script,
+    cache_key,
+    prompt_template,
+    feedback_template,
+    model_class,
+    max_attempts,
+    file_stats,
+    logger
+):
+    previous_output = None
+    last_error = None
+    logger.info(f"Extract with LLM (async): {label}")
+
+    for attempt in range(max_attempts):
+        token_in_count, input_cost = estimate_prompt_tokens(sql_script, prompt_template, feedback_template, model_class, previous_output, last_error)
+        estimated_tokens = rate_scheduler.estimate_tokens(token_in_count)
+        try:
+            if previous_output is None:
+                response = await extract_first_attempt_async(sql_script, prompt_template, estimated_tokens)
             else:
                 logger.warning(f"Retry {attempt}/{max_attempts} with self-correction...")
-                stats['warning_count'] += 1
-                response = extract_fallback(previous_output, sql_script, last_error, model_class, feedback_template)
-                full_prompt = f"{str(feedback_template)}\n{previous_output}\n{last_error}\n{model_class.schema_json(indent=2)}"
-            
-            token_in_count, input_cost, _ = calculate_token_costs(str(full_prompt))
-            token_out_count, _, output_cost = calculate_token_costs(str(response))
-            stats['token_in_count'] += token_in_count
-            stats['cost_in'] += input_cost
-            stats['token_out_count'] += token_out_count
-            stats['cost_out'] += output_cost
-
-            response_content = response.content if hasattr(response, 'content') else str(response)
-            success, error, parsed_json = validate_output(response_content, model_class)
-
-            if success:
-                parsed_model_class = model_class(**parsed_json)
-                save_extraction_to_file(parsed_model_class, sql_file_path, attempt+1, logger)
-                stats['use_ai_file_count'] += 1
-                stats['success_count'] += 1
-                logger.info(f"🧠 Success validating from LLM output: {sql_file_path}")
-                return
+                file_stats['warning_count'] += 1
+                response = await extract_fallback_async(previous_output, sql_script, last_error, model_class, feedback_template, estimated_tokens)
+        except Exception as e:
+            # One failing request must not cancel the other files in flight
+            logger.warning(f"LLM request failed for {label}: {str(e)}")
+            if previous_output is None:
+                last_error = f"LLM request failed: {str(e)}"
+            continue
 
-            else:
-                previous_output = response_content
-                last_error = error
-                logger.warning(f"Failed: {sql_file_path}")
+        parsed_model, previous_output, last_error = handle_response(response, token_in_count, input_cost, label, cache_key, model_class, file_stats, logger)
+        if parsed_model is not None:
+            return parsed_model, attempt + 1
 
-    stats['error_count'] += 1
-    error_message = f"Failed after {max_attempts} attempts. Last error: {last_error}"
-    logger.error(error_message)
+    log_extraction_failure(label, max_attempts, last_error, logger)
+    return None, max_attempts
+
+
+def finish_single_sql(parsed_model, attempts, sql_file_path, cache_key, file_stats, logger):
+    if parsed_model is None:
+        file_stats['error_count'] += 1
+        return file_stats
+
+    materialize_extractions([parsed_model], sql_file_path, cache_key, attempts, logger)
+    file_stats['use_ai_file_count'] += 1
+    file_stats['success_count'] += 1
+    return file_stats
+
+
+def extract_single_sql(
+    sql_file_path,
+    sql_script,
+    cache_key,
+    prompt_template,
+    feedback_template,
+    model_class,
+    max_attempts,
+    logger
+):
+    file_stats = new_stats()
+    parsed_model, attempts = extract_sql_text(sql_file_path, sql_script, cache_key, prompt_template, feedback_template, model_class, max_attempts, file_stats, logger)
+    return finish_single_sql(parsed_model, attempts, sql_file_path, cache_key, file_stats, logger)
+
+
+async def extract_single_sql_async(
+    sql_file_path,
+    sql_script,
+    cache_key,
+    prompt_template,
+    feedback_template,
+    model_class,
+    max_attempts,
+    logger
+):
+    file_stats = new_stats()
+    parsed_model, attempts = await extract_sql_text_async(sql_file_path, sql_script, cache_key, prompt_template, feedback_template, model_class, max_attempts, file_stats, logger)
+    return finish_single_sql(parsed_model, attempts, sql_file_path, cache_key, file_stats, logger)
+
+
+async def extract_chunked_sql_async(
+    sql_file_path,
+    chunks,
+    cache_key,
+    prompt_template,
+    feedback_template,
+    model_class,
+    max_attempts,
+    logger
+):
+    """Map-reduce extraction: every chunk is extracted in parallel, then merged into one object per model."""
+    file_stats = new_stats()
+    file_stats['chunked_file_count'] += 1
+    logger.info(f"Extract {len(chunks)} chunks with LLM: {sql_file_path}")
+
+    async def extract_chunk(index, chunk):
+        if DO_FAST_PATH_PARSE:
+            parsed_model = parse_simple_sql(chunk, model_class)
+            if parsed_model is not None:
+                return parsed_model, 0, "fast_path"
+
+        label = f"{sql_file_path} [chunk {index}/{len(chunks)}]"
+        chunk_cache_key = get_cache_key(chunk, prompt_template, model_class, model_name)
+        cached_data = extraction_cache.get(chunk_cache_key) if USE_ALREADY_EXTRACTED else None
+        if cached_data is not None:
+            return model_class(**cached_data), 0, "cache"
+
+        parsed_model, attempts = await extract_sql_text_async(label, chunk, chunk_cache_key, prompt_template, feedback_template, model_class, max_attempts, file_stats, logger)
+        return parsed_model, attempts, "llm"
+
+    results = await asyncio.gather(*[extract_chunk(index, chunk) for index, chunk in enumerate(chunks, start=1)])
+    partials = [parsed_model for parsed_model, _, _ in results if parsed_model is not None]
+    if len(partials) < len(chunks):
+        # Successful chunks stay cached, a rerun only repeats the failed ones
+        logger.error(f"Failed: {len(chunks) - len(partials)}/{len(chunks)} chunks of {sql_file_path}")
+        file_stats['error_count'] += 1
+        return file_stats
+
+    merged_models = merge_partial_extractions(partials, model_class)
+    extraction_cache.put(cache_key, model_class, model_name, [merged_model.model_dump() for merged_model in merged_models])
+    attempts = max(1, max(attempts for _, attempts, _ in results))
+    materialize_extractions(merged_models, sql_file_path, cache_key, attempts, logger)
+    logger.info(f"🧠 Merged {len(chunks)} chunks into {len(merged_models)} objects: {sql_file_path}")
+
+    sources = {source for _, _, source in results}
+    if "llm" in sources:
+        file_stats['use_ai_file_count'] += 1
+    elif sources == {"fast_path"}:
+        file_stats['fast_path_file_count'] += 1
+    else:
+        file_stats['loaded_file_count'] += 1
+    file_stats['success_count'] += 1
+    return file_stats
+
+
+def take_fast_path(sql_file_path, sql_script, cache_key, model_class, file_stats, logger) -> bool:
+    if not DO_FAST_PATH_PARSE: return False
+
+    parsed_model = parse_simple_sql(sql_script, model_class)
+    if parsed_model is None: return False
+
+    materialize_extractions([parsed_model], sql_file_path, cache_key, 1, logger)
+    logger.info(f"⚡ Extracted without LLM: {sql_file_path}")
+    file_stats['fast_path_file_count'] += 1
+    file_stats['success_count'] += 1
+    return True
+
+
+def get_chunks(sql_script):
+    return chunk_sql_script(sql_script, SQL_CHUNK_MAX_TOKENS)
 
 
 def set_pbar_postfix(pbar):
     postfix_str = (
-        f"📁{stats['loaded_file_count']} " +
+        f"📁{stats['loaded_file_count']} ⚡{stats['fast_path_file_count']} " +
         f"🧠{stats['use_ai_file_count']} - 💬{stats['token_in_count']}/{stats['token_out_count']} " +
         f"💸${stats['cost_in']:.2f}/${stats['cost_out']:.2f} " +
         f"✅{stats['success_count']} | ⚠️ {stats['warning_count']} | ❌{stats['error_count']}"
@@ -192,46 +521,88 @@ def set_pbar_postfix(pbar):
     return postfix_str
 
 
-def loop_through_all_sqls(
-    sql_path_dir, 
+def loop_through_all_sqls_sequential(
+    sql_file_paths,
     prompt_template,
     feedback_template,
     model_class,
-    max_attempts = 3,
-    logger = None
+    max_attempts,
+    logger
 ):
-    global stats
-    stats = {key: 0 for key in stats}
-    sql_file_paths = list(Path(sql_path_dir).glob('**/*.sql'))
-
     with tqdm.tqdm(sql_file_paths) as pbar:
         for sql_file_path in pbar:
-            latest_extraction_content = get_latest_extraction(sql_file_path)
-            if latest_extraction_content is not None: 
-                success, _, _ = validate_output(latest_extraction_content, model_class)
-                if success:
-                    logger.info(f"📁 Success validated from file: {sql_file_path}")
-                    if DO_COST_ESTIMATE_WITHOUT_LLM:
-                        with open(sql_file_path, 'r', encoding='utf-8') as file:
-                            sql_script = file.read()
-                        token_in_count, input_cost, _ = calculate_token_costs(str(prompt_template) + str(sql_script))
-                        token_out_count, _, output_cost = calculate_token_costs(str(latest_extraction_content))
-                        stats['token_in_count'] += token_in_count
-                        stats['cost_in'] += input_cost
-                        stats['token_out_count'] += token_out_count
-                        stats['cost_out'] += output_cost
-                    
-                    stats['loaded_file_count'] += 1
-                    stats['success_count'] += 1
-                    set_pbar_postfix(pbar)
-                    continue
-
-            extract_single_sql(sql_file_path, prompt_template, feedback_template, model_class, max_attempts, logger)
+            file_stats = new_stats()
+            sql_script, cache_key = prepare_sql_file(sql_file_path, prompt_template, model_class)
+            handled = (
+                reuse_cached_extraction(sql_file_path, sql_script, cache_key, prompt_template, model_class, file_stats, logger)
+                or take_fast_path(sql_file_path, sql_script, cache_key, model_class, file_stats, logger)
+            )
+            if not handled:
+                chunks = get_chunks(sql_script)
+                if len(chunks) > 1:
+                    file_stats = asyncio.run(extract_chunked_sql_async(sql_file_path, chunks, cache_key, prompt_template, feedback_template, model_class, max_attempts, logger))
+                else:
+                    file_stats = extract_single_sql(sql_file_path, sql_script, cache_key, prompt_template, feedback_template, model_class, max_attempts, logger)
+            merge_stats(file_stats)
             set_pbar_postfix(pbar)
 
         final_postfix = set_pbar_postfix(pbar)
         logger.info(f"{final_postfix}\n")
 
+
+async def loop_through_all_sqls_async(
+    sql_file_paths,
+    prompt_template,
+    feedback_template,
+    model_class,
+    max_attempts,
+    logger,
+    concurrency
+):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process_file(sql_file_path):
+        file_stats = new_stats()
+        sql_script, cache_key = prepare_sql_file(sql_file_path, prompt_template, model_class)
+        if reuse_cached_extraction(sql_file_path, sql_script, cache_key, prompt_template, model_class, file_stats, logger):
+            return file_stats
+        if take_fast_path(sql_file_path, sql_script, cache_key, model_class, file_stats, logger):
+            return file_stats
+        async with semaphore:
+            chunks = get_chunks(sql_script)
+            if len(chunks) > 1:
+                return await extract_chunked_sql_async(sql_file_path, chunks, cache_key, prompt_template, feedback_template, model_class, max_attempts, logger)
+            return await extract_single_sql_async(sql_file_path, sql_script, cache_key, prompt_template, feedback_template, model_class, max_attempts, logger)
+
+    tasks = [asyncio.create_task(process_file(sql_file_path)) for sql_file_path in sql_file_paths]
+    with tqdm.tqdm(total=len(tasks)) as pbar:
+        for finished_task in asyncio.as_completed(tasks):
+            merge_stats(await finished_task)
+            pbar.update(1)
+            set_pbar_postfix(pbar)
+
+        final_postfix = set_pbar_postfix(pbar)
+        logger.info(f"{final_postfix}\n")
+
+
+def loop_through_all_sqls(
+    sql_path_dir, 
+    prompt_template,
+    feedback_template,
+    model_class,
+    max_attempts = 3,
+    logger = None,
+    concurrency = EXTRACTION_CONCURRENCY
+):
+    global stats
+    stats = new_stats()
+    sql_file_paths = list(Path(sql_path_dir).glob('**/*.sql'))
+
+    if concurrency > 1:
+        asyncio.run(loop_through_all_sqls_async(sql_file_paths, prompt_template, feedback_template, model_class, max_attempts, logger, concurrency))
+    else:
+        loop_through_all_sqls_sequential(sql_file_paths, prompt_template, feedback_template, model_class, max_attempts, logger)
+
     all_stats.append(stats)
     print()
 
@@ -246,17 +617,21 @@ def logg_all_stats(start_time, logger):
     for stat in all_stats:
         for key, value in stat.items():
             total_stats[key] += value
+    scheduler_stats = rate_scheduler.stats()
 
     messages = [
         "===== LLM to JSON STATS =====",
         f"⏱️  Execution time: {elapsed_seconds:.2f} seconds\n",
-        f"📁 Loaded from files: {total_stats['loaded_file_count']}",
+        f"📁 Loaded from cache: {total_stats['loaded_file_count']}",
         f"🧠 Used AI for extraction: {total_stats['use_ai_file_count']}",
+        f"⚡ Extracted without LLM (fast path): {total_stats['fast_path_file_count']}",
+        f"✂️  Chunked files (map-reduce): {total_stats['chunked_file_count']}",
         f"💬 Token used (in/out): {total_stats['token_in_count']}/{total_stats['token_out_count']} (Assuming per million: ${INPUT_TOKEN_COST_PER_MILLION}/${OUTPUT_TOKEN_COST_PER_MILLION})",
         f"💸 Token costs (in/out): ${total_stats['cost_in']:.2f}/${total_stats['cost_out']:.2f} -> Total: ${(total_stats['cost_in'] + total_stats['cost_out']):.2f}",
         f"✅ Success: {total_stats['success_count']}",
         f"⚠️  Warnings: {total_stats['warning_count']}",
-        f"❌ Errors: {total_stats['error_count']}\n"
+        f"❌ Errors: {total_stats['error_count']}",
+        f"🚦 LLM requests: {scheduler_stats['requests']} (throttled: {scheduler_stats['throttled']}, concurrency limit: {scheduler_stats['concurrency_limit']}, avg latency: {scheduler_stats['average_latency']:.2f}s)\n"
     ]
     for msg in messages:
         logg_print(logger, msg)
@@ -264,7 +639,11 @@ def logg_all_stats(start_time, logger):
 def llm_to_json(logger):
     logg_print(logger, "----- LLM to JSON ----")
     start_time = time.time()
-    logg_print(logger, f"DO_COST_ESTIMATE_WITHOUT_LLM: {DO_COST_ESTIMATE_WITHOUT_LLM}\n")
+    logg_print(logger, f"DO_COST_ESTIMATE_WITHOUT_LLM: {DO_COST_ESTIMATE_WITHOUT_LLM}")
+    logg_print(logger, f"EXTRACTION_CONCURRENCY: {EXTRACTION_CONCURRENCY}")
+    logg_print(logger, f"LLM budget: {LLM_REQUESTS_PER_MINUTE} requests/min, {LLM_TOKENS_PER_MINUTE} tokens/min")
+    logg_print(logger, f"DO_FAST_PATH_PARSE: {DO_FAST_PATH_PARSE}")
+    logg_print(logger, f"USE_ALREADY_EXTRACTED: {USE_ALREADY_EXTRACTED} (cache: {EXTRACTION_CACHE_PATH})\n")
 
     for path in DATAMODEL_SQL_PATHTS:
         logg_print(logger, f"Processing datamodels in {path}")
@@ -0,0 +1,215 @@
+"""
+Rate scheduler that sits in front of every LLM chain invocation.
+
+It enforces a requests-per-minute and a tokens-per-minute budget with two token buckets,
+using the tiktoken estimate of the prompt before a request is sent. The number of requests
+in flight adapts to the provider: it is halved when a request is throttled (HTTP 429 /
+ResourceExhausted), shrinks by one while latency is degraded, and grows by one after a window
+of healthy responses (AIMD). Throttled requests are retried by the scheduler after the buckets and the
+concurrency limit have been adjusted, instead of backing off blindly inside the client.
+"""
+import asyncio
+import random
+import threading
+import time
+
+THROTTLE_MARKERS = ("429", "ResourceExhausted", "RateLimit", "Too Many Requests", "quota")
+
+
+def is_throttling_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}"
+    return any(marker.lower() in text.lower() for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    def __init__(self, capacity_per_minute: float, clock=time.monotonic):
+        self.capacity = capacity_per_minute
+        self.rate_per_second = capacity_per_minute / 60
+        self.tokens = capacity_per_minute
+        self.clock = clock
+        self.updated_at = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be consumed (requests larger than the bucket wait for a full bucket)."""
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount: float):
+        self.refill()
+        self.tokens -= amount
+
+    def drain(self):
+        self.refill()
+        self.tokens = min(self.tokens, 0)
+
+
+class RateScheduler:
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        max_throttle_retries: int = 6,
+        latency_degradation_factor: float = 2.0,
+        clock=time.monotonic
+    ):
+        # `clock` returns seconds, it is only replaced to drive the scheduler in tests
+        self.clock = clock
+        self.request_bucket = TokenBucket(requests_per_minute, clock)
+        self.token_bucket = TokenBucket(tokens_per_minute, clock)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency_limit = self.max_concurrency
+        self.max_throttle_retries = max_throttle_retries
+        self.latency_degradation_factor = latency_degradation_factor
+
+        self.in_flight = 0
+        self.successes_since_resize = 0
+        self.baseline_latency = None
+        self.average_latency = None
+        self.average_output_tokens = 0
+
+        self.throttle_count = 0
+        self.request_count = 0
+
+        self.lock = threading.Lock()
+        self.condition = None
+        self.condition_loop = None
+
+    def estimate_tokens(self, token_in_count: int) -> int:
+        return token_in_count + int(self.average_output_tokens)
+
+    def record_output_tokens(self, token_out_count: int):
+        with self.lock:
+            self.average_output_tokens = 0.8 * self.average_output_tokens + 0.2 * token_out_count
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.request_count,
+            "throttled": self.throttle_count,
+            "concurrency_limit": self.concurrency_limit,
+            "average_latency": self.average_latency or 0,
+        }
+
+    # --- Budget and concurrency bookkeeping ---------------------------------------------
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Consumes the budget for one request, or returns how long to wait before retrying."""
+        with self.lock:
+            wait_time = max(
+                self.request_bucket.wait_time(1),
+                self.token_bucket.wait_time(estimated_tokens)
+            )
+            if wait_time > 0:
+                return wait_time
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(estimated_tokens)
+            self.request_count += 1
+            return 0
+
+    def on_success(self, latency: float):
+        with self.lock:
+            self.average_latency = latency if self.average_latency is None else 0.8 * self.average_latency + 0.2 * latency
+            self.baseline_latency = latency if self.baseline_latency is None else min(self.baseline_latency, self.average_latency)
+
+            if self.average_latency > self.baseline_latency * self.latency_degradation_factor:
+                # The provider is queueing our requests, more parallelism will not help
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit - 1)
+                self.successes_since_resize = 0
+                return
+
+            self.successes_since_resize += 1
+            if self.successes_since_resize >= self.concurrency_limit:
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1)
+                self.successes_since_resize = 0
+
+    def on_throttle(self):
+        with self.lock:
+            self.throttle_count += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit // 2)
+            self.successes_since_resize = 0
+            # Stop everyone else from sending until the buckets refill
+            self.request_bucket.drain()
+
+    def backoff_time(self, retry: int) -> float:
+        return min(60, 2 ** retry) * (0.5 + random.random())
+
+    # --- Async API ----------------------------------------------------------------------
+
+    def get_condition(self) -> asyncio.Condition:
+        # asyncio primitives are bound to one event loop, every asyncio.run needs its own
+        loop = asyncio.get_running_loop()
+        if self.condition is None or self.condition_loop is not loop:
+            self.condition = asyncio.Condition()
+            self.condition_loop = loop
+            self.in_flight = 0
+        return self.condition
+
+    async def acquire_slot(self):
+        condition = self.get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.concurrency_limit)
+            self.in_flight += 1
+
+    async def release_slot(self):
+        condition = self.get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    async def run(self, request_factory, estimated_tokens: int):
+        """Awaits `request_factory()` once budget and a concurrency slot are available."""
+        for retry in range(self.max_throttle_retries + 1):
+            await self.acquire_slot()
+            try:
+                wait_time = self.reserve(estimated_tokens)
+                while wait_time > 0:
+                    await asyncio.sleep(wait_time)
+                    wait_time = self.reserve(estimated_tokens)
+
+                start_time = self.clock()
+                try:
+                    response = await request_factory()
+                except Exception as e:
+                    if not is_throttling_error(e) or retry == self.max_throttle_retries:
+                        raise
+                    self.on_throttle()
+                else:
+                    self.on_success(self.clock() - start_time)
+                    return response
+            finally:
+                await self.release_slot()
+
+            await asyncio.sleep(self.backoff_time(retry))
+
+    # --- Sync API -----------------------------------------------------------------------
+
+    def run_sync(self, request_factory, estimated_tokens: int):
+        """Blocking variant of `run` for the sequential extraction path."""
+        for retry in range(self.max_throttle_retries + 1):
+            wait_time = self.reserve(estimated_tokens)
+            while wait_time > 0:
+                time.sleep(wait_time)
+                wait_time = self.reserve(estimated_tokens)
+
+            start_time = self.clock()
+            try:
+                response = request_factory()
+            except Exception as e:
+                if not is_throttling_error(e) or retry == self.max_throttle_retries:
+                    raise
+                self.on_throttle()
+            else:
+                self.on_success(self.clock() - start_time)
+                return response
+
+            time.sleep(self.backoff_time(retry))
@@ -0,0 +1,311 @@
+"""
+Statement-level chunking and merging for SQL files that are too large for one prompt.
+
+A file is split into object units: each CREATE TABLE/VIEW/PROCEDURE statement together
+with the statements that follow it up to the next CREATE. A procedure body keeps its own
+CREATE statements (temp tables, ...): a procedure unit only ends at the next CREATE PROCEDURE
+or at a GO batch separator. Every unit becomes one chunk, so
+the one-object-per-prompt contract of the extraction prompts still holds. Units that are
+larger than the token budget (e.g. 3,000-line stored procedures) are split further at
+statement boundaries inside their body, and every continuation chunk carries the header of
+the statement it belongs to.
+
+The partial extractions of all chunks are merged back into one object per data model or
+stored procedure.
+"""
+import re
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from data_models import Column, DataModel, DataModelSimple, StoredProcedure, StoredProcedureSimple, Transformation
+from llm_to_json.token_estimation import calculate_token_costs
+
+CREATE_PATTERN = re.compile(
+    r'^\s*(?:CREATE|ALTER)\s+(?:OR\s+(?:REPLACE|ALTER)\s+)?(?:TEMP(?:ORARY)?\s+)?(?:MATERIALIZED\s+)?'
+    r'(TABLE|VIEW|PROC|PROCEDURE)\b',
+    re.IGNORECASE
+)
+WORD_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+NEXT_WORD_PATTERN = re.compile(r'\s*([A-Za-z]+)')
+BLOCK_OPEN_KEYWORDS = {"BEGIN", "CASE"}
+BLOCK_CLOSE_SUFFIXES = {"IF", "LOOP", "WHILE", "REPEAT", "FOR"}
+
+
+def strip_comments(sql: str) -> str:
+    sql = re.sub(r'/\*.*?\*/', ' ', sql, flags=re.DOTALL)
+    return re.sub(r'--[^\n]*', ' ', sql)
+
+
+def split_sql_statements(sql_script: str, respect_blocks: bool = True) -> List[str]:
+    """Splits a SQL script into statements.
+
+    Statements end at `;` (or a custom `DELIMITER`) outside of strings, comments and
+    parentheses, and at `GO` batch separators. With `respect_blocks`, semicolons inside
+    BEGIN ... END / CASE ... END blocks do not end a statement.
+    """
+    return [statement for _, statement in split_sql_batches(sql_script, respect_blocks)]
+
+
+def split_sql_batches(sql_script: str, respect_blocks: bool = True) -> List[Tuple[int, str]]:
+    """Like split_sql_statements, returns (batch number, statement). Every GO starts a new batch."""
+    statements = []
+    batch = 0
+    current = []
+    delimiter = ';'
+    paren_depth = 0
+    block_depth = 0
+    i = 0
+    length = len(sql_script)
+
+    def flush():
+        statement = ''.join(current).strip()
+        if statement:
+            statements.append((batch, statement))
+        current.clear()
+
+    while i < length:
+        at_line_start = i == 0 or sql_script[i - 1] == '\n'
+        if at_line_start:
+            line_end = sql_script.find('\n', i)
+            line_end = length if line_end == -1 else line_end
+            line = sql_script[i:line_end].strip()
+            if re.fullmatch(r'GO(\s+\d+)?', line, re.IGNORECASE):
+                flush()
+                batch += 1
+                block_depth = paren_depth = 0
+                i = line_end
+                continue
+            delimiter_match = re.fullmatch(r'DELIMITER\s+(\S+)', line, re.IGNORECASE)
+            if delimiter_match:
+                flush()
+                delimiter = delimiter_match.group(1)
+                i = line_end
+                continue
+
+        char = sql_script[i]
+
+        if sql_script.startswith('--', i):
+            end = sql_script.find('\n', i)
+            end = length if end == -1 else end
+            current.append(sql_script[i:end])
+            i = end
+            continue
+        if sql_script.startswith('/*', i):
+            end = sql_script.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            current.append(sql_script[i:end])
+            i = end
+            continue
+        if char in ("'", '"', '`', '['):
+            closing = ']' if char == '[' else char
+            end = i + 1
+            while end < length:
+                if sql_script[end] == closing:
+                    # Doubled quotes are escapes inside strings and identifiers
+                    if end + 1 < length and sql_script[end + 1] == closing and closing != ']':
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(sql_script[i:end + 1])
+            i = end + 1
+            continue
+
+        if sql_script.startswith(delimiter, i) and paren_depth == 0 and (block_depth == 0 or not respect_blocks or delimiter != ';'):
+            current.append(';')
+            flush()
+            block_depth = 0
+            i += len(delimiter)
+            continue
+
+        if char == '(':
+            paren_depth += 1
+        elif char == ')':
+            paren_depth = max(0, paren_depth - 1)
+        elif char.isalpha() and (i == 0 or not (sql_script[i - 1].isalnum() or sql_script[i - 1] == '_')):
+            word = WORD_PATTERN.match(sql_script, i).group(0)
+            upper_word = word.upper()
+            if upper_word in BLOCK_OPEN_KEYWORDS:
+                block_depth += 1
+            elif upper_word == "END":
+                next_word = NEXT_WORD_PATTERN.match(sql_script, i + 3)
+                if not (next_word and next_word.group(1).upper() in BLOCK_CLOSE_SUFFIXES):
+                    block_depth = max(0, block_depth - 1)
+            current.append(word)
+            i += len(word)
+            continue
+
+        current.append(char)
+        i += 1
+
+    flush()
+    return statements
+
+
+def get_create_kind(statement: str) -> Optional[str]:
+    """TABLE, VIEW or PROCEDURE for CREATE/ALTER statements, None for anything else."""
+    match = CREATE_PATTERN.match(strip_comments(statement))
+    if match is None:
+        return None
+    kind = match.group(1).upper()
+    return "PROCEDURE" if kind == "PROC" else kind
+
+
+def is_create_statement(statement: str) -> bool:
+    return get_create_kind(statement) is not None
+
+
+def split_into_object_units(sql_script: str) -> List[str]:
+    """Groups statements so that every unit starts with one CREATE statement."""
+    units = []
+    current = []
+    # CREATE kind and batch of the statement the current unit starts with
+    unit_kind = None
+    unit_batch = None
+    for batch, statement in split_sql_batches(sql_script):
+        kind = get_create_kind(statement)
+        if kind is not None and unit_kind is not None:
+            # Without BEGIN/END, a procedure body runs up to the end of its batch
+            inside_procedure = unit_kind == "PROCEDURE" and batch == unit_batch and kind != "PROCEDURE"
+            if not inside_procedure:
+                units.append('\n'.join(current))
+                current = []
+                unit_kind = None
+        if kind is not None and unit_kind is None:
+            unit_kind, unit_batch = kind, batch
+        current.append(statement)
+    if current:
+        units.append('\n'.join(current))
+    return units
+
+
+def count_tokens(sql: str) -> int:
+    token_count, _, _ = calculate_token_costs(sql)
+    return token_count
+
+
+def get_statement_header(unit: str) -> str:
+    """Returns the first line of the CREATE statement of a unit, used as context for continuation chunks."""
+    for line in unit.splitlines():
+        if CREATE_PATTERN.match(line):
+            return line.strip()
+    return unit.strip().splitlines()[0] if unit.strip() else ''
+
+
+def split_oversized_unit(unit: str, max_chunk_tokens: int) -> List[str]:
+    statements = split_sql_statements(unit, respect_blocks=False)
+    header = get_statement_header(unit)
+
+    parts = []
+    current = []
+    current_tokens = 0
+    for statement in statements:
+        statement_tokens = count_tokens(statement)
+        if current and current_tokens + statement_tokens > max_chunk_tokens:
+            parts.append('\n'.join(current))
+            current = []
+            current_tokens = 0
+        current.append(statement)
+        current_tokens += statement_tokens
+    if current:
+        parts.append('\n'.join(current))
+
+    if len(parts) <= 1:
+        return parts
+
+    chunks = [parts[0]]
+    for index, part in enumerate(parts[1:], start=2):
+        chunks.append(
+            f"-- Part {index}/{len(parts)} of a larger SQL statement. It continues:\n"
+            f"-- {header}\n"
+            f"-- Extract it as that same object, using that object's name.\n"
+            f"{part}"
+        )
+    return chunks
+
+
+def chunk_sql_script(sql_script: str, max_chunk_tokens: int) -> List[str]:
+    """Returns the chunks of a SQL script, or a single chunk if it needs no splitting."""
+    units = split_into_object_units(sql_script)
+    if len(units) <= 1 and count_tokens(sql_script) <= max_chunk_tokens:
+        return [sql_script]
+
+    chunks = []
+    for unit in units:
+        if count_tokens(unit) > max_chunk_tokens:
+            chunks.extend(split_oversized_unit(unit, max_chunk_tokens))
+        else:
+            chunks.append(unit)
+    return chunks
+
+
+def normalize_object_name(name: Optional[str]) -> str:
+    return re.sub(r'[\[\]"`]', '', name or '').strip().upper()
+
+
+def merge_unique(values: List[str]) -> List[str]:
+    seen = set()
+    merged = []
+    for value in values:
+        key = normalize_object_name(value)
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(value)
+    return merged
+
+
+def merge_transformations(transformations: List[Transformation]) -> List[Transformation]:
+    merged: Dict[tuple, Transformation] = {}
+    for transformation in transformations:
+        key = (normalize_object_name(transformation.name), normalize_object_name(transformation.datamodel))
+        if key not in merged:
+            merged[key] = transformation.model_copy(deep=True)
+            continue
+        existing = merged[key]
+        existing.transformations = existing.transformations + [
+            t for t in transformation.transformations if t not in existing.transformations
+        ]
+    return list(merged.values())
+
+
+def merge_columns(columns: List[Column]) -> List[Column]:
+    merged: Dict[str, Column] = {}
+    for column in columns:
+        key = normalize_object_name(column.name)
+        if key not in merged:
+            merged[key] = column.model_copy(deep=True)
+            continue
+        existing = merged[key]
+        existing.type = existing.type or column.type
+        if column.downstream_columns:
+            existing.downstream_columns = merge_transformations((existing.downstream_columns or []) + column.downstream_columns)
+    return list(merged.values())
+
+
+def merge_two(existing: BaseModel, partial: BaseModel) -> BaseModel:
+    if isinstance(existing, (StoredProcedure, StoredProcedureSimple)):
+        existing.source_objects = merge_unique(existing.source_objects + partial.source_objects)
+        existing.target_objects = merge_unique(existing.target_objects + partial.target_objects)
+        return existing
+
+    existing.type = existing.type or partial.type
+    existing.downstream_models = merge_unique(existing.downstream_models + partial.downstream_models)
+    if isinstance(existing, DataModel):
+        existing.columns = merge_columns(existing.columns + partial.columns)
+    return existing
+
+
+def merge_partial_extractions(partials: List[BaseModel], model_class: Type[BaseModel]) -> List[BaseModel]:
+    """Merges chunk results into one validated object per data model / stored procedure."""
+    merged: Dict[str, BaseModel] = {}
+    for partial in partials:
+        key = normalize_object_name(partial.name)
+        if key not in merged:
+            merged[key] = partial.model_copy(deep=True)
+        else:
+            merged[key] = merge_two(merged[key], partial)
+
+    # Re-validate so every merged object still satisfies the schema
+    return [model_class(**model.model_dump()) for model in merged.values()]
@@ -0,0 +1,260 @@
+"""
+Deterministic fast path that extracts plain DDL without calling the LLM.
+
+It fully handles files that contain exactly one of:
+- a `CREATE TABLE name (column type, ...)` statement
+- a `CREATE VIEW name AS SELECT ... FROM ...` statement whose select list only contains
+  (optionally qualified and renamed) column references, over tables and joins
+
+Anything else (CTEs, subqueries, UNIONs, expressions, literals, `*`, ambiguous columns,
+column definitions that don't follow `type[(args)] [constraints]`, stored procedures, ...)
+returns None and is sent to the LLM as before. The output follows the
+conventions of the extraction prompt, e.g. a renamed column gets the "rename" transformation.
+"""
+import re
+from typing import List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from data_models import Column, DataModel, DataModelSimple, Transformation
+from llm_to_json.sql_chunking import split_sql_statements, strip_comments
+
+IDENTIFIER = r'(?:\[[^\]]+\]|"[^"]+"|`[^`]+`|[A-Za-z_][\w$#@]*)'
+QUALIFIED_NAME = rf'{IDENTIFIER}(?:\s*\.\s*{IDENTIFIER}){{0,3}}'
+
+CREATE_TABLE_PATTERN = re.compile(
+    rf'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?({QUALIFIED_NAME})\s*\((.*)\)\s*[^()]*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+CREATE_VIEW_PATTERN = re.compile(
+    rf'^\s*CREATE\s+(?:OR\s+(?:REPLACE|ALTER)\s+)?VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?({QUALIFIED_NAME})\s+AS\s+SELECT\s+(.*?)\s+FROM\s+(.*?)\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+SELECT_ITEM_PATTERN = re.compile(
+    rf'^(?:({IDENTIFIER})\s*\.\s*)?({IDENTIFIER})(?:\s+(?:AS\s+)?({IDENTIFIER}))?$',
+    re.IGNORECASE
+)
+SOURCE_PATTERN = re.compile(
+    rf'^({QUALIFIED_NAME})(?:\s+(?:AS\s+)?({IDENTIFIER}))?(?:\s+(?:ON|USING)\b.*)?$',
+    re.IGNORECASE | re.DOTALL
+)
+JOIN_PATTERN = re.compile(
+    r'\b(?:(?:INNER|CROSS|NATURAL|(?:LEFT|RIGHT|FULL)(?:\s+OUTER)?)\s+)?JOIN\b',
+    re.IGNORECASE
+)
+FROM_END_PATTERN = re.compile(r'\b(?:WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|QUALIFY|WINDOW)\b', re.IGNORECASE)
+UNSUPPORTED_PATTERN = re.compile(
+    r'\b(?:UNION|INTERSECT|EXCEPT|SELECT\s+TOP|PIVOT|UNPIVOT|LATERAL|APPLY)\b|\(\s*SELECT\b',
+    re.IGNORECASE
+)
+# A single type name with optional (args), nothing else may follow but column constraints.
+# Anything looser, like a missing comma between two columns, is left to the LLM.
+COLUMN_TYPE_PATTERN = re.compile(
+    rf'^((?:(?:TIMESTAMP|TIME)(?:\s*\(\s*\d+\s*\))?\s+WITH(?:OUT)?\s+TIME\s+ZONE'
+    rf'|(?:DOUBLE\s+PRECISION|CHARACTER\s+VARYING|NATIONAL\s+CHARACTER(?:\s+VARYING)?|{IDENTIFIER}(?:\s*\.\s*{IDENTIFIER})?)'
+    rf'(?:\s*\([^()]*\))?))(.*)$',
+    re.IGNORECASE | re.DOTALL
+)
+COLUMN_CONSTRAINT_PATTERN = re.compile(
+    r'\s+(?:NOT\s+NULL|NULL|PRIMARY\s+KEY|DEFAULT|UNIQUE|REFERENCES|CHECK|CONSTRAINT|IDENTITY|AUTO_INCREMENT|'
+    r'AUTOINCREMENT|COLLATE|GENERATED|COMMENT|ENCODE|SPARSE|ROWGUIDCOL)\b.*$',
+    re.IGNORECASE | re.DOTALL
+)
+TABLE_CONSTRAINT_PATTERN = re.compile(
+    r'^(?:CONSTRAINT|PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE|CHECK|INDEX|KEY|PERIOD\s+FOR)\b',
+    re.IGNORECASE
+)
+# Select items that look like column references but are keywords or literals
+LITERAL_KEYWORDS = {
+    "NULL", "TRUE", "FALSE", "DEFAULT", "USER", "SESSION_USER", "SYSTEM_USER",
+    "SYSDATE", "SYSTIMESTAMP", "LOCALTIME", "LOCALTIMESTAMP",
+}
+RESERVED_ALIASES = {"ON", "USING", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "GROUP", "ORDER"}
+
+
+def unquote(identifier: str) -> str:
+    identifier = identifier.strip()
+    if identifier[:1] in ('[', '"', '`'):
+        return identifier[1:-1]
+    return identifier
+
+
+def unquote_qualified(name: str) -> str:
+    parts = re.findall(IDENTIFIER, name)
+    return '.'.join(unquote(part) for part in parts)
+
+
+def split_top_level(text: str, separator: str = ',') -> Optional[List[str]]:
+    """Splits on a separator outside of parentheses and quotes, None if unbalanced."""
+    parts = []
+    depth = 0
+    quote = None
+    current = []
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+        elif char == '[':
+            quote = ']'
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == separator and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if depth != 0 or quote:
+        return None
+    parts.append(''.join(current).strip())
+    return parts
+
+
+def get_single_statement(sql_script: str) -> Optional[str]:
+    statements = [strip_comments(statement).strip() for statement in split_sql_statements(sql_script)]
+    statements = [statement for statement in statements if statement.strip('; \n\t')]
+    if len(statements) != 1:
+        return None
+    return statements[0]
+
+
+def parse_create_table(statement: str, model_class: Type[BaseModel]) -> Optional[BaseModel]:
+    match = CREATE_TABLE_PATTERN.match(statement)
+    if not match:
+        return None
+
+    table_name = unquote_qualified(match.group(1))
+    definitions = split_top_level(match.group(2))
+    if not definitions:
+        return None
+
+    columns = []
+    for definition in definitions:
+        if not definition or TABLE_CONSTRAINT_PATTERN.match(definition):
+            continue
+        column_match = re.match(rf'^({IDENTIFIER})\s+(.+)$', definition, re.DOTALL)
+        if not column_match:
+            return None
+        type_match = COLUMN_TYPE_PATTERN.match(column_match.group(2).strip())
+        if not type_match:
+            return None
+        column_type, remainder = type_match.groups()
+        if remainder.strip() and not COLUMN_CONSTRAINT_PATTERN.match(remainder):
+            return None
+        if re.match(r'^AS\b', column_type, re.IGNORECASE):
+            # Computed columns need the LLM to describe their lineage
+            return None
+        columns.append(Column(name=unquote(column_match.group(1)), type=re.sub(r'\s+', ' ', column_type)))
+
+    if not columns:
+        return None
+    if model_class is DataModelSimple:
+        return DataModelSimple(name=table_name, type="table", downstream_models=[])
+    return DataModel(name=table_name, type="table", columns=columns, downstream_models=[])
+
+
+def is_literal_keyword(identifier: str) -> bool:
+    """NULL, TRUE, CURRENT_TIMESTAMP, ... (unquoted), which are values and not columns."""
+    if identifier[:1] in ('[', '"', '`'):
+        return False
+    keyword = identifier.upper()
+    return keyword in LITERAL_KEYWORDS or keyword.startswith("CURRENT_")
+
+
+def parse_sources(from_clause: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """Returns (table_name, alias) for every table in a FROM clause with only tables and joins."""
+    sources = []
+    for comma_part in split_top_level(from_clause) or []:
+        for segment in JOIN_PATTERN.split(comma_part):
+            segment = segment.strip()
+            if not segment:
+                return None
+            source_match = SOURCE_PATTERN.match(segment)
+            if not source_match:
+                return None
+            alias = source_match.group(2)
+            if alias and alias.upper() in RESERVED_ALIASES:
+                return None
+            sources.append((unquote_qualified(source_match.group(1)), unquote(alias) if alias else None))
+    return sources or None
+
+
+def parse_create_view(statement: str, model_class: Type[BaseModel]) -> Optional[BaseModel]:
+    if UNSUPPORTED_PATTERN.search(statement):
+        return None
+    match = CREATE_VIEW_PATTERN.match(statement)
+    if not match:
+        return None
+
+    view_name = unquote_qualified(match.group(1))
+    from_clause = FROM_END_PATTERN.split(match.group(3), maxsplit=1)[0]
+    sources = parse_sources(from_clause)
+    if sources is None:
+        return None
+
+    downstream_models = []
+    for table_name, _ in sources:
+        if table_name not in downstream_models:
+            downstream_models.append(table_name)
+
+    if model_class is DataModelSimple:
+        return DataModelSimple(name=view_name, type="view", downstream_models=downstream_models)
+
+    select_list = re.sub(r'^DISTINCT\s+', '', match.group(2).strip(), flags=re.IGNORECASE)
+    select_items = split_top_level(select_list)
+    if not select_items:
+        return None
+
+    tables_by_alias = {}
+    for table_name, alias in sources:
+        tables_by_alias[(alias or table_name.split('.')[-1]).upper()] = table_name
+        tables_by_alias[table_name.upper()] = table_name
+
+    columns = []
+    for select_item in select_items:
+        item_match = SELECT_ITEM_PATTERN.match(select_item)
+        if not item_match:
+            return None
+        qualifier, source_column, alias = item_match.groups()
+        if is_literal_keyword(source_column):
+            return None
+        source_column = unquote(source_column)
+
+        if qualifier:
+            table_name = tables_by_alias.get(unquote(qualifier).upper())
+        elif len(sources) == 1:
+            table_name = sources[0][0]
+        else:
+            # Unqualified column over several tables, only the LLM can guess where it comes from
+            return None
+        if table_name is None:
+            return None
+
+        column_name = unquote(alias) if alias else source_column
+        transformations = ["rename"] if column_name.upper() != source_column.upper() else []
+        columns.append(Column(
+            name=column_name,
+            downstream_columns=[Transformation(name=source_column, datamodel=table_name, transformations=transformations)]
+        ))
+
+    return DataModel(name=view_name, type="view", columns=columns, downstream_models=downstream_models)
+
+
+def parse_simple_sql(sql_script: str, model_class: Type[BaseModel]) -> Optional[BaseModel]:
+    """Returns the extraction for a simple table or view, or None if the LLM is needed."""
+    if model_class not in (DataModel, DataModelSimple):
+        return None
+
+    statement = get_single_statement(sql_script)
+    if statement is None:
+        return None
+
+    try:
+        return parse_create_table(statement, model_class) or parse_create_view(statement, model_class)
+    except Exception:
+        return None
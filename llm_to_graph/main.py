@@ -1,13 +1,18 @@
 import datetime
 from llm_to_json.llm_to_json import llm_to_json
 from json_to_graph.json_to_graph import json_to_graph
+from pipeline import run_streaming_pipeline
 from logger import get_logger, logg_print
+from config import DO_STREAMING_PIPELINE
 
 start_time = datetime.datetime.now()
 logger = get_logger()
 
-llm_to_json(logger)
-json_to_graph(logger)
+if DO_STREAMING_PIPELINE:
+    run_streaming_pipeline(logger)
+else:
+    llm_to_json(logger)
+    json_to_graph(logger)
 
 end_time = datetime.datetime.now()
 elapsed = end_time - start_time  # This is a timedelta object
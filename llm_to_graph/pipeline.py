@@ -0,0 +1,141 @@
+"""
+Streaming pipeline that overlaps LLM extraction with graph insertion.
+
+llm_to_json runs in a worker thread and pushes every validated extraction (cache hit,
+fast path or LLM response) onto a bounded asyncio queue. Graph writer tasks consume the
+queue, collect the rows of as many queued files as fit in one bulk insert batch, and write
+them with the bulk writer while extraction continues. A full queue blocks the extraction
+until the writers catch up. Post-processing runs once the queue is drained, so the total
+time approaches max(extraction, insertion) instead of their sum.
+"""
+import asyncio
+import os
+import time
+
+from llm_to_json import llm_to_json as llm_to_json_module
+from llm_to_json.llm_to_json import llm_to_json
+from json_to_graph.json_to_graph import insert_json_data, run_post_processing
+from json_to_graph.neo4j_integration.base_connector import reset_neo4j_database
+from json_to_graph.neo4j_integration.schema import ensure_schema
+from json_to_graph.neo4j_integration.bulk_writer import new_bulk_rows, count_bulk_rows, merge_bulk_rows, write_bulk_rows
+from json_to_graph.run_manifest import add_owned_objects, hash_sql_file, new_manifest_entry, new_objects, save_manifest
+from logger import logg_print
+from config import (
+    BULK_INSERT_BATCH_SIZE,
+    DO_INCREMENTAL_RUN,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_WRITER_WORKERS
+)
+
+# Marks the end of the extraction for one writer
+END_OF_EXTRACTION = None
+
+
+def to_json_data(sql_file_path, parsed_model) -> dict:
+    # Same shape as the response files, so the json_to_graph inserters can be reused
+    return {"metadata": {"sql_file": str(sql_file_path)}, "data": parsed_model.model_dump()}
+
+
+def collect_item_rows(item, logger):
+    """Returns the bulk rows of one queued file, or None when any of its extractions cannot be converted."""
+    sql_file_path, parsed_models, _ = item
+    item_rows = new_bulk_rows()
+    try:
+        for parsed_model in parsed_models:
+            insert_json_data(to_json_data(sql_file_path, parsed_model), logger, item_rows)
+    except Exception as e:
+        logger.error(f"Failed collecting rows for: {sql_file_path} ({e})")
+        return None
+    return item_rows
+
+
+def collect_batch(queue: asyncio.Queue, first_item, logger):
+    """Adds queued files to the batch of `first_item` until it holds a bulk insert batch worth of rows.
+
+    Every file is collected on its own, so a file that fails is logged and left out while the
+    rest of the batch is still written.
+    """
+    items = []
+    bulk_rows = new_bulk_rows()
+    item = first_item
+    while True:
+        item_rows = collect_item_rows(item, logger)
+        if item_rows is not None:
+            merge_bulk_rows(bulk_rows, item_rows)
+            items.append(item)
+        if count_bulk_rows(bulk_rows) >= BULK_INSERT_BATCH_SIZE or queue.empty():
+            return items, bulk_rows, False
+        item = queue.get_nowait()
+        if item is END_OF_EXTRACTION:
+            return items, bulk_rows, True
+
+
+async def graph_writer(queue: asyncio.Queue, stats: dict, logger):
+    while True:
+        item = await queue.get()
+        if item is END_OF_EXTRACTION:
+            return
+
+        items, bulk_rows, done = collect_batch(queue, item, logger)
+        if items:
+            try:
+                stats["rows"] += await asyncio.to_thread(write_bulk_rows, bulk_rows, logger, print_summary=False)
+                stats["files"] += len(items)
+                stats["batches"] += 1
+            except Exception as e:
+                logger.error(f"Failed streaming {len(items)} extractions into the graph: {e}")
+        if done:
+            return
+
+
+def record_manifest_entries(manifest_files: dict, sql_file_path, parsed_models, json_file_paths):
+    file_responses = [
+        (os.path.abspath(json_file_path), to_json_data(sql_file_path, parsed_model))
+        for json_file_path, parsed_model in zip(json_file_paths, parsed_models)
+    ]
+    entry = new_manifest_entry(hash_sql_file(str(sql_file_path)), file_responses)
+    entry["objects"] = new_objects()
+    for _, json_data in file_responses:
+        add_owned_objects(entry["objects"], json_data)
+    manifest_files[str(sql_file_path)] = entry
+
+
+async def streaming_pipeline(logger):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stats = {"files": 0, "batches": 0, "rows": 0}
+    manifest_files = {}
+
+    def on_extraction(sql_file_path, parsed_models, json_file_paths):
+        # Runs on the extraction thread, blocks it while the queue is full
+        if DO_INCREMENTAL_RUN:
+            record_manifest_entries(manifest_files, sql_file_path, parsed_models, json_file_paths)
+        asyncio.run_coroutine_threadsafe(queue.put((sql_file_path, parsed_models, json_file_paths)), loop).result()
+
+    writers = [asyncio.create_task(graph_writer(queue, stats, logger)) for _ in range(max(1, PIPELINE_WRITER_WORKERS))]
+    llm_to_json_module.extraction_listeners.append(on_extraction)
+    try:
+        await asyncio.to_thread(llm_to_json, logger)
+    finally:
+        llm_to_json_module.extraction_listeners.remove(on_extraction)
+        for _ in writers:
+            await queue.put(END_OF_EXTRACTION)
+        await asyncio.gather(*writers)
+
+    return stats, manifest_files
+
+
+def run_streaming_pipeline(logger):
+    logg_print(logger, "----- Streaming LLM to Neo4j ----")
+    logg_print(logger, f"PIPELINE_QUEUE_SIZE: {PIPELINE_QUEUE_SIZE}, PIPELINE_WRITER_WORKERS: {PIPELINE_WRITER_WORKERS}\n")
+    start_time = time.time()
+    ensure_schema(logger, reset_follows=True)
+    reset_neo4j_database()
+
+    stats, manifest_files = asyncio.run(streaming_pipeline(logger))
+    elapsed = time.time() - start_time
+    logg_print(logger, f"🚰 Streamed {stats['files']} extractions into the graph: {stats['rows']} rows in {stats['batches']} batches, {elapsed:.2f}s including extraction")
+
+    run_post_processing(logger)
+    if DO_INCREMENTAL_RUN:
+        save_manifest(manifest_files)
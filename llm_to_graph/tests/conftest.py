@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The modules import each other as top-level packages (config, data_models, llm_to_json, ...)
+LLM_TO_GRAPH_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LLM_TO_GRAPH_DIR)
+# The backend's pure helpers (lineage lookups, paging, serialization) are tested here as well,
+# its top-level packages (neo4j_integration, serialization, ...) don't clash with these
+BACKEND_DIR = os.path.join(os.path.dirname(LLM_TO_GRAPH_DIR), "backend")
+sys.path.append(BACKEND_DIR)
+
+EXAMPLE_SQL_DIR = os.path.join(os.path.dirname(LLM_TO_GRAPH_DIR), "example_sql_scripts")
@@ -0,0 +1,48 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from data_models import DataModel
+from llm_to_json.extraction_cache import ExtractionCache
+
+
+def test_materialized_files_are_recorded_per_output_dir(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite"))
+    cache.set_materialized("stg/a.sql", str(tmp_path / "run_1"), "key", ["run_1/a.sql_response_1.json"])
+
+    assert cache.get_materialized("stg/a.sql", str(tmp_path / "run_1")) == ("key", ["run_1/a.sql_response_1.json"])
+    assert cache.get_materialized("stg/a.sql", str(tmp_path / "run_2")) is None
+
+
+class NullLogger:
+    def warning(self, message):
+        raise AssertionError(message)
+
+
+def test_run_folders_share_one_cache(tmp_path, monkeypatch):
+    # Needs the LLM client dependencies to import
+    llm_to_json = pytest.importorskip("llm_to_json.llm_to_json")
+    monkeypatch.setattr(llm_to_json, "extraction_cache", ExtractionCache(str(tmp_path / "cache.sqlite")))
+    monkeypatch.setattr(llm_to_json, "DEFAULT_EXTRACTION_DIR", str(tmp_path))
+    sql_file_path = Path("stg/a.sql")
+    models = [DataModel(name="a", type="table", columns=[], downstream_models=[])]
+
+    monkeypatch.setattr(llm_to_json, "PATH_EXTRACTION_RUNS", "run_1")
+    [first_run_file] = llm_to_json.write_extraction_files(models, sql_file_path, "key", 1, NullLogger())
+
+    # Same extraction in a new run folder: written there, not pointed at the first run
+    monkeypatch.setattr(llm_to_json, "PATH_EXTRACTION_RUNS", "run_2")
+    [second_run_file] = llm_to_json.write_extraction_files(models, sql_file_path, "key", 1, NullLogger())
+    assert second_run_file == os.path.join(str(tmp_path), "run_2", "stg", "a.sql_response_1.json")
+    assert os.path.exists(second_run_file)
+
+    # A changed extraction only replaces the files of its own run folder
+    [changed_file] = llm_to_json.write_extraction_files(models, sql_file_path, "other key", 2, NullLogger())
+    assert os.path.exists(changed_file)
+    assert not os.path.exists(second_run_file)
+    assert os.path.exists(first_run_file)
+
+    # Back in the first run folder, its files are still up to date for the first key
+    monkeypatch.setattr(llm_to_json, "PATH_EXTRACTION_RUNS", "run_1")
+    assert llm_to_json.write_extraction_files(models, sql_file_path, "key", 1, NullLogger()) == [first_run_file]
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from test_lineage_index import bfs, random_graph
+from json_to_graph.lineage_index import build_lineage_index
+
+# Needs the backend requirements (neo4j, python-dotenv)
+lineage_engine = pytest.importorskip("neo4j_integration.lineage_engine")
+
+
+class FakeLineageGraph:
+    """Answers lineage_engine's queries from the labels of build_lineage_index."""
+
+    def __init__(self, node_count, edges, max_intervals):
+        self.edges = edges
+        self.labels, _, self.overflowed = build_lineage_index(node_count, edges, max_intervals)
+        self.component_edges = {
+            (self.labels[source]["component"], self.labels[target]["component"])
+            for source, target in edges
+            if self.labels[source]["component"] != self.labels[target]["component"]
+        }
+        self.queries = []
+
+    async def run_read_query(self, query, **params):
+        self.queries.append(query)
+        outgoing = "]->(next)" in query
+        if "{name: $name}" in query:
+            return [{"id": params["name"]}]
+        if "AS intervals" in query:
+            key = "out_intervals" if "lineage_out" in query else "in_intervals"
+            return [{"intervals": self.labels[int(id)][key]} for id in params["ids"]]
+        if "AS component" in query and "$ids" in query:
+            return [{"component": self.labels[int(id)]["component"]} for id in params["ids"]]
+        if "LineageComponent" in query:
+            return [
+                {"component": target if outgoing else source}
+                for source, target in self.component_edges
+                if (source if outgoing else target) in params["components"]
+            ]
+        if "$values" in query:
+            return [
+                {"id": str(node)} for node, label in enumerate(self.labels)
+                if any(self.matches(label, value, query) for value in params["values"])
+            ]
+        if "frontier_id" in query:
+            rows = []
+            for id in params["ids"]:
+                for source, target in self.edges:
+                    frontier, next_node = (source, target) if outgoing else (target, source)
+                    if frontier == int(id):
+                        rows.append({
+                            "frontier_id": id, "next_id": str(next_node),
+                            "frontier_name": id, "next_name": str(next_node),
+                            "frontier_is_procedure": False, "next_is_procedure": False,
+                            "line_mode": None, "drawn": None,
+                        })
+            return rows
+        raise AssertionError(query)
+
+    @staticmethod
+    def matches(label, value, query):
+        if "lineage_component = value" in query:
+            return label["component"] == value
+        position = label["topo"] if "lineage_topo" in query else label["rtopo"]
+        return value[0] <= position <= value[1]
+
+
+def reachable(graph, monkeypatch, start, direction):
+    monkeypatch.setattr(lineage_engine, "run_read_query", graph.run_read_query)
+
+    async def has_lineage_index():
+        return True
+    monkeypatch.setattr(lineage_engine, "has_lineage_index", has_lineage_index)
+    return asyncio.run(lineage_engine.reachable([str(start)], ["DataModel"], "UPSTREAM_MODEL", direction))
+
+
+def test_lookup_and_component_fallback_match_bfs(monkeypatch):
+    for seed in range(100):
+        node_count, edges = random_graph(seed)
+        # A cap of 1 leaves most branching nodes to the condensed graph walk
+        for max_intervals in (node_count, 1):
+            graph = FakeLineageGraph(node_count, edges, max_intervals)
+            for start in range(node_count):
+                for direction, graph_edges in (("out", edges), ("in", [(t, s) for s, t in edges])):
+                    ids, found_edges = reachable(graph, monkeypatch, start, direction)
+                    expected = bfs(node_count, graph_edges, start)
+                    assert ids == {str(node) for node in expected}, (seed, start, direction)
+                    assert set(found_edges) == {
+                        (str(source), str(target)) for source, target in edges
+                        if (source if direction == "out" else target) in expected
+                    }
+
+
+def test_overflowed_start_walks_the_condensed_graph(monkeypatch):
+    edges = [(0, 1), (2, 1), (2, 3), (0, 4), (4, 5), (5, 4)]
+    graph = FakeLineageGraph(6, edges, max_intervals=1)
+    assert graph.labels[2]["out_intervals"] is None
+
+    ids, found_edges = reachable(graph, monkeypatch, 2, "out")
+    assert ids == {"1", "2", "3"}
+    assert set(found_edges) == {("2", "1"), ("2", "3")}
+    assert any("LineageComponent" in query for query in graph.queries)
+
+    graph.queries.clear()
+    ids, found_edges = reachable(graph, monkeypatch, 5, "in")
+    assert ids == {"0", "4", "5"}
+    assert set(found_edges) == {("0", "4"), ("4", "5"), ("5", "4")}
+    assert any("LineageComponent" in query for query in graph.queries)
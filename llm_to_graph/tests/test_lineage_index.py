@@ -0,0 +1,85 @@
+import random
+from collections import deque
+
+from json_to_graph.lineage_index import build_lineage_index, merge_intervals
+
+
+def random_graph(seed, max_nodes=12):
+    rng = random.Random(seed)
+    node_count = rng.randint(1, max_nodes)
+    edges = {
+        (rng.randrange(node_count), rng.randrange(node_count))
+        for _ in range(rng.randint(0, node_count * 2))
+    }
+    return node_count, [(source, target) for source, target in edges if source != target]
+
+
+def bfs(node_count, edges, start):
+    neighbours = [[] for _ in range(node_count)]
+    for source, target in edges:
+        neighbours[source].append(target)
+    reached = {start}
+    queue = deque([start])
+    while queue:
+        for target in neighbours[queue.popleft()]:
+            if target not in reached:
+                reached.add(target)
+                queue.append(target)
+    return reached
+
+
+def in_intervals(position, flat_intervals):
+    return any(flat_intervals[i] <= position <= flat_intervals[i + 1] for i in range(0, len(flat_intervals), 2))
+
+
+def labelled_set(labels, node, direction):
+    intervals_key, position_key = ("out_intervals", "topo") if direction == "out" else ("in_intervals", "rtopo")
+    return {
+        other for other, label in enumerate(labels)
+        if in_intervals(label[position_key], labels[node][intervals_key])
+    }
+
+
+def test_merge_intervals_joins_overlapping_and_adjacent():
+    assert merge_intervals([[(5, 6)], [(1, 2), (3, 3)], [(8, 9), (6, 7)]]) == [(1, 3), (5, 9)]
+
+
+def test_labels_match_bfs_on_cyclic_graphs():
+    for seed in range(300):
+        node_count, edges = random_graph(seed)
+        reverse_edges = [(target, source) for source, target in edges]
+        labels, component_count, overflowed = build_lineage_index(node_count, edges, max_intervals=node_count)
+        assert overflowed == 0
+
+        reached = [bfs(node_count, edges, node) for node in range(node_count)]
+        for node in range(node_count):
+            assert labelled_set(labels, node, "out") == reached[node], seed
+            assert labelled_set(labels, node, "in") == bfs(node_count, reverse_edges, node), seed
+            # Same component exactly when both reach each other
+            for other in range(node_count):
+                same_component = labels[node]["component"] == labels[other]["component"]
+                assert same_component == (other in reached[node] and node in reached[other]), seed
+
+        assert component_count == len({label["component"] for label in labels})
+        for source, target in edges:
+            if labels[source]["component"] != labels[target]["component"]:
+                assert labels[source]["topo"] < labels[target]["topo"]
+                assert labels[target]["rtopo"] < labels[source]["rtopo"]
+
+
+def test_nodes_over_the_interval_cap_are_not_labelled():
+    # 2 reaches 1 and 3, which are not next to each other in any DFS numbering
+    edges = [(0, 1), (2, 1), (2, 3), (0, 4), (4, 5), (5, 4)]
+    reverse_edges = [(target, source) for source, target in edges]
+    labels, _, overflowed = build_lineage_index(6, edges, max_intervals=1)
+
+    unlabelled = {node for node, label in enumerate(labels) if label["out_intervals"] is None or label["in_intervals"] is None}
+    assert overflowed == len(unlabelled)
+    assert labels[2]["out_intervals"] is None
+    # The cycle shares one label, so both of its nodes overflow together
+    assert labels[4]["in_intervals"] is None and labels[5]["in_intervals"] is None
+    for node, label in enumerate(labels):
+        if label["out_intervals"] is not None:
+            assert labelled_set(labels, node, "out") == bfs(6, edges, node)
+        if label["in_intervals"] is not None:
+            assert labelled_set(labels, node, "in") == bfs(6, reverse_edges, node)
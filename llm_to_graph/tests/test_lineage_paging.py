@@ -0,0 +1,82 @@
+import pytest
+
+# Needs the backend requirements (neo4j, python-dotenv)
+lineage_paging = pytest.importorskip("neo4j_integration.lineage_paging")
+
+HOPS = {"start": 0, "b": 1, "a": 1, "c": 2, "d": 2}
+ORDER = ["start", "a", "b", "c", "d"]
+EDGE_ROWS = [
+    {"source": "start", "target": "a"},
+    {"source": "b", "target": "start"},
+    {"source": "a", "target": "c"},
+    {"source": "d", "target": "b"},
+    {"source": "c", "target": "d"},
+]
+
+
+def page_through(limit):
+    pages, cursor = [], None
+    while True:
+        page, page_edge_rows, cursor = lineage_paging.paginate(ORDER, HOPS, EDGE_ROWS, limit, cursor)
+        pages.append((page, page_edge_rows, cursor))
+        if cursor is None:
+            return pages
+
+
+def test_pages_follow_hops_and_name():
+    pages = page_through(2)
+
+    assert [page for page, _, _ in pages] == [["start", "a"], ["b", "c"], ["d"]]
+    assert [cursor for _, _, cursor in pages] == ["1:a", "2:c", None]
+
+
+def test_edges_arrive_once_with_their_later_node():
+    seen_nodes, seen_edges = set(), []
+    for page, page_edge_rows, _ in page_through(2):
+        seen_nodes.update(page)
+        for row in page_edge_rows:
+            assert row["source"] in seen_nodes and row["target"] in seen_nodes
+        seen_edges += page_edge_rows
+
+    assert sorted(map(str, seen_edges)) == sorted(map(str, EDGE_ROWS))
+
+
+def test_single_page_without_limit():
+    page, page_edge_rows, cursor = lineage_paging.paginate(ORDER, HOPS, EDGE_ROWS, None, None)
+
+    assert page == ORDER
+    assert page_edge_rows == EDGE_ROWS
+    assert cursor is None
+
+
+def test_limit_covering_the_rest_is_the_last_page():
+    page, _, cursor = lineage_paging.paginate(ORDER, HOPS, EDGE_ROWS, 3, "1:a")
+
+    assert page == ["b", "c", "d"]
+    assert cursor is None
+
+
+def test_cursor_is_a_position_in_the_order_not_an_offset():
+    # "aa" appeared since the previous page, the next page still starts after "a"
+    hops = {**HOPS, "aa": 1}
+    order = ["start", "a", "aa", "b", "c", "d"]
+
+    page, _, cursor = lineage_paging.paginate(order, hops, EDGE_ROWS, 2, "1:a")
+
+    assert page == ["aa", "b"]
+    assert cursor == "1:b"
+
+
+def test_names_with_colons_round_trip():
+    assert lineage_paging.parse_cursor(lineage_paging.format_cursor(3, "db:schema.t")) == (3, "db:schema.t")
+
+
+def test_add_hops_marks_expandable_nodes():
+    elements = [{"data": {"name": "c"}}, {"data": {"name": "start"}}]
+
+    lineage_paging.add_hops(elements, HOPS, {"c"})
+
+    assert [element["data"] for element in elements] == [
+        {"name": "start", "hops": 0, "has_more": False},
+        {"name": "c", "hops": 2, "has_more": True},
+    ]
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from data_models import DataModel, StoredProcedure
+
+# Needs the LLM client and neo4j dependencies to import
+pipeline = pytest.importorskip("pipeline")
+bulk_writer = pytest.importorskip("json_to_graph.neo4j_integration.bulk_writer")
+
+
+class BrokenModel:
+    def model_dump(self):
+        raise ValueError("broken extraction")
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, message):
+        self.errors.append(message)
+
+
+def queued(*items):
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    return queue
+
+
+def test_a_failing_file_is_skipped_and_the_rest_of_the_batch_kept():
+    good_a = ("a.sql", [DataModel(name="db.s.a", type="table", columns=[], downstream_models=["db.s.src"])], [])
+    bad = ("bad.sql", [DataModel(name="db.s.b", type="table", columns=[], downstream_models=[]), BrokenModel()], [])
+    good_c = ("c.sql", [DataModel(name="db.s.c", type="view", columns=[], downstream_models=[])], [])
+    logger = RecordingLogger()
+
+    items, bulk_rows, done = pipeline.collect_batch(queued(bad, good_c, pipeline.END_OF_EXTRACTION), good_a, logger)
+
+    assert items == [good_a, good_c]
+    assert done
+    # Nothing of the failing file leaks into the batch, not even its first model
+    assert list(bulk_rows["datamodels"]) == [bulk_writer.get_object_row(name)["name"] for name in ("db.s.a", "db.s.c")]
+    assert len(logger.errors) == 1 and "bad.sql" in logger.errors[0]
+
+
+def test_merged_rows_match_rows_collected_in_one_batch():
+    models = [
+        StoredProcedure(name="db.s.load", source_objects=["db.s.src"], target_objects=["other.s.dst"]),
+        DataModel(name="db.s.view", type="view", columns=[], downstream_models=["db.s.src", "other.s.dst"]),
+    ]
+    direct_rows = bulk_writer.new_bulk_rows()
+    merged_rows = bulk_writer.new_bulk_rows()
+    # The view references db.s.src without is_external, it keeps the one the procedure set
+    for model in models:
+        pipeline.insert_json_data(pipeline.to_json_data("x.sql", model), None, direct_rows)
+        item_rows = bulk_writer.new_bulk_rows()
+        pipeline.insert_json_data(pipeline.to_json_data("x.sql", model), None, item_rows)
+        bulk_writer.merge_bulk_rows(merged_rows, item_rows)
+
+    assert merged_rows == direct_rows
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from llm_to_json import rate_scheduler
+from llm_to_json.rate_scheduler import RateScheduler, TokenBucket, is_throttling_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)  # one per second
+    bucket.consume(60)
+
+    assert bucket.wait_time(1) == pytest.approx(1)
+    clock.advance(0.5)
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert bucket.wait_time(1) == 0
+
+    clock.advance(3600)
+    bucket.refill()
+    assert bucket.tokens == 60
+
+
+def test_requests_larger_than_the_bucket_wait_for_a_full_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(600, clock)
+    bucket.consume(300)
+
+    assert bucket.wait_time(10_000) == pytest.approx(30)
+
+
+def test_reserve_enforces_the_tokens_per_minute_budget():
+    clock = FakeClock()
+    scheduler = RateScheduler(requests_per_minute=1000, tokens_per_minute=600, max_concurrency=4, clock=clock)
+
+    assert scheduler.reserve(400) == 0
+    # 200 tokens left, 10 per second
+    assert scheduler.reserve(400) == pytest.approx(20)
+    clock.advance(20)
+    assert scheduler.reserve(400) == 0
+    assert scheduler.request_count == 2
+
+
+def test_reserve_enforces_the_requests_per_minute_budget():
+    clock = FakeClock()
+    scheduler = RateScheduler(requests_per_minute=2, tokens_per_minute=10_000, max_concurrency=4, clock=clock)
+
+    assert scheduler.reserve(1) == 0
+    assert scheduler.reserve(1) == 0
+    assert scheduler.reserve(1) == pytest.approx(30)
+
+
+def test_throttling_halves_concurrency_and_drains_the_request_bucket():
+    clock = FakeClock()
+    scheduler = RateScheduler(requests_per_minute=60, tokens_per_minute=10_000, max_concurrency=8, min_concurrency=2, clock=clock)
+
+    scheduler.on_throttle()
+    assert scheduler.concurrency_limit == 4
+    assert scheduler.reserve(1) > 0
+
+    scheduler.on_throttle()
+    scheduler.on_throttle()
+    assert scheduler.concurrency_limit == 2
+    assert scheduler.throttle_count == 3
+
+
+def test_healthy_responses_grow_concurrency_by_one_per_window():
+    scheduler = RateScheduler(requests_per_minute=60, tokens_per_minute=10_000, max_concurrency=4, clock=FakeClock())
+    scheduler.on_throttle()
+    assert scheduler.concurrency_limit == 2
+
+    scheduler.on_success(1.0)
+    assert scheduler.concurrency_limit == 2
+    scheduler.on_success(1.0)
+    assert scheduler.concurrency_limit == 3
+    for _ in range(3):
+        scheduler.on_success(1.0)
+    assert scheduler.concurrency_limit == 4
+    for _ in range(10):
+        scheduler.on_success(1.0)
+    assert scheduler.concurrency_limit == 4
+
+
+def test_degraded_latency_shrinks_concurrency_by_one():
+    scheduler = RateScheduler(requests_per_minute=60, tokens_per_minute=10_000, max_concurrency=8, clock=FakeClock())
+    scheduler.on_success(1.0)
+
+    # Average 0.8 * 1 + 0.2 * 10 = 2.8, over twice the baseline of 1
+    scheduler.on_success(10.0)
+    assert scheduler.concurrency_limit == 7
+    scheduler.on_success(10.0)
+    assert scheduler.concurrency_limit == 6
+
+
+def test_run_retries_throttled_requests(monkeypatch):
+    clock = FakeClock()
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        clock.advance(seconds)
+    monkeypatch.setattr(rate_scheduler.asyncio, "sleep", sleep)
+    scheduler = RateScheduler(requests_per_minute=60, tokens_per_minute=10_000, max_concurrency=8, clock=clock)
+    scheduler.backoff_time = lambda retry: 0
+    responses = iter([Exception("429 Too Many Requests"), "response"])
+
+    async def request():
+        clock.advance(1)
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert asyncio.run(scheduler.run(request, 10)) == "response"
+    # The throttle drained the request bucket, the retry waited for one request (1s at 60/min)
+    assert sleeps == [0, pytest.approx(1)]
+    assert scheduler.throttle_count == 1
+    assert scheduler.concurrency_limit == 4
+    assert scheduler.average_latency == pytest.approx(1)
+
+
+def test_run_sync_raises_other_errors_right_away():
+    scheduler = RateScheduler(requests_per_minute=1000, tokens_per_minute=10_000, max_concurrency=8, clock=FakeClock())
+
+    def request():
+        raise ValueError("invalid output")
+
+    with pytest.raises(ValueError):
+        scheduler.run_sync(request, 10)
+    assert scheduler.throttle_count == 0
+    assert not is_throttling_error(ValueError("invalid output"))
+    assert is_throttling_error(RuntimeError("ResourceExhausted: quota"))
@@ -0,0 +1,105 @@
+import pytest
+
+# Needs the backend requirements (orjson, fastapi)
+serialization = pytest.importorskip("serialization")
+
+PAYLOAD = {
+    "elements": [
+        {"data": {"id": "dwh.stg.a", "name": "dwh.stg.a", "node_type": "ROOT", "type": "table", "hops": 0, "has_more": False}, "group": "nodes"},
+        {"data": {"id": "dwh.stg.p", "name": "dwh.stg.p", "node_type": "StoredProcedure", "type": None, "hops": 1, "has_more": True}, "group": "nodes"},
+        {"data": {"id": "dwh.stg.b", "name": "dwh.stg.b", "hops": 1}, "group": "nodes"},
+        {"data": {"source": "dwh.stg.a", "target": "dwh.stg.p", "id": "dwh.stg.a.dwh.stg.p", "line_mode": None}, "group": "edges"},
+        {"data": {"source": "dwh.stg.p", "target": "dwh.stg.b", "id": "dwh.stg.p.dwh.stg.b", "line_mode": "dash"}, "group": "edges"},
+    ],
+    "next_cursor": "1:dwh.stg.b",
+}
+
+# Also the fixture of frontend/src/app/services/data.service.spec.ts, keep both in sync
+COMPACT = {
+    "next_cursor": "1:dwh.stg.b",
+    "format": "compact",
+    "strings": ["dwh.stg.a", "dwh.stg.p", "dwh.stg.b", "ROOT", "StoredProcedure", "table", "dwh.stg.a.dwh.stg.p", "dwh.stg.p.dwh.stg.b", "dash"],
+    "nodes": {
+        "count": 3,
+        "columns": {
+            "id": [0, 1, 2],
+            "name": [0, 1, 2],
+            "node_type": [3, 4, None],
+            "type": [5, None, None],
+            "hops": [0, 1, 1],
+            "has_more": [False, True, None],
+        },
+        "encoded": ["id", "name", "node_type", "type"],
+    },
+    "edges": {
+        "count": 2,
+        "columns": {"source": [0, 1], "target": [1, 2], "id": [6, 7], "line_mode": [None, 8]},
+        "encoded": ["source", "target", "id", "line_mode"],
+    },
+}
+
+
+def expand_compact(response):
+    """Python port of expandCompact in frontend/src/app/services/data.service.ts."""
+    if response.get("format") != "compact":
+        return response
+    rest = {key: value for key, value in response.items() if key not in ("strings", "nodes", "edges", "format")}
+
+    def expand(table, group):
+        encoded = set(table["encoded"])
+        return [
+            {
+                "data": {
+                    key: response["strings"][values[i]] if key in encoded and values[i] is not None else values[i]
+                    for key, values in table["columns"].items()
+                },
+                "group": group,
+            }
+            for i in range(table["count"])
+        ]
+    return {**rest, "elements": expand(response["nodes"], "nodes") + expand(response["edges"], "edges")}
+
+
+def with_missing_as_null(payload):
+    """What the expansion gives back: every element of a group has all keys of its group."""
+    elements = []
+    for group in ("nodes", "edges"):
+        rows = [element["data"] for element in payload["elements"] if element["group"] == group]
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        elements += [{"data": {key: row.get(key) for key in keys}, "group": group} for row in rows]
+    return {**payload, "elements": elements}
+
+
+def test_to_compact_output():
+    assert serialization.to_compact(PAYLOAD) == COMPACT
+
+
+def test_round_trip_restores_elements_with_missing_properties_as_null():
+    expanded = expand_compact(serialization.to_compact(PAYLOAD))
+
+    assert expanded == with_missing_as_null(PAYLOAD)
+    assert expanded["elements"][2]["data"] == {
+        "id": "dwh.stg.b", "name": "dwh.stg.b", "node_type": None, "type": None, "hops": 1, "has_more": None,
+    }
+
+
+def test_strings_are_stored_once_and_mixed_columns_as_they_are():
+    payload = {"elements": [
+        {"data": {"id": "a", "name": "a", "size": 3}, "group": "nodes"},
+        {"data": {"id": "b", "name": "b", "size": "3"}, "group": "nodes"},
+        {"data": {"id": "a.b", "source": "a", "target": "b"}, "group": "edges"},
+    ]}
+    compact = serialization.to_compact(payload)
+
+    assert compact["strings"] == ["a", "b", "a.b"]
+    assert compact["nodes"]["columns"]["size"] == [3, "3"]
+    assert "size" not in compact["nodes"]["encoded"]
+    assert expand_compact(compact) == payload
+
+
+def test_empty_payload_round_trips():
+    assert expand_compact(serialization.to_compact({"elements": []})) == {"elements": []}
+
+
+def test_other_responses_are_not_expanded():
+    assert expand_compact(PAYLOAD) is PAYLOAD
@@ -0,0 +1,38 @@
+from llm_to_json.sql_chunking import split_into_object_units
+
+
+def test_one_unit_per_create_statement():
+    units = split_into_object_units(
+        "CREATE TABLE dbo.a (id INT);\n"
+        "INSERT INTO dbo.a VALUES (1);\n"
+        "CREATE VIEW dbo.v AS SELECT id FROM dbo.a;\n"
+    )
+    assert len(units) == 2
+    assert units[0].startswith("CREATE TABLE dbo.a")
+    assert "INSERT INTO dbo.a" in units[0]
+    assert units[1].startswith("CREATE VIEW dbo.v")
+
+
+def test_procedure_without_begin_end_keeps_its_temp_table():
+    units = split_into_object_units(
+        "CREATE PROCEDURE dbo.p AS SET NOCOUNT ON;\n"
+        "CREATE TABLE #tmp (id INT);\n"
+        "INSERT INTO #tmp SELECT id FROM dbo.a;\n"
+        "INSERT INTO dbo.b SELECT id FROM #tmp;\n"
+    )
+    assert len(units) == 1
+    assert "CREATE TABLE #tmp" in units[0]
+
+
+def test_procedure_ends_at_go_and_next_procedure():
+    units = split_into_object_units(
+        "CREATE PROCEDURE dbo.p1 AS SET NOCOUNT ON;\n"
+        "CREATE TABLE #tmp (id INT);\n"
+        "CREATE PROCEDURE dbo.p2 AS SELECT 1;\n"
+        "GO\n"
+        "CREATE TABLE dbo.t (id INT);\n"
+    )
+    assert len(units) == 3
+    assert units[0].startswith("CREATE PROCEDURE dbo.p1") and "#tmp" in units[0]
+    assert units[1].startswith("CREATE PROCEDURE dbo.p2")
+    assert units[2].startswith("CREATE TABLE dbo.t")
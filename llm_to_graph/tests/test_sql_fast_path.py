@@ -0,0 +1,53 @@
+import os
+
+from conftest import EXAMPLE_SQL_DIR
+from data_models import DataModel, DataModelSimple
+from llm_to_json.sql_fast_path import parse_simple_sql
+
+
+def read_example(*path):
+    with open(os.path.join(EXAMPLE_SQL_DIR, *path), encoding="utf-8") as file:
+        return file.read()
+
+
+def test_create_table_columns_and_types():
+    result = parse_simple_sql(read_example("Burger", "stg", "get_spices.sql"), DataModel)
+    assert result.type == "table"
+    assert [column.type for column in result.columns] == ["INT", "VARCHAR(255)", "INT"]
+
+
+def test_missing_comma_goes_to_llm():
+    # CheeseType VARCHAR(255) is not followed by a comma, so IsSliced would be swallowed
+    assert parse_simple_sql(read_example("Burger", "stg", "get_cheese.sql"), DataModel) is None
+    assert parse_simple_sql(read_example("Burger", "stg", "get_cheese.sql"), DataModelSimple) is None
+
+
+def test_multi_word_types_and_constraints():
+    result = parse_simple_sql(
+        "CREATE TABLE dbo.t (a INT NOT NULL PRIMARY KEY, b DOUBLE PRECISION, "
+        "c TIMESTAMP(3) WITH TIME ZONE DEFAULT now(), d [nvarchar](50) NULL, CONSTRAINT pk PRIMARY KEY (a))",
+        DataModel
+    )
+    assert [(column.name, column.type) for column in result.columns] == [
+        ("a", "INT"), ("b", "DOUBLE PRECISION"), ("c", "TIMESTAMP(3) WITH TIME ZONE"), ("d", "[nvarchar](50)")
+    ]
+
+
+def test_unknown_type_suffix_goes_to_llm():
+    assert parse_simple_sql("CREATE TABLE t (a INT, b VARCHAR(10) c INT)", DataModel) is None
+
+
+def test_computed_column_goes_to_llm():
+    assert parse_simple_sql("CREATE TABLE t (a INT, b AS (a + 1))", DataModel) is None
+
+
+def test_view_column_lineage():
+    result = parse_simple_sql("CREATE VIEW v AS SELECT t.id, t.name AS label FROM dbo.t t", DataModel)
+    assert [(column.name, column.downstream_columns[0].name, column.downstream_columns[0].transformations)
+            for column in result.columns] == [("id", "id", []), ("label", "name", ["rename"])]
+
+
+def test_view_literals_go_to_llm():
+    for select_item in ["CURRENT_TIMESTAMP AS loaded_at", "NULL AS x", "TRUE AS flag", "SYSDATE AS d", "1 AS one", "'a' AS s"]:
+        sql = f"CREATE VIEW v AS SELECT id, {select_item} FROM dbo.t"
+        assert parse_simple_sql(sql, DataModel) is None, select_item
@@ -0,0 +1,177 @@
+import random
+from collections import deque
+
+import pytest
+
+from json_to_graph.type_propagation import build_adjacency, propagate_types
+
+
+def propagate_like_cypher(types, edges, seeds):
+    """The queue of the former per-column Cypher propagation, on plain lists."""
+    types = list(types)
+    visited = set()
+    queue = deque((seed, types[seed]) for seed in seeds)
+    while queue:
+        current, current_type = queue.popleft()
+        if current in visited:
+            continue
+        visited.add(current)
+        for target in [target for source, target in edges if source == current and types[target] is None]:
+            types[target] = current_type
+            queue.append((target, current_type))
+    return types
+
+
+def apply(types, updates):
+    types = list(types)
+    for index, column_type in updates:
+        types[index] = column_type
+    return types
+
+
+def test_build_adjacency_keeps_the_edge_order_per_source():
+    offsets, targets = build_adjacency(4, [(2, 0), (0, 3), (2, 1), (0, 1)])
+
+    assert list(offsets) == [0, 2, 2, 4, 4]
+    assert list(targets[offsets[0]:offsets[1]]) == [3, 1]
+    assert list(targets[offsets[2]:offsets[3]]) == [0, 1]
+
+
+def test_first_seed_to_reach_a_column_wins():
+    # 0 (INT) -> 2 -> 3 and 1 (TEXT) -> 3: 3 is one hop from 1 but two from 0
+    types = ["INT", "TEXT", None, None]
+    offsets, targets = build_adjacency(4, [(0, 2), (2, 3), (1, 3)])
+
+    assert apply(types, propagate_types(types, offsets, targets, [0, 1])) == ["INT", "TEXT", "INT", "TEXT"]
+    # Equal distance: seed order decides
+    offsets, targets = build_adjacency(3, [(0, 2), (1, 2)])
+    assert apply(["INT", "TEXT", None], propagate_types(["INT", "TEXT", None], offsets, targets, [1, 0])) == ["INT", "TEXT", "TEXT"]
+
+
+def test_typed_columns_are_never_overwritten_and_cycles_end():
+    types = ["INT", None, "DATE", None]
+    offsets, targets = build_adjacency(4, [(0, 1), (1, 2), (2, 3), (3, 1), (1, 0)])
+
+    updates = propagate_types(types, offsets, targets, [0, 2])
+
+    assert updates == [(1, "INT"), (3, "DATE")]
+    assert types == ["INT", None, "DATE", None]
+
+
+def test_matches_the_cypher_propagation_on_random_graphs():
+    rng = random.Random(0)
+    for _ in range(300):
+        node_count = rng.randint(1, 15)
+        edges = [(rng.randrange(node_count), rng.randrange(node_count)) for _ in range(rng.randint(0, 3 * node_count))]
+        types = [rng.choice([None, None, "INT", "TEXT", "DATE"]) for _ in range(node_count)]
+        seeds = [index for index, column_type in enumerate(types) if column_type is not None]
+        rng.shuffle(seeds)
+
+        offsets, targets = build_adjacency(node_count, edges)
+        assert apply(types, propagate_types(types, offsets, targets, seeds)) == propagate_like_cypher(types, edges, seeds)
+
+
+class FakeColumnGraph:
+    """The Neo4j side of propagate_column_types, element ids are the column names."""
+
+    def __init__(self, types, edges):
+        self.columns = {name: {"type": column_type, "is_type_updated": False} for name, column_type in types.items()}
+        self.edges = edges
+
+    def downstream(self, names):
+        reached = list(dict.fromkeys(names))
+        for name in reached:
+            reached += [target for source, target in self.edges if source == name and target not in reached]
+        return reached
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute_write(self, write, rows):
+        write(self, rows)
+
+    def consume(self):
+        pass
+
+    def run(self, query, params=None):
+        params = params or {}
+        if "UNWIND $rows" in query:
+            for row in params["rows"]:
+                self.columns[row["id"]].update(type=row["type"], is_type_updated=True)
+            return self
+        if "SET d.type = null" in query:
+            reset = [name for name in self.downstream(params["names"]) if self.columns[name]["is_type_updated"]]
+            for name in reset:
+                self.columns[name].update(type=None, is_type_updated=False)
+            return [{"name": name} for name in reset]
+        if "UNION" in query:
+            typed = [name for name in params["names"] if self.columns[name]["type"] is not None]
+            upstream = [
+                source for source, target in self.edges
+                if target in params["names"] and self.columns[source]["type"] is not None
+            ]
+            return [{"id": name} for name in dict.fromkeys(typed + upstream)]
+        if "$seed_ids" in query:
+            return [{"id": name, "type": self.columns[name]["type"]} for name in self.downstream(params["seed_ids"])]
+        if "c.type AS type" in query:
+            return [{"id": name, "type": column["type"]} for name, column in self.columns.items()]
+        if "UNWIND $ids" in query:
+            return [{"source": source, "target": target} for source, target in self.edges if source in params["ids"]]
+        if "AS target" in query:
+            return [{"source": source, "target": target} for source, target in self.edges]
+        raise AssertionError(query)
+
+    def types(self):
+        return {name: column["type"] for name, column in self.columns.items()}
+
+
+@pytest.fixture
+def propagation(monkeypatch):
+    # Needs the Neo4j driver and python-dotenv to import
+    module = pytest.importorskip("json_to_graph.neo4j_integration.post_processing.propagate_column_types")
+
+    def run(graph, column_names=None):
+        monkeypatch.setattr(module, "driver", graph)
+        module.propagate_column_types(NullLogger(), column_names)
+    return run
+
+
+class NullLogger:
+    def info(self, message):
+        pass
+
+
+def test_scoped_run_resets_and_repropagates_only_the_neighbourhood(propagation):
+    # a -> b -> c, d -> e, and the explicitly typed f downstream of c
+    graph = FakeColumnGraph(
+        {"a": "INT", "b": None, "c": None, "d": "TEXT", "e": None, "f": "DATE"},
+        [("a", "b"), ("b", "c"), ("d", "e"), ("c", "f")]
+    )
+    propagation(graph)
+    assert graph.types() == {"a": "INT", "b": "INT", "c": "INT", "d": "TEXT", "e": "TEXT", "f": "DATE"}
+
+    # `a` was loaded again with another type
+    graph.columns["a"]["type"] = "BIGINT"
+    propagation(graph, ["a"])
+
+    assert graph.types() == {"a": "BIGINT", "b": "BIGINT", "c": "BIGINT", "d": "TEXT", "e": "TEXT", "f": "DATE"}
+    assert graph.columns["f"]["is_type_updated"] is False
+
+
+def test_scoped_run_seeds_from_typed_columns_upstream_of_reset_ones(propagation):
+    # b was typed from a, and z reaches c directly
+    graph = FakeColumnGraph({"a": "INT", "b": None, "c": None, "z": "TEXT"}, [("a", "b"), ("b", "c"), ("z", "c")])
+    propagation(graph)
+    assert graph.types()["c"] == "TEXT"
+
+    graph.columns["a"]["type"] = None
+    propagation(graph, ["a"])
+
+    # Nothing reaches b any more, c is typed again by z
+    assert graph.types() == {"a": None, "b": None, "c": "TEXT", "z": "TEXT"}